@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import fnmatch
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+
+# Archivage des CSV bruts anciens en bundles compressés, un par dossier et par période :
+#
+#   Results/EthSepolia/archive/2025-04.tar.zst     membres = noms de fichiers d'origine
+#   Results/EthSepolia/archive/2025-04.json        index (mtime, taille, sha256 par membre)
+#
+# Seuls les fichiers horodatés dans leur nom et plus vieux que --older-than jours sont
+# archivés ; les fichiers « courants » réécrits sur place (benchmark_near.csv...) restent.
+# Un fichier n'est supprimé qu'après relecture du bundle et contrôle de son sha256.
+#
+# Lecture : iter_csv(dossier, motif) renvoie les fichiers présents puis les membres
+# archivés, décompressés en flux (un seul passage par bundle, rien n'est extrait sur
+# disque, un membre à la fois en mémoire). Le chemin renvoyé pour un membre est son chemin d'origine, donc les clés de
+# cache (normalisation) et la provenance du store (runs.source) ne changent pas.
+#
+# zstandard est optionnel : sans lui, les bundles sont écrits en .tar.gz (tarfile natif).
+#
+#   python archive.py ../Results [--older-than 30] [--bucket month|day] [--dry-run]
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = "archive"
+EXTENSIONS = (".tar.zst", ".tar.gz")
+ZSTD_LEVEL = 19
+GZIP_LEVEL = 9
+OLDER_THAN_DAYS = 30
+BUCKETS = {"month": 7, "day": 10}  # préfixe de la date ISO
+SKIP_DIRS = ("Graph", "Profiles", "Alerts", ARCHIVE_DIR)
+SKIP_FILES = ("normalized.csv",)
+
+
+def default_extension():
+    return EXTENSIONS[0] if zstandard is not None else EXTENSIONS[1]
+
+
+@contextlib.contextmanager
+def _writer(path):
+    if path.endswith(".zst"):
+        with open(path, "wb") as raw, \
+                zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False) as stream, \
+                tarfile.open(fileobj=stream, mode="w|") as tar:
+            yield tar
+    else:
+        with tarfile.open(path, "w:gz", compresslevel=GZIP_LEVEL) as tar:
+            yield tar
+
+
+@contextlib.contextmanager
+def _reader(path):
+    # lecture séquentielle (mode "r|") : décompression en flux, mémoire constante
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} : le module zstandard est requis pour lire ce bundle")
+        with open(path, "rb") as raw, \
+                zstandard.ZstdDecompressor().stream_reader(raw, closefd=False) as stream, \
+                tarfile.open(fileobj=stream, mode="r|") as tar:
+            yield tar
+    else:
+        with tarfile.open(path, "r|gz") as tar:
+            yield tar
+
+
+def index_path(bundle):
+    for ext in EXTENSIONS:
+        if bundle.endswith(ext):
+            return bundle[:-len(ext)] + ".json"
+    raise ValueError(f"bundle inconnu : {bundle}")
+
+
+def bundles(folder):
+    paths = []
+    for ext in EXTENSIONS:
+        paths += glob.glob(os.path.join(folder, ARCHIVE_DIR, "*" + ext))
+    return sorted(paths)
+
+
+def read_index(bundle):
+    # {membre: {"mtime", "size", "sha256"}} sans décompresser le bundle
+    path = index_path(bundle)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["members"]
+    with _reader(bundle) as tar:
+        return {ti.name: {"mtime": ti.mtime, "size": ti.size, "sha256": None} for ti in tar if ti.isfile()}
+
+
+def members(folder, pattern="*.csv"):
+    # {nom: (bundle, entrée d'index)} des fichiers archivés du dossier
+    found = {}
+    for bundle in bundles(folder):
+        for name, info in read_index(bundle).items():
+            if fnmatch.fnmatch(name, pattern):
+                found[name] = (bundle, info)
+    return found
+
+
+def iter_members(folder, pattern="*.csv", names=None):
+    # (chemin d'origine, flux texte) des membres archivés ; les bundles sans membre
+    # demandé ne sont pas ouverts
+    wanted = members(folder, pattern)
+    if names is not None:
+        wanted = {n: v for n, v in wanted.items() if n in names}
+    for bundle in sorted({b for b, _ in wanted.values()}):
+        with _reader(bundle) as tar:
+            for ti in tar:
+                if ti.name in wanted and wanted[ti.name][0] == bundle:
+                    # un seul membre (un run, quelques Kio) en mémoire à la fois ; TextIOWrapper
+                    # exige un flux seekable, ce que n'est pas un tar lu en mode "r|"
+                    text = tar.extractfile(ti).read().decode("utf-8")
+                    yield os.path.join(folder, ti.name), io.StringIO(text, newline="")
+
+
+def iter_csv(folder, pattern="*.csv", skip=None):
+    # fichiers présents puis membres archivés (un fichier présent masque le membre du
+    # même nom) ; skip(chemin) -> True écarte un fichier sans le lire ni le décompresser
+    # flux ouverts avec newline="" (convention de csv.reader) : les fins de ligne CRLF sont
+    # conservées, les lecteurs ligne à ligne doivent retirer '\r\n'
+    live = [p for p in sorted(glob.glob(os.path.join(folder, pattern)))
+            if os.path.basename(p) not in SKIP_FILES and not (skip and skip(p))]
+    for path in live:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield path, f
+    present = {os.path.basename(p) for p in glob.glob(os.path.join(folder, pattern))}
+    names = {n for n in members(folder, pattern)
+             if n not in present and n not in SKIP_FILES and not (skip and skip(os.path.join(folder, n)))}
+    if names:
+        yield from iter_members(folder, pattern, names)
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_date(path):
+    # date ISO tirée du nom de fichier (mêmes formats que ingest.run_key), ou None
+    import ingest
+
+    return ingest.run_key(path)[1]
+
+
+def candidates(folder, older_than_days=OLDER_THAN_DAYS, bucket="month", now=None):
+    # {période: [chemins]} des CSV horodatés de plus de older_than_days jours
+    cutoff = time.strftime("%Y-%m-%d", time.gmtime((now or time.time()) - older_than_days * 86400))
+    out = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.csv"))):
+        if os.path.basename(path) in SKIP_FILES:
+            continue
+        date = file_date(path)
+        if date is None or date[:10] >= cutoff:
+            continue
+        out.setdefault(date[:BUCKETS[bucket]], []).append(path)
+    return out
+
+
+def archive_bucket(folder, period, paths, remove=True):
+    # ajoute paths au bundle de la période (réécrit avec les anciens membres), vérifie, supprime
+    # -> chemin du bundle
+    os.makedirs(os.path.join(folder, ARCHIVE_DIR), exist_ok=True)
+    existing = [b for b in bundles(folder) if os.path.basename(index_path(b)) == f"{period}.json"]
+    bundle = existing[0] if existing else os.path.join(folder, ARCHIVE_DIR, period + default_extension())
+    index = read_index(bundle) if existing else {}
+    new = {os.path.basename(p): p for p in paths}
+    # même extension que le bundle (choix du codec), nom caché jusqu'au remplacement
+    tmp = os.path.join(os.path.dirname(bundle), ".tmp-" + os.path.basename(bundle))
+    with _writer(tmp) as out:
+        if existing:
+            with _reader(bundle) as tar:
+                for ti in tar:
+                    if ti.isfile() and ti.name not in new:
+                        out.addfile(ti, tar.extractfile(ti))
+        for name, path in sorted(new.items()):
+            st = os.stat(path)
+            out.add(path, arcname=name, recursive=False)
+            index[name] = {"mtime": st.st_mtime, "size": st.st_size, "sha256": _sha256(path)}
+
+    # relecture complète avant toute suppression
+    seen = {}
+    with _reader(tmp) as tar:
+        for ti in tar:
+            h = hashlib.sha256()
+            f = tar.extractfile(ti)
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+            seen[ti.name] = h.hexdigest()
+    bad = [n for n, info in index.items() if info["sha256"] and seen.get(n) != info["sha256"]]
+    if bad:
+        os.remove(tmp)
+        raise RuntimeError(f"{bundle} : vérification échouée pour {', '.join(bad)}")
+    os.replace(tmp, bundle)
+    with open(index_path(bundle) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"format": bundle.rsplit(".", 1)[-1], "members": index}, f, indent=1)
+    os.replace(index_path(bundle) + ".tmp", index_path(bundle))
+    if remove:
+        for path in new.values():
+            os.remove(path)
+    return bundle
+
+
+def iter_folders(root):
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(SKIP_DIRS))
+        if any(n.endswith(".csv") for n in files):
+            yield folder
+
+
+def archive_tree(root, older_than_days=OLDER_THAN_DAYS, bucket="month", dry_run=False):
+    # -> [(bundle, nb de fichiers, octets avant, octets du bundle)]
+    report = []
+    for folder in iter_folders(root):
+        for period, paths in candidates(folder, older_than_days, bucket).items():
+            before = sum(os.path.getsize(p) for p in paths)
+            if dry_run:
+                report.append((os.path.join(folder, ARCHIVE_DIR, period + default_extension()), len(paths), before, None))
+                continue
+            bundle = archive_bucket(folder, period, paths)
+            report.append((bundle, len(paths), before, os.path.getsize(bundle)))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archivage compressé des CSV de résultats anciens")
+    parser.add_argument("root", nargs="?", default=os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results')))
+    parser.add_argument("--older-than", type=int, default=OLDER_THAN_DAYS, help="âge minimal en jours")
+    parser.add_argument("--bucket", choices=sorted(BUCKETS), default="month")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+    if zstandard is None:
+        print("ℹ️ zstandard absent : bundles .tar.gz")
+    report = archive_tree(args.root, args.older_than, args.bucket, args.dry_run)
+    for bundle, n, before, after in report:
+        size = "-" if after is None else f"{after / 1024:.1f} Kio"
+        print(f"{os.path.relpath(bundle, args.root)} : {n} fichiers, {before / 1024:.1f} Kio -> {size}")
+    print(f"✅ {sum(r[1] for r in report)} fichiers archivés dans {len(report)} bundles"
+          + (" (simulation)" if args.dry_run else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,21 @@
 import os
+import queue
 import subprocess
+import threading
 import time
 
+import archive
+import distributed
+import metrics
+from changepoint import ChangeDetector
+from ingest import provenance
+import rowstream
+from resultstore import RESULTS_ROOT, ResultStore
+from scheduler import ChainPolicy, Scheduler, latency_cv
+from sequential import SamplingController
+from supervision import RunTimeout, Supervisor, run_with_timeout, tree_popen_kwargs
+from telemetry import ProcessTreeMonitor, overhead_warnings
+
 BASE_DIR = "C:/Users/yaya/Desktop/Benchmarks"
 
 # Définir les commandes par dossier (toutes blockchains)
@@ -21,27 +35,235 @@ COMMANDS = {
     ],
 }
     
+# Timeout dur par blockchain (secondes) : au-delà, l'arbre de processus du runner est tué
+TIMEOUTS = {
+    "BenchmarkEthereum": 1800,
+    "BenchmarkMoonBeam": 900,
+    "BenchmarkAvaxFuji": 900,
+    "benchmark-solana-v2": 600,
+    "BenchmarkNear": 600,
+}
+
+# Cadence cible par blockchain (secondes entre deux runs) et budget de runs sur 24 h.
+# Solana/NEAR sont rapides et gratuits ; Sepolia est lent et consomme des fonds de test.
+POLICIES = {
+    "BenchmarkEthereum": ChainPolicy(interval=1800, daily_budget=24, priority=2),
+    "BenchmarkMoonBeam": ChainPolicy(interval=600, daily_budget=96, priority=1),
+    "BenchmarkAvaxFuji": ChainPolicy(interval=600, daily_budget=96, priority=1),
+    "benchmark-solana-v2": ChainPolicy(interval=300, priority=0),
+    "BenchmarkNear": ChainPolicy(interval=300, priority=0),
+}
+
 # Liste des blockchains à traiter
 blockchain_dirs = [d for d in COMMANDS.keys()]
 
-while True:
-    print("\n--- Nouvelle boucle de benchmark lancee ---")
+# Les lignes émises par les runners (protocole rowstream) vont directement dans le store
+store = ResultStore()
 
-    for blockchain in blockchain_dirs:
-        print(f"\n>>> Execution pour {blockchain}...")
-        blockchain_path = os.path.join(BASE_DIR, blockchain)
+# Retries avec backoff + disjoncteur : 3 boucles ratées d'affilée retirent la chaîne
+# de la rotation pendant 10 min (puis 20, 40... jusqu'à 6 h), avec un essai de sonde ensuite
+supervisor = Supervisor(TIMEOUTS, retries=2, breaker_kwargs={"threshold": 3, "cooldown": 600})
 
-        command = COMMANDS[blockchain]
-        print(f"Commande lancée : {command}")
 
-        if isinstance(command, list):
-            process = subprocess.Popen(command)
-        else:
-            process = subprocess.Popen(command, cwd=blockchain_path, shell=True)
+# Échantillonnage séquentiel : les runners répètent chaque mesure jusqu'à ce que
+# l'IC95 fasse moins de ±5 % de la moyenne (10 échantillons min., 200 max.)
+SAMPLING = {"rel_precision": 0.05, "min_samples": 10, "max_samples": 200}
+sampling = SamplingController(**SAMPLING)
+
+# Endpoint Prometheus local (http://127.0.0.1:9108/metrics), mis à jour à chaque ligne reçue
+METRICS_PORT = 9108
+bench_metrics = metrics.BenchMetrics()
+try:
+    metrics.serve(bench_metrics, port=METRICS_PORT)
+except OSError as e:
+    # port pris (autre instance, exporteur) : on mesure quand même, sans endpoint
+    print(f"⚠️ Endpoint métriques indisponible sur le port {METRICS_PORT} : {e}")
+
+# Détection de ruptures (CUSUM) sur la latence et le gas moyens de chaque test, run après run
+detector = ChangeDetector(store)
+
+# Seuils d'alerte sur le coût du harnais (CPU / temps mur, RSS pic de l'arbre de processus)
+TELEMETRY_LIMITS = {"max_cpu_share": 0.5, "max_rss_mb": 1024}
+
+
+# Mode distribué (distributed.py) : avec --coordinator hôte:port, les runs partent vers
+# les workers connectés (un par point de mesure, ou un seul avec --spread) ; les chaînes
+# dues tournent en parallèle, dans la limite des workers libres. Écoute sur 127.0.0.1 sauf
+# adresse explicite, qui exige un secret partagé (--token ou BENCH_TOKEN)
+DISTRIBUTED = distributed.options_from_argv()
+coordinator = None
+if DISTRIBUTED.coordinator:
+    host, port = distributed.parse_address(DISTRIBUTED.coordinator)
+    coordinator = distributed.Coordinator(store, host, port, spread=DISTRIBUTED.spread,
+                                          token=DISTRIBUTED.token).start()
+
+
+def handle_message(run_id, chain, msg, reply):
+    # reply(answer) : réponse au runner (stdin local, ou worker distant)
+    if msg["type"] == "sample":
+        answer, sampler = sampling.on_sample(run_id, msg["test"], msg["latency_ms"])
+        reply(answer)
+        if answer == rowstream.REPLY_STOP:
+            print(f"[{chain}] {msg['test']} : {sampler.n} echantillons ({sampler.reason()}),"
+                  f" ±{sampler.half_width():.1f}ms")
+    elif msg["type"] == "row":
+        store.append_row(run_id, chain, msg)
+        bench_metrics.observe_row(chain, msg)
+    elif msg["type"] == "end":
+        print(f"[{chain}] fin de flux : {msg.get('rows', '?')} lignes annoncees")
+
+
+def run_once(blockchain, timeout):
+    blockchain_path = os.path.join(BASE_DIR, blockchain)
+    command = COMMANDS[blockchain]
+    print(f"Commande lancée : {command} (timeout {timeout}s)")
+
+    run_id = rowstream.new_run_id(blockchain)
+    # provenance : commande du runner, contrat wasm compilé (NEAR), machine
+    runner = command if isinstance(command, str) else " ".join(command)
+    store.start_run(run_id, blockchain, provenance=provenance(
+        blockchain, runner, os.path.join(blockchain_path, "build", "contract.wasm"), source="stream"))
+    popen_kwargs = dict(
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8", errors="replace", bufsize=1,
+        env=rowstream.stream_env(blockchain, run_id, adaptive=True), **tree_popen_kwargs()
+    )
+
+    if isinstance(command, list):
+        process = subprocess.Popen(command, **popen_kwargs)
+    else:
+        process = subprocess.Popen(command, cwd=blockchain_path, shell=True, **popen_kwargs)
+
+    attempt_start = time.monotonic()
+    monitor = ProcessTreeMonitor(process.pid).start()
+    reply = lambda answer: rowstream.reply(process.stdin, answer)
+    reader = lambda stream: rowstream.consume(stream, lambda msg: handle_message(run_id, blockchain, msg, reply))
+    try:
+        returncode = run_with_timeout(process, timeout, reader)
+    except RunTimeout:
+        store.finish_run(run_id, "timeout")
+        bench_metrics.observe_run(blockchain, "timeout", time.monotonic() - attempt_start, time.time())
+        raise
+    finally:
+        record_usage(run_id, blockchain, monitor.stop())
+        sampling.forget(run_id)
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+    status = "ok" if returncode == 0 else "failed"
+    close_run(run_id, blockchain, status, returncode, time.monotonic() - attempt_start)
+
+    print(f"Processus pour {blockchain} termine (run {run_id}, code {returncode}).")
+    return returncode
 
-        process.wait()
 
-        print(f"Processus pour {blockchain} termine.")
+def record_usage(run_id, blockchain, usage, where=""):
+    store.record_telemetry(run_id, blockchain, usage)
+    print(f"[{blockchain}{where}] ressources : {usage['wall_s']:.1f}s mur, {usage['cpu_s']:.1f}s CPU,"
+          f" {usage['peak_rss_mb']:.0f} Mo RSS pic, {usage['n_procs']} processus ({usage['source']})")
+    for warning in overhead_warnings(usage, **TELEMETRY_LIMITS):
+        print(f"[{blockchain}{where}] ATTENTION : {warning}")
+
+
+def close_run(run_id, blockchain, status, returncode, elapsed, vantage=None):
+    store.finish_run(run_id, status, returncode)
+    if status == "ok":
+        for alert in detector.ingest_run(run_id, blockchain, vantage):
+            print(f"[{blockchain}] RUPTURE {alert['metric']} {alert['direction']} sur {alert['test']} :"
+                  f" {alert['value']:.1f} (base {alert['baseline']:.1f}, score {alert['score']})")
+    bench_metrics.observe_run(blockchain, status, elapsed, time.time())
+
+
+def run_remote(blockchain, timeout, on_assigned=None):
+    # un run par point de mesure, exécutés en parallèle par les workers
+    attempt_start = time.monotonic()
+    results = coordinator.run_job(blockchain, timeout, handle_message, on_assigned=on_assigned)
+    for r in results:
+        if r["usage"]:
+            record_usage(r["run_id"], blockchain, r["usage"], where=f" @ {r['vantage']}")
+        sampling.forget(r["run_id"])
+        close_run(r["run_id"], blockchain, r["status"], r["returncode"], time.monotonic() - attempt_start,
+                  r["vantage"])
+        print(f"[{blockchain} @ {r['vantage']}] run {r['run_id']} : {r['status']} (code {r['returncode']})")
+    return distributed.outcome(results)
+
+
+# Archivage quotidien des CSV bruts de plus de archive.OLDER_THAN_DAYS jours en bundles
+# compressés (les scripts d'analyse les relisent en flux). Premier passage 24 h après le
+# démarrage ; pour archiver tout de suite : python archive.py ../Results
+ARCHIVE_EVERY = 24 * 3600
+last_archive = time.time()
+
+
+def archive_old_results():
+    try:
+        for bundle, n, before, after in archive.archive_tree(RESULTS_ROOT):
+            print(f"Archivé : {n} fichiers -> {bundle} ({before // 1024} -> {after // 1024} Kio)")
+    except (OSError, RuntimeError) as e:
+        print(f"⚠️ Archivage : {e}")
+
+
+scheduler = Scheduler({chain: POLICIES[chain] for chain in blockchain_dirs},
+                      cv_fn=lambda chain: latency_cv(store, chain))
+# runs distribués terminés (chaîne, début, statut) : seule la boucle principale touche au scheduler
+completed = queue.Queue()
+
+
+def dispatch(blockchain):
+    # le run part dans un thread dès que ses workers sont libres, puis la boucle passe à la
+    # chaîne suivante une fois les workers réservés (pas deux réservations concurrentes)
+    coordinator.wait_free(blockchain)
+    assigned = threading.Event()
+
+    def supervise():
+        started_at, status = time.time(), "failed"
+        try:
+            status = supervisor.run(blockchain, lambda timeout: run_remote(blockchain, timeout, assigned.set))
+        finally:
+            assigned.set()
+            completed.put((blockchain, started_at, status))
+
+    threading.Thread(target=supervise, daemon=True).start()
+    assigned.wait()
+
+
+def finish(blockchain, started_at, status):
+    global last_archive
+    bench_metrics.observe_cycle(blockchain, time.time() - started_at)
+    if status == "skipped":
+        scheduler.skip(blockchain, supervisor.breaker(blockchain).retry_in())
+        return
+    scheduler.done(blockchain, started_at)
+    print(f"[{blockchain}] statut : {status}, prochain run dans {scheduler.intervals[blockchain]:.0f}s")
+    if time.time() - last_archive > ARCHIVE_EVERY:
+        last_archive = time.time()
+        archive_old_results()
+
+
+while True:
+    while not completed.empty():
+        finish(*completed.get())
+    if not scheduler.queue:
+        # toutes les chaînes sont en cours sur les workers
+        finish(*completed.get())
+        continue
+    blockchain, wait = scheduler.pop_due()
+    if wait > 0:
+        print(f"\nProchain run : {blockchain} dans {wait:.0f}s")
+        due = time.time() + wait
+        try:
+            result = completed.get(timeout=wait)
+        except queue.Empty:
+            pass
+        else:
+            # un run distribué s'est terminé pendant l'attente : on le replanifie et on réévalue
+            scheduler.skip(blockchain, max(0.0, due - time.time()))
+            finish(*result)
+            continue
 
-    print("\nTous les benchmarks ont été exécutés. Pause de 5 minutes...")
-    time.sleep(120)  # Pause de 5 minutes avant la prochaine boucle
+    print(f"\n>>> Execution pour {blockchain}...")
+    if coordinator is not None:
+        dispatch(blockchain)
+        continue
+    started_at = time.time()
+    finish(blockchain, started_at, supervisor.run(blockchain, lambda timeout: run_once(blockchain, timeout)))
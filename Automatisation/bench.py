@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+# Point d'entrée unique des outils d'analyse. Les modules lourds (pandas, numpy,
+# matplotlib, scipy) ne sont importés que par les sous-commandes qui en ont besoin :
+#
+#   python bench.py summary [--json] [--tests]   dernière latence moyenne par réseau (sqlite3 seul)
+#   python bench.py plot latency --stats hampel  lance un script d'analyse (options transmises)
+#   python bench.py vantages [--hours 24]        latence par point de mesure (runs distribués)
+#   python bench.py alerts [dossier]             graphes des ruptures détectées
+#   python bench.py ingest ../Results            importe les CSV (dédoublonnés, avec provenance)
+#   python bench.py archive --older-than 30      compresse les CSV anciens en bundles par mois
+#   python bench.py watch [-- --stats hampel]    ré-analyse incrémentale à l'arrivée des résultats
+#   python bench.py serve [--port 8765]          agrégats du store en JSON (ETag, cache invalidé à l'ingestion)
+#   python bench.py phases [--chain X]           latence des transactions par phase (signature -> finalité)
+#   python bench.py sandbox [--plot]             courbes de gas déterministes (sandbox NEAR local)
+#   python bench.py throughput evm --rpc URL ... TPS en pipeline, latence sous charge (mock hors ligne)
+#   python bench.py startup [--check]            temps de démarrage et modules lourds chargés
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_ROOT = os.path.abspath(os.path.join(HERE, '../Results'))
+DEFAULT_STORE = os.environ.get("BENCH_STORE", os.path.join(RESULTS_ROOT, "store.sqlite"))
+
+SCRIPTS = {
+    "gas": "othersall/analysegascomp.py",
+    "latency": "othersall/analyselatenceall.py",
+    "gas-vs-latency": "othersall/analysegasvslatency.py",
+    "evm": "evm/analyseEVM.py",
+    "evmv": "evm/analyseEVMV.py",
+    "curves": "evm/analyse_courbesEVMV.py",
+    "curves-hourly": "evm/analyses_courbeEVMssheure.py",
+    "heatmap": "testfinal.py",
+    "heatmap1": "testfinal1.py",
+    "heatmap-en": "testfinaleng.py",
+}
+
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "scipy")
+# sous-commandes qui doivent rester légères (vérifiées par `startup --check`)
+LIGHT_PROBES = {
+    "help": ["--help"],
+    "summary": ["summary"],
+    "summary-json": ["summary", "--json"],
+    "vantages": ["vantages"],
+}
+
+LATEST_SQL = """
+SELECT r.chain, r.run_id, r.finished_at, COUNT(DISTINCT x.test), COUNT(x.latency_ms), AVG(x.latency_ms)
+FROM runs r JOIN rows x ON x.run_id = r.run_id
+WHERE r.status = 'ok'
+  AND r.started_at = (SELECT MAX(started_at) FROM runs WHERE chain = r.chain AND status = 'ok')
+GROUP BY r.chain, r.run_id
+ORDER BY r.chain
+"""
+TESTS_SQL = """
+SELECT test, COUNT(latency_ms), AVG(latency_ms), AVG(gas) FROM rows WHERE run_id = ?
+GROUP BY test ORDER BY test
+"""
+# partagé avec queryservice.py (/vantages) : {where} porte sur runs et r (= rows)
+VANTAGE_SQL = """
+SELECT r.chain, COALESCE(runs.vantage, runs.host, 'local'), {test}, COUNT(DISTINCT r.run_id), COUNT(r.latency_ms),
+       AVG(r.latency_ms)
+FROM rows r JOIN runs ON runs.run_id = r.run_id
+WHERE {where}
+GROUP BY 1, 2, 3
+ORDER BY 1, 3, 6
+"""
+
+
+def _connect_ro(path):
+    if not os.path.exists(path):
+        raise SystemExit(f"Store introuvable : {path}")
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def latest_summary(path=DEFAULT_STORE, tests=False):
+    conn = _connect_ro(path)
+    try:
+        summary = []
+        for chain, run_id, finished_at, n_tests, n, mean in conn.execute(LATEST_SQL):
+            entry = {"chain": chain, "run_id": run_id, "finished_at": finished_at, "tests": n_tests,
+                     "samples": n, "mean_latency_ms": round(mean, 2) if mean is not None else None}
+            if tests:
+                entry["per_test"] = [
+                    {"test": test, "samples": k, "mean_latency_ms": round(lat, 2) if lat is not None else None,
+                     "mean_gas": gas}
+                    for test, k, lat, gas in conn.execute(TESTS_SQL, (run_id,))
+                ]
+            summary.append(entry)
+        return summary
+    finally:
+        conn.close()
+
+
+def cmd_summary(args):
+    summary = latest_summary(args.store, args.tests)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    if not summary:
+        print("Aucun run terminé dans le store.")
+        return 0
+    print(f"{'network':<22}{'finished_at':<28}{'tests':>6}{'samples':>9}{'mean_ms':>11}")
+    for e in summary:
+        mean = "-" if e["mean_latency_ms"] is None else f"{e['mean_latency_ms']:.1f}"
+        print(f"{e['chain']:<22}{e['finished_at'] or '-':<28}{e['tests']:>6}{e['samples']:>9}{mean:>11}")
+        for t in e.get("per_test", []):
+            mean = "-" if t["mean_latency_ms"] is None else f"{t['mean_latency_ms']:.1f}"
+            print(f"  {t['test']:<48}{t['samples']:>9}{mean:>11}")
+    return 0
+
+
+def vantage_summary(path=DEFAULT_STORE, hours=24.0, tests=False):
+    # latence moyenne par (réseau, point de mesure[, test]) et rapport au meilleur site
+    since = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(time.time() - hours * 3600))
+    conn = _connect_ro(path)
+    try:
+        rows = conn.execute(VANTAGE_SQL.format(test="r.test" if tests else "NULL",
+                                               where="runs.status = 'ok' AND runs.started_at >= ?"),
+                            (since,)).fetchall()
+    finally:
+        conn.close()
+    return vantage_entries(rows)
+
+
+def vantage_entries(rows):
+    # lignes de VANTAGE_SQL -> dicts, avec le rapport au meilleur site du même (réseau, test)
+    best = {}
+    for chain, _, test, _, _, mean in rows:
+        if mean is not None:
+            best[(chain, test)] = min(best.get((chain, test), mean), mean)
+    return [{"chain": chain, "vantage": vantage, "test": test, "runs": runs, "samples": n,
+             "mean_latency_ms": round(mean, 2) if mean is not None else None,
+             "vs_best": round(mean / best[(chain, test)], 3) if mean and best.get((chain, test)) else None}
+            for chain, vantage, test, runs, n, mean in rows]
+
+
+def cmd_vantages(args):
+    summary = vantage_summary(args.store, args.hours, args.tests)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    if not summary:
+        print(f"Aucun run terminé depuis {args.hours:g} h.")
+        return 0
+    test_col = f"{'test':<40}" if args.tests else ""
+    print(f"{'network':<22}{test_col}{'vantage':<20}{'runs':>6}{'samples':>9}{'mean_ms':>11}{'vs_best':>9}")
+    for e in summary:
+        mean = "-" if e["mean_latency_ms"] is None else f"{e['mean_latency_ms']:.1f}"
+        ratio = "-" if e["vs_best"] is None else f"{e['vs_best']:.2f}"
+        test = f"{e['test']:<40}" if args.tests else ""
+        print(f"{e['chain']:<22}{test}{e['vantage']:<20}{e['runs']:>6}{e['samples']:>9}{mean:>11}{ratio:>9}")
+    return 0
+
+
+def cmd_plot(args):
+    import runpy
+
+    path = os.path.join(HERE, SCRIPTS[args.script])
+    sys.argv = [path] + args.rest
+    runpy.run_path(path, run_name="__main__")
+    return 0
+
+
+def cmd_alerts(args):
+    import changepoint
+
+    out_dir = args.out_dir or os.path.join(RESULTS_ROOT, "Alerts")
+    for p in changepoint.plot_alerts(out_dir, args.store):
+        print(f"Saved change-point plot: {p}")
+    return 0
+
+
+def cmd_ingest(args):
+    import ingest
+
+    return ingest.main(args.rest + ["--store", args.store])
+
+
+def cmd_archive(args):
+    import archive
+
+    return archive.main(args.rest)
+
+
+def cmd_watch(args):
+    import watch
+
+    return watch.main(["--store", args.store] + args.rest)
+
+
+def cmd_serve(args):
+    import queryservice
+
+    return queryservice.main(["--store", args.store] + args.rest)
+
+
+def cmd_phases(args):
+    import phases
+
+    return phases.main(args.rest + ["--store", args.store])
+
+
+def cmd_throughput(args):
+    import throughput
+
+    # --store appartient aux sous-commandes evm/near de throughput.py
+    rest = args.rest + (["--store", args.store] if args.rest[:1] in (["evm"], ["near"]) else [])
+    return throughput.main(rest)
+
+
+def cmd_sandbox(args):
+    import sandboxbench
+
+    return sandboxbench.main(["--store", args.store] + args.rest)
+
+
+def probe(argv, repeat=5):
+    # Lance `bench.py argv` dans des interpréteurs neufs avec -X importtime :
+    # -> (temps médian en ms, modules lourds importés)
+    times = []
+    heavy = set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__)] + argv,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        times.append((time.perf_counter() - start) * 1000)
+        for line in proc.stderr.splitlines():
+            if line.startswith("import time:"):
+                name = line.rsplit("|", 1)[-1].strip()
+                if name.split(".")[0] in HEAVY_MODULES:
+                    heavy.add(name.split(".")[0])
+    times.sort()
+    return times[len(times) // 2], sorted(heavy)
+
+
+def cmd_startup(args):
+    probes = dict(LIGHT_PROBES)
+    results = []
+    for name, argv in probes.items():
+        median_ms, heavy = probe(argv, args.repeat)
+        results.append({"probe": name, "argv": argv, "median_ms": round(median_ms, 1), "heavy_modules": heavy})
+    # référence : coût d'import de la pile d'analyse complète
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import pandas, numpy, matplotlib.pyplot"],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    baseline_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    record = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+              "repeat": args.repeat, "analysis_stack_ms": baseline_ms, "probes": results}
+    out_dir = os.path.join(RESULTS_ROOT, "Profiles")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "startup.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    if args.json:
+        print(json.dumps(record, indent=2))
+    else:
+        print(f"{'probe':<16}{'median_ms':>10}  heavy modules")
+        for r in results:
+            print(f"{r['probe']:<16}{r['median_ms']:>10}  {', '.join(r['heavy_modules']) or '-'}")
+        print(f"{'(pandas+mpl)':<16}{baseline_ms:>10}")
+    leaked = [r for r in results if r["heavy_modules"]]
+    if args.check and leaked:
+        print("Modules lourds chargés par une sous-commande légère : "
+              + "; ".join(f"{r['probe']}: {', '.join(r['heavy_modules'])}" for r in leaked), file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench", description="Outils d'analyse des benchmarks")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="chemin du store SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("summary", help="dernière latence moyenne par réseau")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--tests", action="store_true", help="détail par test du dernier run")
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser("vantages", help="latence par point de mesure")
+    p.add_argument("--hours", type=float, default=24.0, help="fenêtre (heures)")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--tests", action="store_true", help="détail par test")
+    p.set_defaults(func=cmd_vantages)
+
+    p = sub.add_parser("plot", help="lance un script d'analyse")
+    p.add_argument("script", choices=sorted(SCRIPTS))
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="options du script (--stats, --ci, --profile...)")
+    p.set_defaults(func=cmd_plot)
+
+    p = sub.add_parser("alerts", help="graphes des ruptures détectées")
+    p.add_argument("out_dir", nargs="?")
+    p.set_defaults(func=cmd_alerts)
+
+    p = sub.add_parser("ingest", help="importe des CSV dans le store")
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="fichiers/dossiers et options de ingest.py")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("archive", help="archive les CSV anciens en bundles compressés")
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="dossier et options de archive.py")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("watch", help="relance ingestion et graphes à l'arrivée de nouveaux résultats")
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="options de watch.py")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("serve", help="service JSON en lecture seule sur le store")
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="options de queryservice.py")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("phases", help="latence des transactions décomposée par phase")
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="dossier et options de phases.py")
+    p.set_defaults(func=cmd_phases)
+
+    p = sub.add_parser("sandbox", help="courbes de gas déterministes dans un sandbox NEAR local")
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="options de sandboxbench.py")
+    p.set_defaults(func=cmd_sandbox)
+
+    p = sub.add_parser("throughput", help="débit soutenu en écriture (TPS) et point de saturation")
+    p.add_argument("rest", nargs=argparse.REMAINDER, help="mock | evm | near et leurs options")
+    p.set_defaults(func=cmd_throughput)
+
+    p = sub.add_parser("startup", help="mesure le démarrage des sous-commandes")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--check", action="store_true", help="échoue si une sous-commande légère charge un module lourd")
+    p.set_defaults(func=cmd_startup)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    # REMAINDER ne capture pas une option en tête (`bench watch --debounce 1`) :
+    # les options inconnues reviennent aux sous-commandes qui transmettent leurs arguments
+    args, unknown = parser.parse_known_args(argv)
+    if unknown:
+        if not hasattr(args, "rest"):
+            parser.error(f"arguments non reconnus : {' '.join(unknown)}")
+        args.rest = unknown + args.rest
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
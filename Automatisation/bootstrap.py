@@ -0,0 +1,149 @@
+import argparse
+import sys
+from statistics import NormalDist
+
+import numpy as np
+
+import robuststats
+
+# Intervalles de confiance bootstrap par groupe, pour tous les groupes à la fois :
+# les échantillons sont triés par groupe et chaque réplique tire, pour chaque ligne,
+# un index uniforme dans le bloc de son groupe (matrice d'index B x N). Pour la
+# moyenne, np.add.reduceat donne les sommes par groupe ; pour les estimateurs de
+# robuststats, chaque (réplique, groupe) devient un groupe composite b x G + g et
+# group_stats les calcule en un seul appel. Aucune boucle Python par groupe.
+#
+#   percentile  quantiles alpha/2, 1 - alpha/2 des répliques
+#   bca         percentile corrigé du biais (z0) et de l'asymétrie (accélération
+#               par jackknife, en forme fermée pour la moyenne ; a = 0, soit
+#               l'intervalle BC, pour les autres estimateurs)
+#
+# Options des scripts : --ci normal|t|percentile|bca, --n-boot, --seed
+
+CI_METHODS = ("normal", "t", "percentile", "bca")
+DEFAULT_SEED = 20250427
+# taille max d'un bloc de tirages (répliques x lignes) pour borner la mémoire
+BLOCK_CELLS = 4_000_000
+
+
+def options_from_argv(argv=None, default_ci="normal"):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--ci", choices=CI_METHODS, default=default_ci)
+    parser.add_argument("--n-boot", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args
+
+
+def bootstrap_replicates(values, codes, ngroups, stat="mean", n_boot=2000, seed=DEFAULT_SEED):
+    # -> (estimation observée (G,), répliques (n_boot, G), effectifs (G,))
+    values = np.asarray(values, dtype=float)
+    codes = np.asarray(codes, dtype=np.int64)
+    ok = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[ok], codes[ok]
+    order = np.argsort(codes, kind="stable")
+    v, c = values[order], codes[order]
+    counts = np.bincount(c, minlength=ngroups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    theta = robuststats.group_stats(v, c, ngroups, stat)["center"]
+
+    boot = np.full((n_boot, ngroups), np.nan)
+    n = len(v)
+    if n == 0:
+        return theta, boot, counts
+    rng = np.random.default_rng(seed)
+    row_start = starts[c]
+    row_count = counts[c]
+    block = max(1, BLOCK_CELLS // n)
+    for b0 in range(0, n_boot, block):
+        b = min(block, n_boot - b0)
+        idx = row_start + (rng.random((b, n)) * row_count).astype(np.int64)
+        if stat == "mean":
+            sums = np.add.reduceat(v[idx], starts[present], axis=1)
+            boot[b0:b0 + b, present] = sums / counts[present]
+        else:
+            composite = (np.arange(b)[:, None] * ngroups + c).ravel()
+            center = robuststats.group_stats(v[idx].ravel(), composite, b * ngroups, stat)["center"]
+            boot[b0:b0 + b] = center.reshape(b, ngroups)
+    return theta, boot, counts
+
+
+def _acceleration(values, codes, ngroups):
+    # Jackknife de la moyenne : theta_(i) = (S - x_i) / (n - 1), d_i = mean(theta_(.)) - theta_(i)
+    counts = np.bincount(codes, minlength=ngroups).astype(float)
+    sums = np.bincount(codes, weights=values, minlength=ngroups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        loo = (sums[codes] - values) / (counts[codes] - 1)
+        loo_mean = np.bincount(codes, weights=loo, minlength=ngroups) / counts
+        d = loo_mean[codes] - loo
+        num = np.bincount(codes, weights=d ** 3, minlength=ngroups)
+        den = 6 * np.bincount(codes, weights=d ** 2, minlength=ngroups) ** 1.5
+        return np.where(den > 0, num / den, 0.0)
+
+
+_norm = NormalDist()
+_cdf = np.vectorize(_norm.cdf, otypes=[float])
+_ppf = np.vectorize(_norm.inv_cdf, otypes=[float])
+
+
+def bootstrap_ci(values, codes, ngroups, method="percentile", stat="mean", alpha=0.05, n_boot=2000,
+                 seed=DEFAULT_SEED):
+    # -> (estimation, borne basse, borne haute, effectif), tableaux (G,)
+    values = np.asarray(values, dtype=float)
+    codes = np.asarray(codes, dtype=np.int64)
+    theta, boot, counts = bootstrap_replicates(values, codes, ngroups, stat, n_boot, seed)
+    boot.sort(axis=0)
+    levels = np.array([alpha / 2, 1 - alpha / 2])
+    if method == "percentile":
+        q = np.broadcast_to(levels[:, None], (2, ngroups))
+    elif method == "bca":
+        ok = ~np.isnan(values) & (codes >= 0)
+        below = (boot < theta).sum(axis=0) + 0.5 * (boot == theta).sum(axis=0)
+        prop = np.clip(below / n_boot, 1 / (n_boot + 1), n_boot / (n_boot + 1))
+        z0 = _ppf(prop)
+        a = _acceleration(values[ok], codes[ok], ngroups) if stat == "mean" else 0.0
+        z = _ppf(levels)[:, None]
+        q = _cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+    else:
+        raise ValueError(f"méthode bootstrap inconnue : {method}")
+    # quantile par groupe à des niveaux différents : index dans les répliques triées
+    pos = np.clip(np.rint(q * (n_boot - 1)).astype(np.int64), 0, n_boot - 1)
+    bounds = np.take_along_axis(boot, pos, axis=0)
+    return theta, bounds[0], bounds[1], counts
+
+
+def aggregate_ci(df, by, col, method="percentile", stat="mean", alpha=0.05, n_boot=2000, seed=DEFAULT_SEED):
+    # DataFrame indexé comme df.groupby(by)[col] : center, lo, hi, count
+    import pandas as pd
+
+    grouped = df.groupby(by, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    index = grouped.size().index
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+    theta, lo, hi, counts = bootstrap_ci(values, codes, len(index), method, stat, alpha, n_boot, seed)
+    return pd.DataFrame({"center": theta, "lo": lo, "hi": hi, "count": counts}, index=index)
+
+
+def add_interval(agg, df, by, col, stat, opts, t_factor=None):
+    # Ajoute lo / hi (IC95) à la sortie de robuststats.aggregate selon opts.ci ;
+    # t_factor(count) -> quantile de Student, par défaut sequential.t_ppf (sans scipy)
+    if opts.ci in ("percentile", "bca"):
+        boot = aggregate_ci(df, by, col, opts.ci, stat, n_boot=opts.n_boot, seed=opts.seed)
+        agg["lo"], agg["hi"] = boot["lo"], boot["hi"]
+        return agg
+    if opts.ci == "t":
+        if t_factor is None:
+            from sequential import t_ppf
+            t_factor = np.vectorize(lambda n: t_ppf(0.975, n - 1) if n > 1 else np.nan, otypes=[float])
+        half = agg["se"] * t_factor(agg["count"].to_numpy())
+    else:
+        half = agg["se"] * 1.96
+    agg["lo"], agg["hi"] = agg["center"] - half, agg["center"] + half
+    return agg
+
+
+def error_bars(center, lo, hi):
+    # yerr asymétrique pour plt.bar / plt.errorbar (un IC qui n'encadre pas le centre est tronqué à 0)
+    center = np.asarray(center, dtype=float)
+    return np.clip(np.vstack([center - np.asarray(lo, dtype=float), np.asarray(hi, dtype=float) - center]), 0, None)
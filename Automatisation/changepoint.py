@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import json
+import math
+import os
+import sys
+
+# Détection en ligne des changements de niveau (CUSUM bilatéral) sur les séries
+# par (réseau, test, métrique) : une mise à jour O(1) par nouveau point, état
+# persisté dans le store pour reprendre après un redémarrage de l'orchestrateur.
+#
+# Chaque série apprend d'abord sa ligne de base (warmup points, Welford), puis
+# cumule les écarts standardisés z = (x - moyenne) / écart-type :
+#   S+ = max(0, S+ + z - k)    S- = max(0, S- - z - k)
+# Une alerte est levée quand S+ ou S- dépasse h ; la série réapprend alors sa base.
+
+RESULTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results'))
+ALERTS_LOG = os.path.join(RESULTS_ROOT, 'alerts.jsonl')
+METRICS = {"latency": "latency_ms", "gas": "gas"}
+
+
+class Cusum:
+    def __init__(self, k=0.5, h=5.0, warmup=10, rel_floor=0.01):
+        self.k = k
+        self.h = h
+        self.warmup = warmup
+        # plancher d'écart-type relatif : sur une série constante (gas), un saut isolé > 6 %
+        # ou une dérive soutenue de quelques % suffit à lever une alerte
+        self.rel_floor = rel_floor
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.pos = 0.0
+        self.neg = 0.0
+
+    def sd(self):
+        sd = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        return max(sd, self.rel_floor * abs(self.mean), 1e-9)
+
+    def update(self, x):
+        # Retourne None, ou (direction, score, moyenne de base) si un changement est détecté
+        if self.n < self.warmup:
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+            return None
+        z = (x - self.mean) / self.sd()
+        self.pos = max(0.0, self.pos + z - self.k)
+        self.neg = max(0.0, self.neg - z - self.k)
+        if self.pos > self.h or self.neg > self.h:
+            alert = ("up" if self.pos > self.h else "down", max(self.pos, self.neg), self.mean)
+            self.reset()
+            self.update(x)
+            return alert
+        return None
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "pos": self.pos, "neg": self.neg}
+
+    def load(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+        return self
+
+
+class ChangeDetector:
+    def __init__(self, store, alerts_log=ALERTS_LOG, **cusum_kwargs):
+        self.store = store
+        self.alerts_log = alerts_log
+        self.cusum_kwargs = cusum_kwargs
+        self.series = {}
+
+    def _series(self, key):
+        series = self.series.get(key)
+        if series is None:
+            series = Cusum(**self.cusum_kwargs)
+            state = self.store.load_detector_state("|".join(key))
+            if state:
+                series.load(state)
+            self.series[key] = series
+        return series
+
+    def update(self, chain, test, metric, value, ts, run_id=None):
+        key = (chain, test, metric)
+        series = self._series(key)
+        result = series.update(float(value))
+        self.store.save_detector_state("|".join(key), series.to_dict())
+        if result is None:
+            return None
+        direction, score, baseline = result
+        alert = {"ts": ts, "chain": chain, "test": test, "metric": metric, "direction": direction,
+                 "value": value, "baseline": baseline, "score": round(score, 2), "run_id": run_id}
+        self.store.record_alert(alert)
+        if self.alerts_log:
+            os.makedirs(os.path.dirname(self.alerts_log), exist_ok=True)
+            with open(self.alerts_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(alert) + "\n")
+        return alert
+
+    def ingest_run(self, run_id, chain, vantage=None):
+        # Un point par (test, métrique) : moyenne du run, horodatée au début du run.
+        # Runs distribués : une série par point de mesure ("chaîne@site"), les niveaux
+        # de latence de deux sites ne sont pas comparables
+        chain = f"{chain}@{vantage}" if vantage else chain
+        rows = self.store.query(
+            "SELECT r.test, AVG(r.latency_ms), AVG(r.gas), runs.started_at FROM rows r"
+            " JOIN runs ON runs.run_id = r.run_id WHERE r.run_id = ? GROUP BY r.test", (run_id,))
+        alerts = []
+        for test, latency, gas, started_at in rows:
+            for metric, value in (("latency", latency), ("gas", gas)):
+                if value is not None:
+                    alert = self.update(chain, test, metric, value, started_at, run_id)
+                    if alert:
+                        alerts.append(alert)
+        return alerts
+
+
+def plot_alerts(out_dir, path=None):
+    # Séries par run des (réseau, test, métrique) ayant au moins une alerte, avec les ruptures marquées
+    import pandas as pd
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import resultstore
+
+    path = path or resultstore.DEFAULT_PATH
+    alerts = resultstore.load_table("alerts", path)
+    if alerts.empty:
+        print("Aucune alerte enregistree.")
+        return []
+    rows = resultstore.load_rows(sorted({c.partition("@")[0] for c in alerts["chain"].unique()}), path)
+    os.makedirs(out_dir, exist_ok=True)
+    saved = []
+    for (chain, test, metric), sub_alerts in alerts.groupby(["chain", "test", "metric"]):
+        base, _, vantage = chain.partition("@")
+        sub = rows[(rows["chain"] == base) & (rows["test"] == test)]
+        if vantage:
+            sub = sub[sub["vantage"] == vantage]
+        series = sub.groupby("run_started_at")[METRICS[metric]].mean().dropna()
+        if series.empty:
+            continue
+        plt.figure(figsize=(10, 4), dpi=120)
+        plt.plot(series.index, series.values, marker='.', label=f"{metric} per run")
+        for _, a in sub_alerts.iterrows():
+            ts = pd.to_datetime(a["ts"], utc=True)
+            plt.axvline(ts, color="red" if a["direction"] == "up" else "green", linestyle="--", alpha=0.7)
+            plt.annotate(f"{a['direction']} {a['score']:.1f}", (ts, series.max()), fontsize=7, rotation=90,
+                         va="top", ha="right")
+        plt.title(f"{chain} – {test} – {metric} change points")
+        plt.grid(True, linestyle="--", alpha=0.5)
+        plt.legend()
+        plt.tight_layout()
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in f"{chain}_{test}_{metric}")
+        out = os.path.join(out_dir, f"{safe}.png")
+        plt.savefig(out)
+        plt.close()
+        saved.append(out)
+    return saved
+
+
+if __name__ == "__main__":
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(RESULTS_ROOT, "Alerts")
+    for p in plot_alerts(out_dir):
+        print(f"Saved change-point plot: {p}")
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+import argparse
+import hmac
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+import rowstream
+from supervision import RunTimeout, backoff_delay, kill_tree, run_with_timeout, tree_popen_kwargs
+
+# Runners distribués : l'orchestrateur (coordinateur) envoie les runs à N workers par
+# une file de jobs TCP, chaque worker lance le runner localement et renvoie ses
+# messages rowstream, étiquetés par run et par point de mesure (vantage).
+#
+#   BENCH_TOKEN=secret python automateV3.py --coordinator 0.0.0.0:7070
+#   BENCH_TOKEN=secret python distributed.py worker --connect orchestrateur:7070 --vantage paris-fibre \
+#       --run "BenchmarkNear=npm run bench1"
+#   python distributed.py worker --connect 127.0.0.1:7070 --vantage test-b --slots 2 --run ...   (même machine)
+#   BENCH_VANTAGE=test-c python distributed.py worker --run ...   (site par défaut du processus)
+#
+# Sécurité : le coordinateur écoute sur 127.0.0.1 par défaut ; pour une autre adresse, un
+# secret partagé (--token ou BENCH_TOKEN) est obligatoire et vérifié dans le hello (côté
+# coordinateur) et dans chaque job (côté worker). Un worker ne lance que ses propres
+# commandes --run : le job ne porte que le nom de la chaîne, jamais de commande.
+#
+# Protocole : une ligne JSON par message, {"v": 1, "type": ..., ...}
+#   worker -> coordinateur : hello (token, vantage, host, chains, slots), started (run_id,
+#       provenance), row / sample / end / meta (run_id + champs rowstream), done
+#       (run_id, status, returncode, usage), pong
+#   coordinateur -> worker : job (token, run_id, chain, timeout, adaptive),
+#       reply (run_id, answer) pour l'échantillonnage séquentiel, cancel (run_id), ping
+#
+# Répartition : un job est envoyé à un worker libre de chaque point de mesure (latences
+# comparables d'un site à l'autre). --spread envoie chaque job à un seul worker, le moins
+# chargé. L'orchestrateur lance les chaînes dues en parallèle dès que wait_free le permet :
+# les slots libres (--slots, ou plusieurs workers d'un même site) servent à mesurer
+# plusieurs chaînes à la fois, jamais à répéter la même chaîne sur un site.
+
+DEFAULT_PORT = 7070
+# attente d'un worker quand aucun n'est connecté au moment d'un job
+WORKER_WAIT_S = 30.0
+# marge au-delà du timeout du runner pour recevoir le "done" du worker
+DONE_GRACE_S = 30.0
+PING_S = 15.0
+# statut renvoyé quand le worker se déconnecte en cours de run
+LOST = "lost"
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+def check_token(received, expected):
+    # comparaison à temps constant ; sans secret configuré, seul un hello sans jeton passe
+    return hmac.compare_digest(str(received or ""), str(expected or ""))
+
+
+def options_from_argv(argv=None):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--coordinator", default=None, help="hôte:port d'écoute des workers")
+    parser.add_argument("--token", default=os.environ.get("BENCH_TOKEN"),
+                        help="secret partagé avec les workers (défaut : $BENCH_TOKEN)")
+    parser.add_argument("--spread", action="store_true", help="un seul worker par job au lieu d'un par site")
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args
+
+
+def encode(kind, **fields):
+    msg = {"v": rowstream.VERSION, "type": kind}
+    msg.update({k: v for k, v in fields.items() if v is not None})
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def decode(line):
+    try:
+        msg = json.loads(line)
+    except ValueError:
+        return None
+    return msg if isinstance(msg, dict) and "type" in msg else None
+
+
+class Peer:
+    # une connexion (côté coordinateur : un worker) ; écritures sérialisées
+    def __init__(self, sock, info=None):
+        self.sock = sock
+        self.info = info or {}
+        self.running = set()
+        self._lock = threading.Lock()
+
+    @property
+    def vantage(self):
+        return self.info.get("vantage") or self.info.get("host") or "?"
+
+    def free_slots(self):
+        return int(self.info.get("slots", 1)) - len(self.running)
+
+    def can_run(self, chain):
+        chains = self.info.get("chains")
+        return not chains or chain in chains
+
+    def send(self, kind, **fields):
+        data = encode(kind, **fields)
+        with self._lock:
+            self.sock.sendall(data)
+
+
+class PendingRun:
+    def __init__(self, run_id, chain, peer, on_message):
+        self.run_id = run_id
+        self.chain = chain
+        self.peer = peer
+        self.on_message = on_message
+        self.result = None
+        self.done = threading.Event()
+
+    def finish(self, status, returncode=None, usage=None):
+        if not self.done.is_set():
+            self.result = {"run_id": self.run_id, "chain": self.chain, "vantage": self.peer.vantage,
+                           "host": self.peer.info.get("host"), "status": status, "returncode": returncode,
+                           "usage": usage}
+            self.done.set()
+
+
+class Coordinator:
+    # file de jobs TCP côté orchestrateur ; store : ResultStore où démarrent les runs
+    def __init__(self, store, host="127.0.0.1", port=DEFAULT_PORT, spread=False, token=None):
+        if not token and host not in ("127.0.0.1", "localhost", "::1"):
+            raise SystemExit(f"Coordinateur sur {host} : secret partagé requis (--token ou BENCH_TOKEN)")
+        self.store = store
+        self.spread = spread
+        self.token = token
+        self.peers = []
+        self.runs = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator._serve_peer(self.request, self.rfile)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._ping_loop, daemon=True).start()
+        print(f"Coordinateur en écoute sur {self.address[0]}:{self.address[1]}")
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _ping_loop(self):
+        while True:
+            time.sleep(PING_S)
+            with self._lock:
+                peers = list(self.peers)
+            for peer in peers:
+                try:
+                    peer.send("ping")
+                except OSError:
+                    pass
+
+    def _serve_peer(self, sock, rfile):
+        peer = Peer(sock)
+        try:
+            for raw in rfile:
+                msg = decode(raw.decode("utf-8", errors="replace"))
+                if msg is None:
+                    continue
+                if msg["type"] == "hello":
+                    if not check_token(msg.pop("token", None), self.token):
+                        print(f"Worker refusé (jeton invalide) : {msg.get('vantage')} ({msg.get('host')})")
+                        return
+                    peer.info = msg
+                    with self._changed:
+                        self.peers.append(peer)
+                        self._changed.notify_all()
+                    print(f"Worker connecté : {peer.vantage} ({msg.get('host')}, {msg.get('slots', 1)} slots)")
+                elif peer.info:
+                    self._on_peer_message(peer, msg)
+        except OSError:
+            pass
+        finally:
+            with self._changed:
+                if peer in self.peers:
+                    self.peers.remove(peer)
+                lost = [self.runs[r] for r in peer.running if r in self.runs]
+                peer.running.clear()
+                self._changed.notify_all()
+            for pending in lost:
+                pending.finish(LOST)
+            if peer.info:
+                print(f"Worker déconnecté : {peer.vantage}" + (f", {len(lost)} runs perdus" if lost else ""))
+
+    def _on_peer_message(self, peer, msg):
+        pending = self.runs.get(msg.get("run_id"))
+        if pending is None or pending.peer is not peer:
+            # run inconnu ou confié à un autre worker
+            return
+        kind = msg["type"]
+        if kind == "started":
+            provenance = dict(msg.get("provenance") or {})
+            provenance.setdefault("host", peer.info.get("host"))
+            provenance["vantage"] = peer.vantage
+            provenance.setdefault("source", "worker")
+            self.store.start_run(pending.run_id, pending.chain, provenance=provenance)
+        elif kind == "done":
+            with self._changed:
+                peer.running.discard(pending.run_id)
+                self._changed.notify_all()
+            pending.finish(msg.get("status", "failed"), msg.get("returncode"), msg.get("usage"))
+        elif kind in ("row", "sample", "end", "meta"):
+            reply = lambda answer: self._reply(peer, pending.run_id, answer)
+            pending.on_message(pending.run_id, pending.chain, msg, reply)
+
+    def _reply(self, peer, run_id, answer):
+        try:
+            peer.send("reply", run_id=run_id, answer=answer)
+        except OSError:
+            pass
+
+    def _targets(self, chain):
+        # appel sous verrou : un worker libre par site (ou un seul au total avec spread)
+        by_vantage = {}
+        for peer in self.peers:
+            if peer.can_run(chain) and peer.free_slots() > 0:
+                best = by_vantage.get(peer.vantage)
+                if best is None or peer.free_slots() > best.free_slots():
+                    by_vantage[peer.vantage] = peer
+        targets = sorted(by_vantage.values(), key=lambda p: -p.free_slots())
+        return targets[:1] if self.spread else targets
+
+    def _ready(self, chain):
+        # appel sous verrou : chaque site capable a un worker libre (un seul suffit avec spread)
+        targets = self._targets(chain)
+        if self.spread:
+            return bool(targets)
+        vantages = {p.vantage for p in self.peers if p.can_run(chain)}
+        return bool(targets) and len(targets) == len(vantages)
+
+    def wait_free(self, chain):
+        # bloque tant que les workers capables de lancer chain sont occupés ; sans aucun
+        # worker capable, rend la main après WORKER_WAIT_S (run_job signalera l'échec)
+        deadline = time.monotonic() + WORKER_WAIT_S
+        with self._changed:
+            while not self._ready(chain):
+                capable = any(p.can_run(chain) for p in self.peers)
+                if not capable and time.monotonic() >= deadline:
+                    return False
+                self._changed.wait(PING_S if capable else deadline - time.monotonic())
+            return True
+
+    def run_job(self, chain, timeout, on_message, adaptive=True, on_assigned=None):
+        # -> liste de résultats {run_id, chain, vantage, host, status, returncode, usage}
+        # on_assigned() : appelé dès que les workers sont réservés (ou qu'il n'y en a pas)
+        deadline = time.monotonic() + WORKER_WAIT_S
+        with self._changed:
+            targets = self._targets(chain)
+            while not targets and time.monotonic() < deadline:
+                self._changed.wait(deadline - time.monotonic())
+                targets = self._targets(chain)
+            pendings = []
+            for peer in targets:
+                run_id = rowstream.new_run_id(chain)
+                pending = PendingRun(run_id, chain, peer, on_message)
+                self.runs[run_id] = pending
+                peer.running.add(run_id)
+                pendings.append(pending)
+        if on_assigned is not None:
+            on_assigned()
+        if not pendings:
+            print(f"[{chain}] aucun worker disponible après {WORKER_WAIT_S:.0f}s")
+            return []
+        for pending in pendings:
+            try:
+                pending.peer.send("job", token=self.token, run_id=pending.run_id, chain=chain, timeout=timeout,
+                                  adaptive=adaptive)
+                print(f"[{chain}] run {pending.run_id} -> {pending.peer.vantage}")
+            except OSError:
+                pending.finish(LOST)
+
+        end = time.monotonic() + timeout + DONE_GRACE_S
+        for pending in pendings:
+            if not pending.done.wait(max(0.0, end - time.monotonic())):
+                try:
+                    pending.peer.send("cancel", run_id=pending.run_id)
+                except OSError:
+                    pass
+                pending.finish("timeout")
+        with self._changed:
+            for pending in pendings:
+                self.runs.pop(pending.run_id, None)
+                pending.peer.running.discard(pending.run_id)
+            self._changed.notify_all()
+        return [p.result for p in pendings]
+
+
+def outcome(results):
+    # code de retour agrégé pour Supervisor.run : 0 si au moins un site a réussi,
+    # RunTimeout si tous ont expiré
+    if any(r["status"] == "ok" for r in results):
+        return 0
+    if results and all(r["status"] == "timeout" for r in results):
+        raise RunTimeout(f"timeout sur {len(results)} workers")
+    codes = [r["returncode"] for r in results if r["returncode"] not in (None, 0)]
+    return codes[0] if codes else 1
+
+
+class Worker:
+    # côté worker : reçoit les jobs, lance les runners, renvoie leurs messages
+    def __init__(self, address, vantage, base_dir=".", commands=None, slots=1, chains=None, token=None):
+        self.address = address
+        self.vantage = vantage
+        self.base_dir = base_dir
+        self.commands = commands or {}
+        self.slots = slots
+        # chaînes annoncées : celles qui ont une commande locale (filtrées par --chain)
+        self.chains = [c for c in (chains or sorted(self.commands)) if c in self.commands]
+        self.token = token
+        self.processes = {}
+        self.peer = None
+
+    def serve_forever(self):
+        attempt = 0
+        while True:
+            try:
+                with socket.create_connection(self.address) as sock:
+                    attempt = 0
+                    self._session(sock)
+            except OSError as e:
+                print(f"Connexion au coordinateur {self.address[0]}:{self.address[1]} : {e}")
+            for process in list(self.processes.values()):
+                kill_tree(process)
+            delay = backoff_delay(attempt, base=2.0, cap=60.0)
+            attempt += 1
+            print(f"Reconnexion dans {delay:.0f}s")
+            time.sleep(delay)
+
+    def _session(self, sock):
+        self.peer = Peer(sock)
+        self.peer.send("hello", token=self.token, vantage=self.vantage, host=socket.gethostname(),
+                       slots=self.slots, chains=self.chains)
+        print(f"Connecté à {self.address[0]}:{self.address[1]} (site {self.vantage})")
+        for raw in sock.makefile("rb"):
+            msg = decode(raw.decode("utf-8", errors="replace"))
+            if msg is None:
+                continue
+            if msg["type"] == "job":
+                if not check_token(msg.get("token"), self.token):
+                    print(f"Job refusé (jeton invalide) : {msg.get('chain')}")
+                    continue
+                threading.Thread(target=self._run_job, args=(self.peer, msg), daemon=True).start()
+            elif msg["type"] == "reply":
+                process = self.processes.get(msg.get("run_id"))
+                if process is not None:
+                    rowstream.reply(process.stdin, msg.get("answer", rowstream.REPLY_STOP))
+            elif msg["type"] == "cancel":
+                process = self.processes.get(msg.get("run_id"))
+                if process is not None:
+                    kill_tree(process)
+            elif msg["type"] == "ping":
+                self.peer.send("pong")
+
+    def _run_job(self, peer, job):
+        from ingest import provenance
+        from telemetry import ProcessTreeMonitor
+
+        run_id, chain = job["run_id"], job["chain"]
+        command = self.commands.get(chain)
+        send = lambda kind, **fields: peer.send(kind, run_id=run_id, **fields)
+        if command is None:
+            print(f"[{chain}] job refusé : aucune commande locale (--run {chain}=...)")
+            send("done", status="failed", returncode=None)
+            return
+        cwd = os.path.join(self.base_dir, chain)
+        runner = command if isinstance(command, str) else " ".join(command)
+        print(f"[{chain}] run {run_id} : {runner}")
+        try:
+            send("started", provenance=provenance(chain, runner, os.path.join(cwd, "build", "contract.wasm"),
+                                                  source="worker", vantage=self.vantage))
+            process = subprocess.Popen(
+                command, cwd=cwd if os.path.isdir(cwd) else None, shell=isinstance(command, str),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8", errors="replace",
+                bufsize=1, env=rowstream.stream_env(chain, run_id, adaptive=job.get("adaptive", True)),
+                **tree_popen_kwargs())
+        except OSError as e:
+            print(f"[{chain}] lancement impossible : {e}")
+            send("done", status="failed", returncode=None)
+            return
+        self.processes[run_id] = process
+        monitor = ProcessTreeMonitor(process.pid).start()
+
+        def forward(msg):
+            kind = msg.pop("type")
+            msg.pop("v", None)
+            send(kind, **msg)
+
+        reader = lambda stream: rowstream.consume(stream, forward)
+        status, returncode = "failed", None
+        try:
+            returncode = run_with_timeout(process, job.get("timeout"), reader)
+            status = "ok" if returncode == 0 else "failed"
+        except RunTimeout as e:
+            print(f"[{chain}] timeout : {e}")
+            status = "timeout"
+        finally:
+            usage = monitor.stop()
+            self.processes.pop(run_id, None)
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+        try:
+            send("done", status=status, returncode=returncode, usage=usage)
+        except OSError:
+            pass
+        print(f"[{chain}] run {run_id} terminé : {status} (code {returncode})")
+
+
+def parse_commands(items):
+    # ["BenchmarkNear=npm run bench1", ...] -> {chaîne: commande}
+    commands = {}
+    for item in items or ():
+        chain, _, command = item.partition("=")
+        commands[chain] = command
+    return commands
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker de benchmark distribué")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("worker", help="se connecte au coordinateur et exécute ses jobs")
+    p.add_argument("--connect", default=f"127.0.0.1:{DEFAULT_PORT}", help="hôte:port du coordinateur")
+    p.add_argument("--vantage", default=os.environ.get("BENCH_VANTAGE") or socket.gethostname(),
+                   help="identifiant du point de mesure (défaut : $BENCH_VANTAGE, sinon le nom d'hôte)")
+    p.add_argument("--base-dir", default=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+                   help="dossier contenant les projets de benchmark")
+    p.add_argument("--slots", type=int, default=1, help="runs simultanés")
+    p.add_argument("--chain", action="append", dest="chains", help="chaînes acceptées (toutes par défaut)")
+    p.add_argument("--run", action="append", metavar="CHAINE=COMMANDE", required=True,
+                   help="commande locale du runner ; seules ces chaînes sont acceptées")
+    p.add_argument("--token", default=os.environ.get("BENCH_TOKEN"),
+                   help="secret partagé avec le coordinateur (défaut : $BENCH_TOKEN)")
+    args = parser.parse_args(argv)
+    worker = Worker(parse_address(args.connect), args.vantage, args.base_dir, parse_commands(args.run),
+                    args.slots, args.chains, args.token)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
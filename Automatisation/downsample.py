@@ -0,0 +1,121 @@
+import argparse
+import sys
+
+import numpy as np
+
+# Réduction des séries temporelles avant tracé : un nombre de points fixé par la
+# largeur du graphe en pixels, quelle que soit la longueur de l'historique.
+#
+#   lttb    Largest-Triangle-Three-Buckets : dans chaque bucket, le point qui forme le
+#           plus grand triangle avec le point retenu précédent et la moyenne du bucket
+#           suivant ; garde la forme de la courbe et les pics isolés
+#   minmax  enveloppe : minimum et maximum de chaque bucket (aucun pic perdu)
+#   none    série complète
+#
+# Les fonctions renvoient des index (triés) dans la série d'origine.
+
+METHODS = ("lttb", "minmax", "none")
+# au-delà, les marqueurs ne font que noircir la courbe
+MARKER_MAX_POINTS = 200
+
+
+def method_from_argv(argv=None, default="lttb"):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--downsample", choices=METHODS, default=default)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.downsample
+
+
+def _as_float(x):
+    # dates (datetime64, Timestamp, date) -> ns en float ; NaT -> nan
+    x = np.asarray(x)
+    if x.dtype == object:
+        x = x.astype("datetime64[ns]")
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]")
+        out = x.astype(np.int64).astype(float)
+        out[np.isnat(x)] = np.nan
+        return out
+    return x.astype(float)
+
+
+def lttb(x, y, n_out):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # n_out - 2 buckets entre le premier et le dernier point, toujours conservés
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges[-1] = n - 1
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:nxt_hi].mean()
+        avg_y = y[hi:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax(x, y, n_out):
+    # n_out // 2 buckets de même largeur en x ; index du min et du max de chacun
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    n_buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    span = x[-1] - x[0]
+    if span > 0:
+        bucket = np.minimum(((x - x[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    else:
+        bucket = np.arange(n) * n_buckets // n
+    order = np.lexsort((y, bucket))
+    counts = np.bincount(bucket, minlength=n_buckets)
+    ends = np.cumsum(counts)
+    has = counts > 0
+    first = order[(ends - counts)[has]]
+    last = order[ends[has] - 1]
+    return np.unique(np.concatenate(([0, n - 1], first, last)))
+
+
+def indices(x, y, n_out, method="lttb"):
+    # x trié ; les points dont x ou y est manquant sont écartés
+    xf = _as_float(x)
+    yf = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(xf) & ~np.isnan(yf))
+    if method == "none":
+        return valid
+    if method == "lttb":
+        keep = lttb(xf[valid], yf[valid], n_out)
+    elif method == "minmax":
+        keep = minmax(xf[valid], yf[valid], n_out)
+    else:
+        raise ValueError(f"méthode de réduction inconnue : {method}")
+    return valid[keep]
+
+
+def points_for_axes(ax, per_pixel=1.0):
+    # un point par colonne de pixels de la zone de tracé
+    fig = ax.figure
+    width_px = ax.get_position().width * fig.get_figwidth() * fig.dpi
+    return max(3, int(width_px * per_pixel))
+
+
+def frame(df, xcol, ycol, n_out, method="lttb"):
+    # sous-ensemble de df (trié sur xcol) réduit à ~n_out points
+    df = df.sort_values(xcol)
+    return df.iloc[indices(df[xcol].to_numpy(), df[ycol].to_numpy(), n_out, method)]
+
+
+def plot(ax, df, xcol, ycol, method="lttb", marker=None, **kwargs):
+    # ax.plot de la série réduite ; marqueurs seulement si la série reste lisible
+    sub = frame(df, xcol, ycol, points_for_axes(ax), method)
+    if marker is not None and len(sub) <= MARKER_MAX_POINTS:
+        kwargs["marker"] = marker
+    return ax.plot(sub[xcol], sub[ycol], **kwargs)
@@ -1,57 +1,98 @@
 #!/usr/bin/env python3
 import os
-import glob
+import sys
 import re
 from datetime import datetime
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import archive
+import ingest
+import resultstore
+import downsample
+import profiling
+import robuststats
+
+prof = profiling.setup(__file__)
+# --stats mean|median|trimmed|winsorized|hampel selects the per-run estimator
+STATS = robuststats.method_from_argv()
+stats_label = '' if STATS == 'mean' else f' [{STATS}]'
+# --downsample lttb|minmax|none reduces each series to ~1 point per pixel column,
+# so rendering cost no longer grows with the length of the history
+DOWNSAMPLE = downsample.method_from_argv()
+
 # Comparative analysis: view TxLatency vs on-chain view gas over time for EVM networks
 # Networks: EthSepolia, AvaxFuji, Moonbeam
 
 # 1. Configuration
 results_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results'))
 ev_nets = ['EthSepolia', 'AvaxFuji', 'Moonbeam']
+# orchestrator chain name (automateV3.COMMANDS) -> network label
+store_chains = {'BenchmarkEthereum': 'EthSepolia', 'BenchmarkAvaxFuji': 'AvaxFuji', 'BenchmarkMoonBeam': 'Moonbeam'}
 evm_dir = os.path.join(results_root, 'EVMV')
 os.makedirs(evm_dir, exist_ok=True)
 
 # 2. CSV reader with timestamp extraction
 # Expects filenames like 'benchmark_onchain_2025-04-27T21-11-18.676Z.csv'
-def read_evm_csv(path, net):
+def read_evm_csv(path, net, f):
     # extract run timestamp from filename
     fname = os.path.basename(path)
     m = re.search(r'benchmark_onchain_(\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2})', fname)
     run_ts = datetime.strptime(m.group(1), '%Y-%m-%dT%H-%M-%S') if m else pd.NaT
     rows = []
-    with open(path, 'r', encoding='utf-8') as f:
-        next(f)
-        for line in f:
-            parts = line.rstrip('\n').split(',', 5)
-            if len(parts) < 6:
-                parts += [''] * (6 - len(parts))
-            test, gas, txlat, exect, result, extra = parts
-            rows.append({
-                'Network': net,
-                'RunTimestamp': run_ts,
-                'TestName': test,
-                'TxLatency': pd.to_numeric(txlat, errors='coerce'),
-                'ActualGasUsed': pd.to_numeric(gas, errors='coerce'),
-                'Result': result
-            })
+    next(f)
+    for line in f:
+        parts = line.rstrip('\r\n').split(',', 5)
+        if len(parts) < 6:
+            parts += [''] * (6 - len(parts))
+        test, gas, txlat, exect, result, extra = parts
+        rows.append({
+            'Network': net,
+            'RunTimestamp': run_ts,
+            'TestName': test,
+            'TxLatency': pd.to_numeric(txlat, errors='coerce'),
+            'ActualGasUsed': pd.to_numeric(gas, errors='coerce'),
+            'Result': result
+        })
     return pd.DataFrame(rows)
 
 # 3. Load data
+prof.stage('load')
+# Streamed runs come from the result store with their exact run timestamp;
+# legacy CSV files are still globbed for runs made before streaming, except the
+# ones already imported by ingest.py (counted once, from the store). Matching is on
+# the stable run_id, so a copy or an archived member of an imported file is skipped too.
+def read_store_rows():
+    df = resultstore.load_rows(list(store_chains))
+    if df.empty:
+        return df
+    return pd.DataFrame({
+        'Network': df['chain'].map(store_chains),
+        'RunTimestamp': df['run_started_at'].dt.tz_localize(None),
+        'TestName': df['test'],
+        'TxLatency': pd.to_numeric(df['latency_ms'], errors='coerce'),
+        'ActualGasUsed': pd.to_numeric(df['gas'], errors='coerce'),
+        'Result': df['result'],
+    })
+
+runs = resultstore.load_table('runs')
+ingested = set(runs['run_id']) if 'run_id' in runs else set()
 all_df = []
+store_df = read_store_rows()
+if not store_df.empty:
+    print(f"Loaded {len(store_df)} streamed records from {resultstore.DEFAULT_PATH}")
+    all_df.append(store_df)
 for net in ev_nets:
     folder = os.path.join(results_root, net)
     if not os.path.isdir(folder):
         print(f"⚠️ Folder not found: {folder}")
         continue
-    files = glob.glob(os.path.join(folder, 'benchmark_onchain_*.csv'))
-    for path in files:
+    # live CSVs, then archived bundles (archive.py) decompressed as a stream
+    files = archive.iter_csv(folder, 'benchmark_onchain_*.csv', skip=lambda p: ingest.run_id_of(p) in ingested)
+    for path, f in files:
         try:
-            df = read_evm_csv(path, net)
+            df = read_evm_csv(path, net, f)
         except Exception as e:
             print(f"❌ Error parsing {path}: {e}")
             continue
@@ -62,45 +103,70 @@ evdf = pd.concat(all_df, ignore_index=True)
 print(f"Loaded {len(evdf)} records for EVM")
 
 # 4. Filter view vs on-chain view
+prof.stage('aggregate')
 view_df = evdf[evdf['Result']=='callStatic'].dropna(subset=['TxLatency'])
 onchain_df = evdf[evdf['Result']=='onChainView'].dropna(subset=['ActualGasUsed'])
 
+# Change points flagged by the orchestrator's CUSUM detector (changepoint.py),
+# drawn as dotted lines in the colour of their network; distributed runs raise
+# alerts on "<chain>@<vantage>" series, matched on the base chain name
+alerts = resultstore.load_table('alerts')
+if not alerts.empty:
+    base = alerts['chain'].str.split('@').str[0]
+    alerts = alerts[base.isin(list(store_chains))].assign(Network=base.map(store_chains))
+    alerts['ts'] = pd.to_datetime(alerts['ts'], utc=True).dt.tz_localize(None)
+
+def mark_alerts(metric):
+    if alerts.empty:
+        return
+    colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    for net, color in zip(ev_nets, colors):
+        for ts in alerts[(alerts['Network']==net) & (alerts['metric']==metric)]['ts']:
+            plt.axvline(ts, color=color, linestyle=':', alpha=0.6)
+
 # 5. Time series: avg view latency per run
-ts_lat = (view_df
-    .groupby(['RunTimestamp','Network'], as_index=False)
-    .agg(avg_latency=('TxLatency','mean'))
+ts_lat = (robuststats.aggregate(view_df, ['RunTimestamp','Network'], 'TxLatency', STATS)['center']
+    .rename('avg_latency')
+    .reset_index()
 )
+prof.stage('render')
 plt.figure(figsize=(10,4), dpi=120)
+ax = plt.gca()
 for net in ev_nets:
-    sub = ts_lat[ts_lat['Network']==net].sort_values('RunTimestamp')
-    plt.plot(sub['RunTimestamp'], sub['avg_latency'], marker='o', label=net)
+    sub = ts_lat[ts_lat['Network']==net]
+    downsample.plot(ax, sub, 'RunTimestamp', 'avg_latency', DOWNSAMPLE, marker='o', label=net)
+mark_alerts('latency')
 plt.xlabel('Run Timestamp')
 plt.ylabel('Avg View Latency (ms)')
-plt.title('Time Series of View Latency by Network')
+plt.title('Time Series of View Latency by Network' + stats_label)
 plt.legend()
 plt.grid(True, linestyle='--', alpha=0.5)
 plt.tight_layout()
 fn1 = os.path.join(evm_dir, 'view_latency_timeseries.png')
-plt.savefig(fn1)
+prof.savefig(fn1)
 plt.close()
 print(f"Saved view latency timeseries: {fn1}")
 
 # 6. Time series: avg on-chain view gas per run
-ts_gas = (onchain_df
-    .groupby(['RunTimestamp','Network'], as_index=False)
-    .agg(avg_gas=('ActualGasUsed','mean'))
+prof.stage('aggregate')
+ts_gas = (robuststats.aggregate(onchain_df, ['RunTimestamp','Network'], 'ActualGasUsed', STATS)['center']
+    .rename('avg_gas')
+    .reset_index()
 )
+prof.stage('render')
 plt.figure(figsize=(10,4), dpi=120)
+ax = plt.gca()
 for net in ev_nets:
-    sub = ts_gas[ts_gas['Network']==net].sort_values('RunTimestamp')
-    plt.plot(sub['RunTimestamp'], sub['avg_gas'], marker='s', label=net)
+    sub = ts_gas[ts_gas['Network']==net]
+    downsample.plot(ax, sub, 'RunTimestamp', 'avg_gas', DOWNSAMPLE, marker='s', label=net)
+mark_alerts('gas')
 plt.xlabel('Run Timestamp')
 plt.ylabel('Avg On-Chain View Gas')
-plt.title('Time Series of On-Chain View Gas by Network')
+plt.title('Time Series of On-Chain View Gas by Network' + stats_label)
 plt.legend()
 plt.grid(True, linestyle='--', alpha=0.5)
 plt.tight_layout()
 fn2 = os.path.join(evm_dir, 'onchain_gas_timeseries.png')
-plt.savefig(fn2)
+prof.savefig(fn2)
 plt.close()
 print(f"Saved on-chain view gas timeseries: {fn2}")
@@ -1,12 +1,25 @@
 #!/usr/bin/env python3
 import os
-import glob
+import sys
 import re
 from datetime import datetime
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import archive
+import downsample
+import profiling
+import robuststats
+
+prof = profiling.setup(__file__)
+# --stats mean|median|trimmed|winsorized|hampel selects the per-date estimator
+STATS = robuststats.method_from_argv()
+stats_label = '' if STATS == 'mean' else f' [{STATS}]'
+# --downsample lttb|minmax|none reduces each series to ~1 point per pixel column,
+# so rendering cost no longer grows with the length of the history
+DOWNSAMPLE = downsample.method_from_argv()
+
 # Comparative analysis: view TxLatency vs on-chain view gas for EVM networks
 # Now using only date (YYYY-MM-DD) from filenames 'benchmark_onchain_YYYY-MM-DD_<i>.csv'
 
@@ -18,7 +31,7 @@ os.makedirs(evm_dir, exist_ok=True)
 
 # 2. CSV reader extracting date-only timestamp and ignoring sequence
 pattern = re.compile(r'benchmark_onchain_(\d{4}-\d{2}-\d{2})_\d+\.csv')
-def read_evm_csv(path, net):
+def read_evm_csv(path, net, f):
     # extract date from filename
     fname = os.path.basename(path)
     m = pattern.match(fname)
@@ -26,33 +39,34 @@ def read_evm_csv(path, net):
     if m:
         run_date = datetime.strptime(m.group(1), '%Y-%m-%d').date()
     rows = []
-    with open(path, 'r', encoding='utf-8') as f:
-        next(f)  # skip header
-        for line in f:
-            parts = line.rstrip('\n').split(',', 5)
-            if len(parts) < 6:
-                parts += ['']*(6 - len(parts))
-            test, gas, txlat, exect, result, extra = parts
-            rows.append({
-                'Network': net,
-                'RunDate': run_date,
-                'TestName': test,
-                'TxLatency': pd.to_numeric(txlat, errors='coerce'),
-                'ActualGasUsed': pd.to_numeric(gas, errors='coerce'),
-                'Result': result
-            })
+    next(f)  # skip header
+    for line in f:
+        parts = line.rstrip('\r\n').split(',', 5)
+        if len(parts) < 6:
+            parts += ['']*(6 - len(parts))
+        test, gas, txlat, exect, result, extra = parts
+        rows.append({
+            'Network': net,
+            'RunDate': run_date,
+            'TestName': test,
+            'TxLatency': pd.to_numeric(txlat, errors='coerce'),
+            'ActualGasUsed': pd.to_numeric(gas, errors='coerce'),
+            'Result': result
+        })
     return pd.DataFrame(rows)
 
 # 3. Load data
+prof.stage('load')
 all_df = []
 for net in ev_nets:
     folder = os.path.join(results_root, net)
     if not os.path.isdir(folder):
         print(f"⚠️ Folder not found: {folder}")
         continue
-    for path in glob.glob(os.path.join(folder, 'benchmark_onchain_*.csv')):
+    # live CSVs, then archived bundles (archive.py) decompressed as a stream
+    for path, f in archive.iter_csv(folder, 'benchmark_onchain_*.csv'):
         try:
-            df = read_evm_csv(path, net)
+            df = read_evm_csv(path, net, f)
         except Exception as e:
             print(f"❌ Failed to parse {path}: {e}")
             continue
@@ -63,47 +77,53 @@ evdf = pd.concat(all_df, ignore_index=True)
 print(f"Loaded {len(evdf)} rows for EVM analysis")
 
 # 4. Filter by result type
+prof.stage('aggregate')
 view_df = evdf[evdf['Result']=='callStatic'].dropna(subset=['TxLatency'])
 onchain_df = evdf[evdf['Result']=='onChainView'].dropna(subset=['ActualGasUsed'])
 
 # 5. Time series: average view latency per run. Time series: average view latency per date
 ts_lat = (
-    view_df
-    .groupby(['RunDate','Network'], as_index=False)
-    .agg(avg_latency=('TxLatency','mean'))
+    robuststats.aggregate(view_df, ['RunDate','Network'], 'TxLatency', STATS)['center']
+    .rename('avg_latency')
+    .reset_index()
 )
+prof.stage('render')
 plt.figure(figsize=(10,4), dpi=120)
+ax = plt.gca()
 for net in ev_nets:
-    sub = ts_lat[ts_lat['Network']==net].sort_values('RunDate')
-    plt.plot(sub['RunDate'], sub['avg_latency'], marker='o', label=net)
+    sub = ts_lat[ts_lat['Network']==net]
+    downsample.plot(ax, sub, 'RunDate', 'avg_latency', DOWNSAMPLE, marker='o', label=net)
 plt.xlabel('Date')
 plt.ylabel('Avg View Latency (ms)')
-plt.title('Daily Avg View Latency by Network')
+plt.title('Daily Avg View Latency by Network' + stats_label)
 plt.legend()
 plt.grid(True, linestyle='--', alpha=0.5)
 plt.tight_layout()
 fn1 = os.path.join(evm_dir, 'view_latency_daily_timeseries.png')
-plt.savefig(fn1)
+prof.savefig(fn1)
 plt.close()
 print(f"Saved daily view latency timeseries: {fn1}")
 
 # 6. Time series: average on-chain view gas per date
+prof.stage('aggregate')
 ts_gas = (
-    onchain_df
-    .groupby(['RunDate','Network'], as_index=False)
-    .agg(avg_gas=('ActualGasUsed','mean'))
+    robuststats.aggregate(onchain_df, ['RunDate','Network'], 'ActualGasUsed', STATS)['center']
+    .rename('avg_gas')
+    .reset_index()
 )
+prof.stage('render')
 plt.figure(figsize=(10,4), dpi=120)
+ax = plt.gca()
 for net in ev_nets:
-    sub = ts_gas[ts_gas['Network']==net].sort_values('RunDate')
-    plt.plot(sub['RunDate'], sub['avg_gas'], marker='s', label=net)
+    sub = ts_gas[ts_gas['Network']==net]
+    downsample.plot(ax, sub, 'RunDate', 'avg_gas', DOWNSAMPLE, marker='s', label=net)
 plt.xlabel('Date')
 plt.ylabel('Avg On-Chain View Gas')
-plt.title('Daily Avg On-Chain View Gas by Network')
+plt.title('Daily Avg On-Chain View Gas by Network' + stats_label)
 plt.legend()
 plt.grid(True, linestyle='--', alpha=0.5)
 plt.tight_layout()
 fn2 = os.path.join(evm_dir, 'onchain_gas_daily_timeseries.png')
-plt.savefig(fn2)
+prof.savefig(fn2)
 plt.close()
 print(f"Saved daily on-chain gas timeseries: {fn2}")
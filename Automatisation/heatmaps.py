@@ -0,0 +1,183 @@
+import argparse
+import html
+import os
+import re
+import sys
+
+import numpy as np
+
+# Heatmaps (tests x réseaux) lisibles quel que soit le nombre de tests :
+#   - ordre des lignes : classification hiérarchique (scipy, optionnel) ou
+#     fonction puis complexité, ex. fibonacciRecursive(5) < fibonacciRecursive(20)
+#   - au-delà de max_rows lignes, agrégation par fonction (moyenne des variantes)
+#   - au-delà de rows_per_page lignes : une vue d'ensemble sans étiquettes, des pages
+#     PNG étiquetées à échelle de couleur commune et un index HTML pour naviguer
+#
+#   heatmaps.render(mat, df["TestName"], names, OUT_DIR, "cost_heatmap", ...)
+#
+# Option des scripts : --order cluster|function|none
+
+ROWS_PER_PAGE = 60
+MAX_ROWS = 2000
+# la classification est en O(n²) mémoire : au-delà, ordre fonction/complexité
+CLUSTER_MAX_ROWS = 3000
+ORDERS = ("cluster", "function", "none")
+
+_CALL = re.compile(r"^\s*([^(]+?)\s*(?:\((.*)\))?\s*$")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def order_from_argv(argv=None, default="cluster"):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--order", choices=ORDERS, default=default)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.order
+
+
+def split_test_name(name):
+    # "loopSum(1000)" -> ("loopSum", 1000.0) ; "getValue_tx" -> ("getValue_tx", nan)
+    m = _CALL.match(str(name))
+    if not m:
+        return str(name), np.nan
+    number = _NUMBER.search(m.group(2) or "")
+    return m.group(1), float(number.group()) if number else np.nan
+
+
+def function_order(names):
+    parts = [split_test_name(n) for n in names]
+    functions = np.array([p[0] for p in parts], dtype=object)
+    complexity = np.array([p[1] for p in parts], dtype=float)
+    labels = np.array([str(n) for n in names], dtype=object)
+    # lexsort : dernière clé = clé principale ; complexité manquante en dernier
+    return np.lexsort((labels, np.nan_to_num(complexity, nan=np.inf), functions))
+
+
+def _features(mat, log):
+    x = np.array(mat, dtype=float)
+    if log:
+        x = np.log10(np.where(x > 0, x, np.nan))
+    med = np.nanmedian(x, axis=0)
+    x = np.where(np.isnan(x), np.nan_to_num(med)[None, :], x)
+    sd = x.std(axis=0)
+    return (x - x.mean(axis=0)) / np.where(sd > 0, sd, 1.0)
+
+
+def order_rows(mat, names, method="cluster", log=False):
+    n = len(names)
+    if method == "none" or n < 3:
+        return np.arange(n)
+    if method == "cluster":
+        if n > CLUSTER_MAX_ROWS:
+            print(f"ℹ️ {n} lignes : ordre fonction/complexité au lieu de la classification")
+        else:
+            try:
+                from scipy.cluster.hierarchy import leaves_list, linkage
+            except ImportError:
+                print("ℹ️ scipy absent : ordre fonction/complexité")
+            else:
+                return leaves_list(linkage(_features(mat, log), method="average"))
+    return function_order(names)
+
+
+def aggregate_by_function(mat, names):
+    # une ligne par fonction (moyenne des variantes), étiquette "fonction ×k"
+    functions = np.array([split_test_name(n)[0] for n in names], dtype=object)
+    uniq, codes = np.unique(functions, return_inverse=True)
+    mat = np.asarray(mat, dtype=float)
+    valid = ~np.isnan(mat)
+    sums = np.zeros((len(uniq), mat.shape[1]))
+    counts = np.zeros((len(uniq), mat.shape[1]))
+    np.add.at(sums, codes, np.where(valid, mat, 0.0))
+    np.add.at(counts, codes, valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        agg = sums / counts
+    sizes = np.bincount(codes, minlength=len(uniq))
+    return agg, [f"{f} ×{k}" if k > 1 else f for f, k in zip(uniq, sizes)]
+
+
+def _draw(mat, labels, columns, title, cbar_label, norm, cmap, path, savefig, show_labels=True):
+    import matplotlib.pyplot as plt
+
+    n = len(mat)
+    height = min(4 + 0.18 * n, 40) if show_labels else 8
+    fig, ax = plt.subplots(figsize=(6, height))
+    im = ax.imshow(mat, aspect="auto", norm=norm, cmap=cmap, interpolation="nearest")
+    if show_labels:
+        ax.set_yticks(np.arange(n))
+        ax.set_yticklabels(labels, fontsize=7)
+    else:
+        ax.set_yticks([])
+        ax.set_ylabel(f"{n} tests")
+    ax.set_xticks(np.arange(len(columns)))
+    ax.set_xticklabels(columns, rotation=45, fontsize=9)
+    ax.set_title(title)
+    cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+    cbar.set_label(cbar_label)
+    fig.tight_layout()
+    savefig(path, dpi=120)
+    plt.close(fig)
+    return path
+
+
+def _write_index(out_dir, stem, title, overview, pages):
+    items = "\n".join(
+        f'<section id="p{i}"><h2>Page {i} — lignes {lo}–{hi}</h2><img src="{html.escape(os.path.basename(p))}"></section>'
+        for i, (p, lo, hi) in enumerate(pages, 1))
+    links = " ".join(f'<a href="#p{i}">{i}</a>' for i in range(1, len(pages) + 1))
+    page = f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 1em; }}
+img {{ max-width: 100%; cursor: zoom-in; }}
+img.zoom {{ max-width: none; cursor: zoom-out; }}
+nav {{ position: sticky; top: 0; background: #fff; padding: .5em 0; }}
+</style></head><body>
+<h1>{html.escape(title)}</h1>
+<nav>Pages : {links}</nav>
+<img src="{html.escape(os.path.basename(overview))}">
+{items}
+<script>document.querySelectorAll('img').forEach(i => i.onclick = () => i.classList.toggle('zoom'));</script>
+</body></html>
+"""
+    path = os.path.join(out_dir, f"{stem}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+    return path
+
+
+def render(mat, names, columns, out_dir, stem, title, cbar_label, norm=None, cmap=None, order="cluster",
+           max_rows=MAX_ROWS, rows_per_page=ROWS_PER_PAGE, savefig=None):
+    # -> liste des fichiers écrits (PNG, et index HTML si la heatmap est paginée)
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm, Normalize
+
+    savefig = savefig or plt.savefig
+    mat = np.asarray(mat, dtype=float)
+    labels = [str(n) for n in names]
+    if len(labels) > max_rows:
+        mat, labels = aggregate_by_function(mat, labels)
+        title += " (par fonction)"
+    idx = order_rows(mat, labels, order, log=isinstance(norm, LogNorm))
+    mat = mat[idx]
+    labels = [labels[i] for i in idx]
+    if norm is None and np.isfinite(mat).any():
+        # échelle commune à la vue d'ensemble et à toutes les pages
+        norm = Normalize(vmin=np.nanmin(mat), vmax=np.nanmax(mat))
+
+    overview = os.path.join(out_dir, f"{stem}.png")
+    n = len(labels)
+    if n <= rows_per_page:
+        return [_draw(mat, labels, columns, title, cbar_label, norm, cmap, overview, savefig)]
+
+    written = [_draw(mat, labels, columns, f"{title} — vue d'ensemble", cbar_label, norm, cmap, overview,
+                     savefig, show_labels=False)]
+    pages = []
+    for i, lo in enumerate(range(0, n, rows_per_page), 1):
+        hi = min(lo + rows_per_page, n)
+        path = os.path.join(out_dir, f"{stem}_p{i:03d}.png")
+        _draw(mat[lo:hi], labels[lo:hi], columns, f"{title} — {lo + 1}–{hi}/{n}", cbar_label, norm, cmap,
+              path, savefig)
+        pages.append((path, lo + 1, hi))
+    written += [p for p, _, _ in pages]
+    written.append(_write_index(out_dir, stem, title, overview, pages))
+    return written
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+import csv
+import glob
+import hashlib
+import io
+import os
+import re
+import socket
+import sys
+from datetime import datetime, timezone
+
+import archive
+from phases import PHASE_COLUMNS
+from resultstore import ResultStore
+
+# Ingestion des CSV historiques dans le store, sans double comptage :
+#   - identifiant de run stable : <chaîne>-<horodatage du nom de fichier>, ou
+#     <chaîne>-[<jour>-]sha<hash du contenu> quand le nom ne porte pas d'heure ni de
+#     numéro de séquence ; une copie ou un re-téléchargement du même run retombe sur le
+#     même identifiant
+#   - CSV écrit en mode flux (near-benchmark_<ts>__<run_id>.csv) : run_id de
+#     l'orchestrateur ; si ce run a déjà été reçu en flux, ses lignes ne sont pas recopiées
+#   - hash par ligne (resultstore.row_hash) sous index UNIQUE : les lignes déjà
+#     présentes sont ignorées
+#   - provenance du run : chaîne, script du runner, sha256 du contrat wasm, machine,
+#     point de mesure (workers de distributed.py)
+#   - les CSV archivés (archive.py) sont lus en flux, sous leur chemin d'origine
+#
+#   python ingest.py ../Results [--chain BenchmarkNear] [--runner scripts/mesure.ts]
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+WASM_PATH = os.path.join(ROOT, "BenchmarkNear", "build", "contract.wasm")
+
+# dossier de résultats / réseau GasComparator -> nom de chaîne de l'orchestrateur (automateV3.COMMANDS)
+FOLDER_CHAINS = {
+    "ethsepolia": "BenchmarkEthereum", "avaxfuji": "BenchmarkAvaxFuji", "moonbeam": "BenchmarkMoonBeam",
+    "near": "BenchmarkNear", "solana": "benchmark-solana-v2",
+}
+NETWORK_CHAINS = {
+    "Ethereum": "BenchmarkEthereum", "Avalanche": "BenchmarkAvaxFuji", "Moonbeam": "BenchmarkMoonBeam",
+    "NEAR": "BenchmarkNear", "Solana": "benchmark-solana-v2",
+}
+# en-têtes rencontrés dans les CSV des runners -> champs rowstream
+HEADERS = {
+    "test": ("TestName",),
+    "gas": ("ActualGasUsed", "GasUsed", "CUUsed", "ComputeUnits", "CU", "Gas"),
+    "std_ms": ("StdMs", "StdLatencyMs", "StdMS"),
+    "ci95_ms": ("CI95ms", "CI95Ms", "Ci95Ms"),
+    "result": ("Result",),
+    "extra": ("Extra",),
+}
+
+_STREAM_RUN = re.compile(r"__(.+-\d{8}T\d{6}-[0-9a-f]{4})\.csv$")
+_TS = re.compile(r"(\d{4}-\d{2}-\d{2})(?:T(\d{2})-(\d{2})-(\d{2})(\.\d+)?Z?|_(\d+))?")
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def provenance(chain, runner=None, wasm_path=None, source=None, vantage=None):
+    # wasm : contrat NEAR compilé (les autres chaînes n'en ont pas)
+    if wasm_path is None and "near" in chain.lower():
+        wasm_path = WASM_PATH
+    return {
+        "runner": runner,
+        "contract_sha256": sha256_file(wasm_path) if wasm_path and os.path.isfile(wasm_path) else None,
+        "host": socket.gethostname(),
+        "source": source,
+        "vantage": vantage,
+    }
+
+
+def source_of(path):
+    # chemin relatif au dépôt, enregistré dans runs.source
+    return os.path.relpath(os.path.abspath(path), ROOT).replace(os.sep, "/")
+
+
+def chain_for(path):
+    import normalisation
+
+    parts = [p.lower() for p in os.path.normpath(os.path.abspath(path)).split(os.sep)]
+    for folder in reversed(parts[:-1]):
+        if folder in FOLDER_CHAINS:
+            return FOLDER_CHAINS[folder]
+    return NETWORK_CHAINS.get(normalisation.network_from_filename(path))
+
+
+def run_key(path):
+    # (clé stable, horodatage ISO ou None) tirés du nom de fichier ; clé None quand le nom
+    # ne suffit pas à distinguer deux runs (pas de date, ou date seule)
+    m = _TS.search(os.path.basename(path))
+    if not m:
+        return None, None
+    day, hh, mm, ss, frac, seq = m.groups()
+    if hh:
+        ts = f"{day}T{hh}:{mm}:{ss}{frac or ''}Z"
+        return ts, ts
+    if seq:
+        return f"{day}_{seq}", f"{day}T00:00:00Z"
+    return None, f"{day}T00:00:00Z"
+
+
+def content_sha(path, text=None):
+    # sha256 du contenu : texte déjà lu, fichier présent, ou index du bundle (membre archivé)
+    if text is not None:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    if os.path.isfile(path):
+        return sha256_file(path)
+    name = os.path.basename(path)
+    entry = archive.members(os.path.dirname(path), glob.escape(name)).get(name)
+    return entry[1].get("sha256") if entry else None
+
+
+def run_id_of(path, chain=None, text=None):
+    # identifiant de run stable du CSV (None si la chaîne ou le contenu sont inconnus)
+    m = _STREAM_RUN.search(os.path.basename(path))
+    if m:
+        return m.group(1)
+    chain = chain or chain_for(path)
+    key, ts = run_key(path)
+    if key is None:
+        sha = content_sha(path, text)
+        if chain is None or sha is None:
+            return None
+        key = (ts[:10] + "-" if ts else "") + "sha" + sha[:16]
+    return f"{chain}-{key}" if chain else None
+
+
+def read_rows(f, ts):
+    reader = csv.reader(f)
+    header = next(reader, [])
+    if header and header[0].startswith("__REFERENCE__"):
+        header = next(reader, [])
+    header = [h.strip() for h in header]
+    cols = {k: next((header.index(c) for c in names if c in header), None) for k, names in HEADERS.items()}
+    cols["latency_ms"] = next((i for i, h in enumerate(header) if "lat" in h.lower() and "std" not in h.lower()), None)
+    if cols["test"] is None:
+        return None
+    # horodatages des phases d'une transaction (mesure.ts : T_signed, T_submitted...)
+    phase_cols = {p: header.index(c) for p, c in PHASE_COLUMNS.items() if c in header}
+    width = len(header)
+    rows = []
+    for r in reader:
+        if not r or not r[cols["test"]].strip():
+            continue
+        if len(r) > width:
+            # Extra non échappé (CSV EVM) : le surplus revient à la dernière colonne
+            r = r[:width - 1] + [",".join(r[width - 1:])]
+        msg = {k: (r[i].strip() if i is not None and i < len(r) else None) for k, i in cols.items()}
+        msg["ts"] = ts
+        stamps = {p: float(r[i]) for p, i in phase_cols.items() if i < len(r) and r[i].strip()}
+        if stamps:
+            msg["phases_ms"] = stamps
+        rows.append(msg)
+    return rows
+
+
+def ingest_file(store, path, chain=None, runner=None, f=None):
+    # -> (run_id, lignes insérées, doublons) ; f : flux déjà ouvert (membre d'archive)
+    chain = chain or chain_for(path)
+    if chain is None:
+        raise ValueError(f"chaîne inconnue pour {path} (utiliser --chain)")
+    if f is None:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+    else:
+        text = f.read()
+    run_id = run_id_of(path, chain, text)
+    _, ts = run_key(path)
+    if ts is None:
+        # pas de date dans le nom : celle du premier import du même contenu, sinon le mtime.
+        # ts entre dans le hash des lignes : une copie ou un touch ne doit pas les réinsérer
+        known = store.query("SELECT started_at FROM runs WHERE run_id = ?", (run_id,))
+        ts = known[0][0] if known else datetime.fromtimestamp(
+            os.path.getmtime(path), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    rows = read_rows(io.StringIO(text, newline=""), ts)
+    if rows is None:
+        return run_id, 0, 0
+    known = store.query("SELECT status FROM runs WHERE run_id = ?", (run_id,))
+    if known and known[0][0] != "imported":
+        # run reçu en flux par l'orchestrateur : ses lignes sont déjà dans le store
+        return run_id, 0, len(rows)
+    store.start_run(run_id, chain, started_at=ts, status="imported",
+                    provenance=provenance(chain, runner, source=source_of(path)))
+    inserted, duplicates = store.append_rows(run_id, chain, rows, whole_run=True)
+    if inserted:
+        store.finish_run(run_id, "imported")
+    return run_id, inserted, duplicates
+
+
+def iter_csv(paths):
+    # (chemin, flux ouvert ou None) ; les dossiers incluent leurs CSV archivés
+    for path in paths:
+        if os.path.isfile(path):
+            yield path, None
+            continue
+        for folder, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(archive.SKIP_DIRS))
+            yield from archive.iter_csv(folder)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingestion des CSV de résultats dans le store")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--chain", help="chaîne de l'orchestrateur (déduite du dossier sinon)")
+    parser.add_argument("--runner", help="script du runner qui a produit les fichiers")
+    parser.add_argument("--store", default=None)
+    args = parser.parse_args(argv)
+    store = ResultStore(args.store) if args.store else ResultStore()
+    total = dup = 0
+    for path, f in iter_csv(args.paths):
+        try:
+            run_id, inserted, duplicates = ingest_file(store, path, args.chain, args.runner, f)
+        except (ValueError, OSError) as e:
+            print(f"⚠️ {path} : {e}")
+            continue
+        total += inserted
+        dup += duplicates
+        print(f"{run_id} : {inserted} lignes, {duplicates} doublons ignorés")
+    print(f"✅ {total} lignes ingérées, {dup} doublons ignorés")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Exposition Prometheus (format texte 0.0.4) des métriques du benchmark en direct,
+# alimentée par les lignes reçues en flux. Pas de dépendance à prometheus_client.
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self):
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, *labels, value):
+        self.values[labels] = float(value)
+
+    def render(self):
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in self.values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS_MS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, value):
+        state = self.values.get(labels)
+        if state is None:
+            # compteurs non cumulés par bucket (+Inf en dernier), somme, nombre
+            state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self):
+        lines = self.header()
+        for labels, (counts, total, n) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, {'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {n}")
+        return lines
+
+
+class BenchMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram("bench_latency_ms", "Latence mesuree par appel (ms)", ("chain", "test"))
+        self.gas = Gauge("bench_gas", "Dernier gas mesure", ("chain", "test"))
+        self.rows = Counter("bench_rows_total", "Lignes de resultats recues", ("chain",))
+        self.runs = Counter("bench_runs_total", "Runs termines par statut", ("chain", "status"))
+        self.failures = Counter("bench_failures_total", "Runs en echec ou en timeout", ("chain",))
+        self.duration = Gauge("bench_run_duration_seconds", "Duree du dernier essai de run", ("chain",))
+        self.last_success = Gauge("bench_last_success_timestamp_seconds", "Fin du dernier run reussi", ("chain",))
+        self.cycle = Gauge("bench_cycle_duration_seconds", "Duree du dernier passage complet (essais + backoff)", ("chain",))
+        self.all = [self.latency, self.gas, self.rows, self.runs, self.failures,
+                    self.duration, self.last_success, self.cycle]
+
+    def observe_row(self, chain, msg):
+        with self._lock:
+            self.rows.inc(chain)
+            test = msg.get("test", "")
+            latency = msg.get("latency_ms")
+            if isinstance(latency, (int, float)):
+                self.latency.observe(chain, test, value=latency)
+            try:
+                self.gas.set(chain, test, value=float(msg["gas"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    def observe_run(self, chain, status, duration_s, finished_at):
+        with self._lock:
+            self.runs.inc(chain, status)
+            self.duration.set(chain, value=duration_s)
+            if status == "ok":
+                self.last_success.set(chain, value=finished_at)
+            elif status in ("failed", "timeout"):
+                self.failures.inc(chain)
+
+    def observe_cycle(self, chain, duration_s):
+        with self._lock:
+            self.cycle.set(chain, value=duration_s)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in self.all:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def serve(metrics, host="127.0.0.1", port=9108):
+    # Serveur HTTP en thread démon : GET /metrics
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,216 @@
+import csv
+import glob
+import json
+import os
+import tempfile
+
+import archive
+
+# Normalisation des coûts par rapport à la mesure de référence de chaque run.
+#
+# Chaque CSV GasComparator est un run : la ligne préambule "__REFERENCE__,<gas>" et/ou
+# la ligne de test "reference" / "reference_tx" donnent le coût de la transaction de
+# référence du run. Pour toutes les chaînes, avec les mêmes définitions :
+#   NetGas       = max(Gas - RefGas, 0)
+#   GasRatio     = Gas / RefGas
+#   LatencyRatio = Latency / latence de la ligne de référence
+# Les runs sans référence gardent le net / ratio écrits par le runner (mêmes formules).
+#
+# load() normalise chaque fichier une seule fois : le tableau est mis en cache
+# (normalized.csv + manifeste mtime/taille) et seuls les fichiers nouveaux ou
+# modifiés sont relus. Les runs archivés (archive.py) sont relus en flux depuis leur
+# bundle, avec la même signature que le fichier d'origine (pas de relecture au
+# moment de l'archivage).
+
+NETWORKS = (("solana", "Solana"), ("eth", "Ethereum"), ("avax", "Avalanche"), ("moon", "Moonbeam"), ("near", "NEAR"))
+GAS_COLUMNS = ("ActualGasUsed", "GasUsed", "CUUsed", "ComputeUnits", "CU", "Gas")
+# "GasRatio(%)" n'est pas repris : son unité varie selon les runners (rapport ou pourcentage),
+# le ratio reste vide quand le run n'a pas de référence
+RATIO_COLUMNS = ("GasRatioToRef", "CUratioToRef", "GasRatio")
+NET_COLUMNS = ("GasNet", "NetGas")
+REFERENCE_NAMES = ("reference", "reference_tx")
+COLUMNS = ["SourceFile", "Network", "TestName", "Result", "Gas", "Latency",
+           "RefGas", "RefLatency", "NetGas", "GasRatio", "LatencyRatio"]
+CACHE_NAME = "normalized.csv"
+MANIFEST_NAME = "normalized.json"
+# à incrémenter quand la normalisation change : les caches d'un autre format sont reconstruits
+CACHE_FORMAT = 2
+
+
+def network_from_filename(path):
+    name = os.path.basename(path).lower()
+    for key, net in NETWORKS:
+        if key in name:
+            return net
+    return "Unknown"
+
+
+def _pick(header, candidates):
+    for c in candidates:
+        if c in header:
+            return header.index(c)
+    return None
+
+
+def read_raw(path, f=None):
+    # -> (DataFrame des lignes brutes, gas du préambule __REFERENCE__ ou None)
+    # f : flux texte déjà ouvert (membre d'archive), sinon le fichier path est ouvert
+    if f is None:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return read_raw(path, f)
+    import pandas as pd
+
+    reader = csv.reader(f)
+    header = next(reader, [])
+    preamble = None
+    if header and header[0].startswith("__REFERENCE__"):
+        preamble = header[1] if len(header) > 1 else None
+        header = next(reader, [])
+    header = [h.strip() for h in header]
+    if "TestName" not in header:
+        return None, None
+    cols = {
+        "TestName": header.index("TestName"),
+        "Gas": _pick(header, GAS_COLUMNS),
+        "Latency": next((i for i, h in enumerate(header) if "lat" in h.lower()), None),
+        "Result": _pick(header, ("Result",)),
+        "CsvRatio": _pick(header, RATIO_COLUMNS),
+        "CsvNet": _pick(header, NET_COLUMNS),
+    }
+    rows = [r for r in reader if r and not r[cols["TestName"]].startswith("__")]
+
+    width = len(header)
+    raw = pd.DataFrame([r[:width] + [""] * (width - len(r)) for r in rows], columns=range(width), dtype=object)
+    out = pd.DataFrame({"TestName": raw[cols["TestName"]].str.strip() if len(raw) else []})
+    for key in ("Gas", "Latency", "CsvRatio", "CsvNet"):
+        out[key] = pd.to_numeric(raw[cols[key]], errors="coerce") if cols[key] is not None else float("nan")
+    out["Result"] = raw[cols["Result"]] if cols["Result"] is not None else ""
+    out.insert(0, "Network", network_from_filename(path))
+    out.insert(0, "SourceFile", os.path.basename(path))
+    return out, pd.to_numeric(preamble, errors="coerce") if preamble is not None else None
+
+
+def normalise(raw, preambles=None):
+    # raw : lignes brutes d'un ou plusieurs runs (colonne SourceFile) ; tout est vectoriel
+    import pandas as pd
+
+    is_ref = raw["TestName"].str.lower().isin(REFERENCE_NAMES)
+    refs = raw[is_ref].groupby("SourceFile")[["Gas", "Latency"]].first()
+    ref_gas = refs["Gas"]
+    if preambles:
+        # le préambule prime sur la ligne reference
+        ref_gas = pd.Series(preambles, dtype=float).dropna().combine_first(ref_gas)
+    df = raw[~is_ref].copy()
+    df["RefGas"] = df["SourceFile"].map(ref_gas)
+    df["RefLatency"] = df["SourceFile"].map(refs["Latency"])
+    valid = df["RefGas"] > 0
+    df["NetGas"] = (df["Gas"] - df["RefGas"]).clip(lower=0).where(valid, df["CsvNet"])
+    df["GasRatio"] = (df["Gas"] / df["RefGas"]).where(valid, df["CsvRatio"])
+    df["LatencyRatio"] = (df["Latency"] / df["RefLatency"]).where(df["RefLatency"] > 0)
+    return df[COLUMNS].reset_index(drop=True)
+
+
+def read_run(path):
+    raw, preamble = read_raw(path)
+    if raw is None:
+        return None
+    return normalise(raw, {raw["SourceFile"].iat[0]: preamble} if preamble is not None and len(raw) else None)
+
+
+def versus_best(df, col, by="TestName"):
+    # col / meilleure valeur (minimum) du même test sur l'ensemble des réseaux
+    return df[col] / df.groupby(by)[col].transform("min")
+
+
+def compare(paths_by_net):
+    # {réseau: chemin CSV} -> une ligne par (TestName, Net) : Gas, NetGas, GasRatio, Latency, LatencyVsBest
+    import pandas as pd
+
+    runs = []
+    for net, path in paths_by_net.items():
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Fichier introuvable : {path}")
+        run = read_run(path)
+        if run is None:
+            raise ValueError(f"Structure invalide : {path}")
+        runs.append(run.assign(Net=net))
+    tidy = (pd.concat(runs, ignore_index=True)
+            .groupby(["TestName", "Net"], as_index=False)[["Gas", "NetGas", "GasRatio", "Latency"]].mean())
+    tidy["LatencyVsBest"] = versus_best(tidy, "Latency")
+    return tidy
+
+
+def wide(tidy, columns, nets):
+    # columns {colonne: suffixe} -> TestName + une colonne <réseau>_<suffixe> par réseau
+    import numpy as np
+    import pandas as pd
+
+    table = tidy.pivot_table(index="TestName", columns="Net", values=list(columns), dropna=False)
+    out = pd.DataFrame(index=table.index)
+    for col, suffix in columns.items():
+        for net in nets:
+            out[f"{net}_{suffix}"] = table[(col, net)] if (col, net) in table.columns else np.nan
+    return out.reset_index()
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_mtime, st.st_size]
+
+
+def _write_atomic(path, write):
+    # write(flux texte) dans un temporaire du même dossier, puis renommage sur path
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".normalized-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load(folder, pattern="benchmark_*.csv", cache=True):
+    # Tableau normalisé de tous les runs du dossier
+    import pandas as pd
+
+    paths = sorted(glob.glob(os.path.join(folder, pattern)))
+    current = {os.path.basename(p): _signature(p) for p in paths}
+    for name, (_, info) in archive.members(folder, pattern).items():
+        current.setdefault(name, [info["mtime"], info["size"]])
+    cache_path = os.path.join(folder, CACHE_NAME)
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    cached = pd.DataFrame(columns=COLUMNS)
+    manifest = {}
+    if cache and os.path.exists(cache_path) and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.pop("__format__", None) == CACHE_FORMAT:
+            cached = pd.read_csv(cache_path, dtype={"TestName": str, "Result": str, "SourceFile": str})
+        else:
+            manifest = {}
+
+    fresh = {name for name, sig in current.items() if manifest.get(name) != sig}
+    keep = set(current) - fresh
+    parts = [cached[cached["SourceFile"].isin(keep)]]
+    raws, preambles = [], {}
+    # fichiers présents, puis membres archivés décompressés en flux
+    for p, f in archive.iter_csv(folder, pattern, skip=lambda p: os.path.basename(p) not in fresh):
+        raw, preamble = read_raw(p, f)
+        if raw is None:
+            print(f"⚠️ Structure invalide : {os.path.basename(p)}")
+            continue
+        raws.append(raw)
+        if preamble is not None:
+            preambles[os.path.basename(p)] = preamble
+    if raws:
+        parts.append(normalise(pd.concat(raws, ignore_index=True), preambles))
+    parts = [p for p in parts if not p.empty]
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=COLUMNS)
+
+    if cache and (fresh or set(manifest) != set(current)):
+        # écriture atomique (watch et scripts d'analyse peuvent charger en même temps) ; le
+        # manifeste en dernier : il ne décrit jamais des fichiers absents du cache en place
+        _write_atomic(cache_path, lambda f: df.to_csv(f, index=False))
+        _write_atomic(manifest_path, lambda f: json.dump(dict(current, __format__=CACHE_FORMAT), f))
+    return df
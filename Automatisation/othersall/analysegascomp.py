@@ -1,67 +1,34 @@
 import os
-import pandas as pd
-import numpy as np
+import sys
 import matplotlib.pyplot as plt
-import glob
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import bootstrap
+import normalisation
+import profiling
+import robuststats
+
+prof = profiling.setup(__file__)
+# --stats mean|median|trimmed|winsorized|hampel selects the per-test estimator
+STATS = robuststats.method_from_argv()
+stats_label = '' if STATS == 'mean' else f' [{STATS}]'
+# --ci normal|t|percentile|bca (--n-boot, --seed) selects the CI95 method
+CI = bootstrap.options_from_argv(default_ci='normal')
+if CI.ci != 'normal':
+    stats_label += f' [CI {CI.ci}]'
 
 # 1. Load benchmark CSVs for gas
+prof.stage('load')
 csv_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results/GasComparator'))
-all_csvs = glob.glob(os.path.join(csv_folder, "benchmark_*.csv"))
-
-# 2. Parse gas data per network and test
-def parse_gas_csv(path):
-    filename = os.path.basename(path)
-    if "solana" in filename.lower():
-        net = "Solana"
-    elif "eth" in filename.lower():
-        net = "Ethereum"
-    elif "avax" in filename.lower():
-        net = "Avalanche"
-    elif "moon" in filename.lower():
-        net = "Moonbeam"
-    elif "near" in filename.lower():
-        net = "NEAR"
-    else:
-        net = "Unknown"
-
-    with open(path, "r", encoding="utf-8") as f:
-        first_line = f.readline().strip()
-        if first_line.startswith("__REFERENCE__"):
-            header = f.readline().strip().split(",")
-        else:
-            header = first_line.split(",")
-
-        try:
-            idx_name = header.index("TestName")
-            idx_gas = header.index("GasNet")
-        except ValueError:
-            return None
-
-        rows = []
-        for line in f:
-            parts = line.strip().split(",", len(header) - 1)
-            if len(parts) <= max(idx_name, idx_gas):
-                continue
-            name = parts[idx_name]
-            if name.lower() == "reference":
-                continue
-            try:
-                gas = int(parts[idx_gas])
-                rows.append((net, name, gas))
-            except ValueError:
-                continue
-
-    if not rows:
-        return None
-
-    return pd.DataFrame(rows, columns=["Network", "TestName", "GasNet"])
 
-# 3. Combine all gas data
-dfs = [parse_gas_csv(f) for f in all_csvs]
-dfs = [df for df in dfs if df is not None]
-gas_df = pd.concat(dfs, ignore_index=True)
+# 2. Net gas per network and test, against the reference measurement of each run
+#    (normalisation.py: same definition for every chain, cached per CSV)
+prof.stage('parse')
+gas_df = normalisation.load(csv_folder)
+gas_df = gas_df.dropna(subset=["NetGas"]).rename(columns={"NetGas": "GasNet"})
 
-# 4. Generate bar charts per network for GasNet
+# 3. Generate bar charts per network for GasNet
+prof.stage('render')
 output_dir = os.path.join(csv_folder, "Graphes")
 os.makedirs(output_dir, exist_ok=True)
 
@@ -72,29 +39,30 @@ for net in sorted(gas_df["Network"].unique()):
     if sub_df.empty:
         continue
 
-    agg = sub_df.groupby("TestName")["GasNet"].agg(["mean", "std", "count"])
+    agg = robuststats.aggregate(sub_df, "TestName", "GasNet", STATS)
     if agg.empty:
         continue
-    agg["sem"] = agg["std"] / np.sqrt(agg["count"])
-    agg["ci95"] = agg["sem"] * 1.96  # approx 95% CI for normal dist
-    agg = agg.sort_values("mean")
+    # normal: 1.96 x se (approx 95% CI), percentile / bca: bootstrap over all tests at once
+    with prof.span('ci'):
+        agg = bootstrap.add_interval(agg, sub_df, "TestName", "GasNet", STATS, CI)
+    agg = agg.sort_values("center")
 
     plt.figure(figsize=(16, 6), dpi=120)
     if (agg["count"] > 1).any():
-        plt.bar(agg.index, agg["mean"], yerr=agg["ci95"], capsize=4)
+        plt.bar(agg.index, agg["center"], yerr=bootstrap.error_bars(agg["center"], agg["lo"], agg["hi"]), capsize=4)
     else:
-        plt.bar(agg.index, agg["mean"])
+        plt.bar(agg.index, agg["center"])
 
-    plt.ylim(0, (agg["mean"] + agg["ci95"]).max() * 1.2)
+    plt.ylim(0, agg[["center", "hi"]].max().max() * 1.2)
 
     plt.xticks(rotation=90)
     plt.ylabel("Average Gas Used (Net)")
-    plt.title(f"Average Gas ± CI95% by Function – {net}")
+    plt.title(f"Average Gas ± CI95% by Function – {net}" + stats_label)
     plt.grid(True, linestyle="--", alpha=0.5)
     plt.tight_layout()
 
     path = os.path.join(output_dir, f"{net.lower()}_gasnet_avg_ic95_bar.png")
-    plt.savefig(path)
+    prof.savefig(path)
     plt.close()
     saved_paths.append(path)
 
@@ -1,60 +1,24 @@
 import os
+import sys
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import re
-import glob
 
-# 1. Charger les fichiers benchmark
-csv_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results/GasComparator'))
-all_csvs = glob.glob(os.path.join(csv_folder, "benchmark_*.csv"))
-
-# 2. Détection de réseau + parsing latence
-def parse_latency_csv(path):
-    filename = os.path.basename(path)
-    if "solana" in filename.lower():
-        net = "Solana"
-    elif "eth" in filename.lower():
-        net = "Ethereum"
-    elif "avax" in filename.lower():
-        net = "Avalanche"
-    elif "moon" in filename.lower():
-        net = "Moonbeam"
-    elif "near" in filename.lower():
-        net = "NEAR"
-    else:
-        net = "Unknown"
-
-    with open(path, "r", encoding="utf-8") as f:
-        first = f.readline().strip()
-        if first.startswith("__REFERENCE__"):
-            header = f.readline().strip().split(",")
-        else:
-            header = first.split(",")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import normalisation
+import profiling
+import robuststats
 
-        try:
-            idx_name = header.index("TestName")
-            idx_lat = next(i for i, h in enumerate(header) if "lat" in h.lower())
-        except (ValueError, StopIteration):
-            return None
+prof = profiling.setup(__file__)
+# --stats mean|median|trimmed|winsorized|hampel selects the per-point estimator
+STATS = robuststats.method_from_argv()
+stats_label = '' if STATS == 'mean' else f' [{STATS}]'
 
-        rows = []
-        for line in f:
-            parts = line.strip().split(",", len(header) - 1)
-            if len(parts) <= max(idx_name, idx_lat):
-                continue
-            name = parts[idx_name]
-            if name.lower() == "reference" or name.startswith("__"):
-                continue
-            try:
-                val = float(parts[idx_lat])
-                rows.append((net, name, val))
-            except:
-                continue
-
-    return pd.DataFrame(rows, columns=["Network", "TestName", "Latency"])
+# 1. Charger les fichiers benchmark
+prof.stage('load')
+csv_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results/GasComparator'))
 
-# 3. Extraire fonction + complexité
+# 2. Extraire fonction + complexité
 def extract_fn_complexity(name):
     match = re.match(r"(\w+)\(([^)]*)\)", name)
     if not match:
@@ -66,13 +30,14 @@ def extract_fn_complexity(name):
     except:
         return fn, None
 
-# 4. Charger tous les fichiers
-dfs = [parse_latency_csv(f) for f in all_csvs]
-lat_df = pd.concat([df for df in dfs if df is not None], ignore_index=True)
-lat_df[["Function", "Complexity"]] = lat_df["TestName"].apply(lambda x: pd.Series(extract_fn_complexity(x)))
+# 3. Charger tous les runs normalisés (normalisation.py), lignes de référence écartées
+prof.stage('parse')
+lat_df = normalisation.load(csv_folder).dropna(subset=["Latency"])[["Network", "TestName", "Latency"]]
+with prof.span('apply'):
+    lat_df[["Function", "Complexity"]] = lat_df["TestName"].apply(lambda x: pd.Series(extract_fn_complexity(x)))
 lat_df = lat_df.dropna(subset=["Complexity"])
 
-# 5. Complexités Big-O connues
+# 4. Complexités Big-O connues
 complexities = {
     "fibonacciRecursive": "O(2^n)",
     "fibonacciIterative": "O(n)",
@@ -85,10 +50,13 @@ complexities = {
     "setValue": "O(1)"
 }
 
-# 6. Agrégation moyenne
-lat_agg = lat_df.groupby(["Function", "Complexity", "Network"])["Latency"].mean().reset_index()
+# 5. Agrégation moyenne
+prof.stage('aggregate')
+lat_agg = (robuststats.aggregate(lat_df, ["Function", "Complexity", "Network"], "Latency", STATS)["center"]
+           .rename("Latency").reset_index())
 
-# 7. Génération des courbes par fonction
+# 6. Génération des courbes par fonction
+prof.stage('render')
 out_dir = os.path.join(csv_folder, "Graphes", "ComparaisonLatencyComplexity")
 os.makedirs(out_dir, exist_ok=True)
 
@@ -104,7 +72,7 @@ for fn in lat_agg["Function"].unique():
         plt.plot(pivot.index, pivot[net], marker='o', label=net)
 
     complexity_str = complexities.get(fn, "")
-    full_title = f"{fn} – Latency vs Complexity" + (f" ({complexity_str})" if complexity_str else "")
+    full_title = f"{fn} – Latency vs Complexity" + (f" ({complexity_str})" if complexity_str else "") + stats_label
     plt.suptitle(full_title, fontsize=14, fontweight='bold')
     plt.xlabel("Complexity")
     plt.ylabel("Average Latency (ms)")
@@ -113,7 +81,7 @@ for fn in lat_agg["Function"].unique():
     plt.tight_layout(rect=[0, 0, 1, 0.93])
 
     filename = f"{fn}_latency_vs_complexity.png"
-    plt.savefig(os.path.join(out_dir, filename))
+    prof.savefig(os.path.join(out_dir, filename))
     plt.close()
 
 print(f"✅ Graphiques enregistrés dans : {out_dir}")
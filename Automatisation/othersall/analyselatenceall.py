@@ -1,81 +1,37 @@
 import os
-import pandas as pd
-import numpy as np
+import sys
 import matplotlib.pyplot as plt
-import scipy.stats as st
-import glob
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import bootstrap
+import normalisation
+import profiling
+import robuststats
+
+prof = profiling.setup(__file__)
+# --stats mean|median|trimmed|winsorized|hampel selects the per-test estimator
+STATS = robuststats.method_from_argv()
+stats_label = '' if STATS == 'mean' else f' [{STATS}]'
+# --ci t|normal|percentile|bca (--n-boot, --seed) selects the CI95 method;
+# latency is right-skewed and many tests have few samples, so bca is the safer choice
+CI = bootstrap.options_from_argv(default_ci='t')
+if CI.ci != 't':
+    stats_label += f' [CI {CI.ci}]'
 
 # 1. Load benchmark CSVs
+prof.stage('load')
 csv_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results/GasComparator'))
-all_csvs = glob.glob(os.path.join(csv_folder, "benchmark_*.csv"))
-print("📂 Fichiers détectés :", [os.path.basename(f) for f in all_csvs])
-
-# 2. Parse CSV with support for __REFERENCE__ line
-def parse_latency_csv(path):
-    filename = os.path.basename(path)
-
-    if "solana" in filename.lower():
-        net = "Solana"
-    elif "eth" in filename.lower():
-        net = "Ethereum"
-    elif "avax" in filename.lower():
-        net = "Avalanche"
-    elif "moon" in filename.lower():
-        net = "Moonbeam"
-    elif "near" in filename.lower():
-        net = "NEAR"
-    else:
-        net = "Unknown"
-
-    with open(path, "r", encoding="utf-8") as f:
-        # Skip __REFERENCE__ line if present
-        first_line = f.readline().strip()
-        if first_line.startswith("__REFERENCE__"):
-            header = f.readline().strip().split(",")
-        else:
-            header = first_line.split(",")
 
-        try:
-            idx_name = header.index("TestName")
-            idx_lat = next((i for i, h in enumerate(header) if "lat" in h.lower()), None)
-            if idx_lat is None:
-                print(f"⚠️ Pas de colonne latence : {filename}")
-                return None
-        except ValueError:
-            print(f"⚠️ Structure invalide : {filename}")
-            return None
-
-        rows = []
-        for line in f:
-            parts = line.strip().split(",", len(header) - 1)
-            if len(parts) <= max(idx_name, idx_lat):
-                continue
-            name = parts[idx_name]
-            if name.lower() == "reference":
-                continue
-            try:
-                lat = float(parts[idx_lat])
-                rows.append((net, name, lat))
-            except ValueError:
-                continue
-
-    if not rows:
-        print(f"⚠️ Ignoré (aucune donnée) : {filename}")
-        return None
-
-    print(f"✅ Chargé : {filename} ({len(rows)} lignes)")
-    return pd.DataFrame(rows, columns=["Network", "TestName", "Latency"])
-
-# 3. Chargement global
-dfs = [parse_latency_csv(f) for f in all_csvs]
-dfs = [df for df in dfs if df is not None]
-if not dfs:
+# 2. Chargement global : runs normalisés (normalisation.py), lignes de référence écartées
+prof.stage('parse')
+lat_df = normalisation.load(csv_folder).dropna(subset=["Latency"])
+if lat_df.empty:
     raise SystemExit("❌ Aucun fichier CSV valide trouvé.")
-
-lat_df = pd.concat(dfs, ignore_index=True)
+print("📂 Fichiers chargés :", sorted(lat_df["SourceFile"].unique()))
 print("🧪 Réseaux chargés :", lat_df["Network"].unique())
 
-# 4. Génération des graphes
+# 3. Génération des graphes
+prof.stage('render')
 output_dir = os.path.join(csv_folder, "Graphes")
 os.makedirs(output_dir, exist_ok=True)
 saved_paths = []
@@ -85,31 +41,31 @@ for net in sorted(lat_df["Network"].unique()):
     if sub_df.empty:
         continue
 
-    agg = sub_df.groupby("TestName")["Latency"].agg(["mean", "std", "count"]).copy()
+    agg = robuststats.aggregate(sub_df, "TestName", "Latency", STATS)
     if agg.empty:
         continue
-    agg["sem"] = agg["std"] / np.sqrt(agg["count"])
-    agg["ci95"] = agg["sem"] * st.t.ppf(0.975, agg["count"] - 1)
-    agg = agg.sort_values("mean")
+    with prof.span('ci'):
+        agg = bootstrap.add_interval(agg, sub_df, "TestName", "Latency", STATS, CI)
+    agg = agg.sort_values("center")
 
     plt.figure(figsize=(16, 6), dpi=120)
     if (agg["count"] > 1).any():
-        plt.bar(agg.index, agg["mean"], yerr=agg["ci95"], capsize=4)
+        plt.bar(agg.index, agg["center"], yerr=bootstrap.error_bars(agg["center"], agg["lo"], agg["hi"]), capsize=4)
     else:
-        plt.bar(agg.index, agg["mean"])
+        plt.bar(agg.index, agg["center"])
 
     # ✅ Ajout d'une échelle dynamique locale
-    ymax = (agg["mean"] + agg["ci95"]).max()
+    ymax = agg[["center", "hi"]].max().max()
     plt.ylim(0, ymax * 1.2)
 
     plt.xticks(rotation=90)
     plt.ylabel("Average Tx Latency (ms)")
-    plt.title(f"Average Latency ± IC95% by Function – {net}")
+    plt.title(f"Average Latency ± IC95% by Function – {net}" + stats_label)
     plt.grid(True, linestyle="--", alpha=0.5)
     plt.tight_layout()
 
     path = os.path.join(output_dir, f"{net.lower()}_latency_avg_ic95_bar.png")
-    plt.savefig(path)
+    prof.savefig(path)
     plt.close()
     saved_paths.append(path)
 
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+
+# Décomposition de la latence des transactions : les runners horodatent chaque phase
+# (horloge monotone, ms depuis le début de la mesure) et les envoient dans la ligne
+# rowstream (champ phases_ms, conservé dans extra_json) ou dans les colonnes T_<phase>
+# de leur CSV (lues par ingest.py).
+#
+#   signed -> submitted -> acknowledged -> included -> executed -> final
+#
+# La durée d'une phase est l'écart avec la phase précédente présente (0 pour la
+# première) : sign = coût de signature (nonce, hash de bloc), ack = aller-retour RPC,
+# included = attente d'inclusion, final = délai de finalité.
+#
+#   python phases.py [dossier] [--chain BenchmarkNear] [--hours 168]
+
+PHASES = ("signed", "submitted", "acknowledged", "included", "executed", "final")
+PHASE_COLUMNS = {p: f"T_{p}" for p in PHASES}
+RESULTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results'))
+OUT_DIR = os.path.join(RESULTS_ROOT, "Graph", "Phases")
+
+
+def durations(stamps):
+    # {phase: horodatage} -> {phase: durée depuis la phase précédente}, dans l'ordre PHASES
+    out = {}
+    previous = 0.0
+    for p in PHASES:
+        t = stamps.get(p)
+        if t is None:
+            continue
+        out[p] = max(0.0, float(t) - previous)
+        previous = float(t)
+    return out
+
+
+def load_phases(path=None, chains=None, hours=None):
+    # DataFrame long (run_id, chain, test, ts, phase, ms) des lignes qui portent des phases
+    import pandas as pd
+    import resultstore
+
+    rows = resultstore.load_rows(chains, path or resultstore.DEFAULT_PATH)
+    if rows.empty:
+        return pd.DataFrame(columns=["run_id", "chain", "test", "ts", "phase", "ms"])
+    rows = rows[rows["extra_json"].fillna("").str.contains('"phases_ms"', regex=False)]
+    if hours is not None and not rows.empty:
+        rows = rows[rows["ts"] >= pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=hours)]
+    records = []
+    for run_id, chain, test, ts, extra in rows[["run_id", "chain", "test", "ts", "extra_json"]].itertuples(index=False):
+        for phase, ms in durations(json.loads(extra).get("phases_ms") or {}).items():
+            records.append((run_id, chain, test, ts, phase, ms))
+    return pd.DataFrame(records, columns=["run_id", "chain", "test", "ts", "phase", "ms"])
+
+
+def summary(df):
+    # médiane et p90 de chaque phase par réseau -> DataFrame (chain, phase, n, p50, p90)
+    g = df.groupby(["chain", "phase"])["ms"]
+    out = g.agg(n="count", p50="median", p90=lambda s: s.quantile(0.9)).reset_index()
+    out["phase"] = out["phase"].astype("category").cat.set_categories(PHASES)
+    return out.sort_values(["chain", "phase"]).reset_index(drop=True)
+
+
+def plot_phases(df, out_dir=OUT_DIR):
+    # 1. barres empilées des médianes par phase, une barre par réseau
+    # 2. distribution de chaque phase par réseau (boîtes, échelle log)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    chains = sorted(df["chain"].unique())
+    phases = [p for p in PHASES if (df["phase"] == p).any()]
+    colors = dict(zip(PHASES, plt.cm.tab10.colors))
+    med = df.groupby(["chain", "phase"])["ms"].median()
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 0.6 * len(chains) + 4), dpi=120,
+                                   gridspec_kw={"width_ratios": [1, 1.4]})
+    left = [0.0] * len(chains)
+    for p in phases:
+        widths = [med.get((c, p), 0.0) for c in chains]
+        ax1.barh(chains, widths, left=left, color=colors[p], label=p)
+        left = [l + w for l, w in zip(left, widths)]
+    for i, total in enumerate(left):
+        ax1.annotate(f"{total:.0f} ms", (total, i), xytext=(3, 0), textcoords="offset points", va="center", fontsize=8)
+    ax1.set_xlabel("médiane par phase (ms)")
+    ax1.set_title("Latence décomposée (médianes empilées)")
+    ax1.set_xlim(0, max(left) * 1.15 or 1)
+    ax1.legend(fontsize=8, ncol=3, loc="upper center", bbox_to_anchor=(0.5, -0.12))
+    ax1.grid(True, axis="x", linestyle="--", alpha=0.5)
+
+    width = 0.8 / len(chains)
+    for j, c in enumerate(chains):
+        data = [df.loc[(df["chain"] == c) & (df["phase"] == p), "ms"].clip(lower=0.01).values for p in phases]
+        pos = [i + (j - (len(chains) - 1) / 2) * width for i in range(len(phases))]
+        keep = [k for k, d in enumerate(data) if len(d)]
+        bp = ax2.boxplot([data[k] for k in keep], positions=[pos[k] for k in keep], widths=width * 0.9,
+                         patch_artist=True, showfliers=False, manage_ticks=False)
+        for box in bp["boxes"]:
+            box.set_facecolor(plt.cm.Set2(j % 8))
+        ax2.plot([], [], color=plt.cm.Set2(j % 8), linewidth=6, label=c)
+    ax2.set_xticks(range(len(phases)))
+    ax2.set_xticklabels(phases)
+    ax2.set_yscale("log")
+    ax2.set_ylabel("durée de la phase (ms)")
+    ax2.set_title("Distribution par phase et par réseau")
+    ax2.legend(fontsize=8)
+    ax2.grid(True, axis="y", linestyle="--", alpha=0.5)
+    fig.tight_layout()
+    os.makedirs(out_dir, exist_ok=True)
+    out = os.path.join(out_dir, "tx_phases.png")
+    fig.savefig(out)
+    plt.close(fig)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latence des transactions décomposée par phase")
+    parser.add_argument("out_dir", nargs="?", default=OUT_DIR)
+    parser.add_argument("--store", default=None)
+    parser.add_argument("--chain", action="append", help="réseau (répétable)")
+    parser.add_argument("--hours", type=float, default=None, help="fenêtre (heures)")
+    args = parser.parse_args(argv)
+
+    df = load_phases(args.store, args.chain, args.hours)
+    if df.empty:
+        print("Aucune mesure avec phases dans le store (mesure.ts avec NEAR_TX_PHASES=1).")
+        return 0
+    table = summary(df)
+    print(f"{'chain':<26}{'phase':<14}{'n':>6}{'p50_ms':>11}{'p90_ms':>11}")
+    for r in table.itertuples(index=False):
+        print(f"{r.chain:<26}{r.phase:<14}{r.n:>6}{r.p50:>11.1f}{r.p90:>11.1f}")
+    print(f"Saved phase plot: {plot_phases(df, args.out_dir)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
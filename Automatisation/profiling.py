@@ -0,0 +1,173 @@
+import argparse
+import atexit
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Instrumentation des scripts d'analyse : spans de temps/mémoire par étape du pipeline
+# (load, parse, aggregate, render, save) émis en logs JSON sur stderr.
+# Avec --profile : tracemalloc par étape, cProfile (.pstats) et piles repliées
+# (.collapsed, compatibles flamegraph.pl / speedscope) dans Results/Profiles.
+#
+#   prof = profiling.setup(__file__)
+#   prof.stage('load')        # termine l'étape précédente et ouvre la suivante
+#   prof.savefig(path)        # plt.savefig compté dans l'étape 'save'
+
+RESULTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results'))
+PROFILE_DIR = os.path.join(RESULTS_ROOT, 'Profiles')
+
+log = logging.getLogger("bench.profile")
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ko sous Linux, octets sous macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+class StackSampler:
+    # Échantillonne la pile du thread principal à intervalle fixe -> format "a;b;c N"
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = Counter()
+        self._target = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.counts.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+class Profiler:
+    def __init__(self, script, profile=False, out_dir=PROFILE_DIR):
+        self.script = os.path.basename(script)
+        self.profile = profile
+        self.out_dir = out_dir
+        self.totals = {}
+        self._stack = []
+        self._current = None
+        self._t0 = time.perf_counter()
+        self._cprofile = None
+        self._sampler = None
+        self._tracemalloc = None
+        if profile:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            tracemalloc.start()
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+            self._sampler = StackSampler()
+            self._sampler.start()
+
+    def _open(self, name):
+        span = {"name": name, "wall": time.perf_counter(), "cpu": time.process_time(), "child": 0.0}
+        if self._tracemalloc is not None:
+            self._tracemalloc.reset_peak()
+        self._stack.append(span)
+        return span
+
+    def _close(self, span):
+        self._stack = [s for s in self._stack if s is not span]
+        wall = time.perf_counter() - span["wall"]
+        own = wall - span["child"]
+        if self._stack:
+            self._stack[-1]["child"] += wall
+        record = {
+            "event": "span", "script": self.script, "stage": span["name"],
+            "wall_ms": round(own * 1000, 2), "cpu_ms": round((time.process_time() - span["cpu"]) * 1000, 2),
+            "rss_peak_mb": _peak_rss_mb(),
+        }
+        if self._tracemalloc is not None:
+            record["py_peak_mb"] = round(self._tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        log.info(json.dumps(record))
+        self.totals[span["name"]] = self.totals.get(span["name"], 0.0) + own
+
+    def stage(self, name):
+        if self._current is not None:
+            self._close(self._current)
+        self._current = self._open(name)
+
+    @contextmanager
+    def span(self, name):
+        span = self._open(name)
+        try:
+            yield
+        finally:
+            self._close(span)
+
+    def savefig(self, path, **kwargs):
+        import matplotlib.pyplot as plt
+        with self.span("save"):
+            plt.savefig(path, **kwargs)
+
+    def finish(self):
+        if self._current is not None:
+            self._close(self._current)
+            self._current = None
+        total = time.perf_counter() - self._t0
+        log.info(json.dumps({
+            "event": "summary", "script": self.script, "total_ms": round(total * 1000, 2),
+            "stages_ms": {k: round(v * 1000, 2) for k, v in self.totals.items()},
+        }))
+        if self.profile:
+            self._write_profile()
+
+    def _write_profile(self):
+        self._cprofile.disable()
+        self._sampler.stop()
+        self._tracemalloc.stop()
+        os.makedirs(self.out_dir, exist_ok=True)
+        stem = os.path.join(self.out_dir, f"{os.path.splitext(self.script)[0]}_{time.strftime('%Y%m%dT%H%M%S')}")
+        self._cprofile.dump_stats(stem + ".pstats")
+        self._sampler.write(stem + ".collapsed")
+        log.info(json.dumps({"event": "profile", "script": self.script,
+                             "pstats": stem + ".pstats", "collapsed": stem + ".collapsed"}))
+
+
+def setup(script, argv=None):
+    # Lit --profile dans la ligne de commande (les autres options sont laissées au script)
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", action="store_true")
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if not log.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+    prof = Profiler(script, profile=args.profile)
+    atexit.register(prof.finish)
+    return prof
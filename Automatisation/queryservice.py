@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+import argparse
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Service HTTP local en lecture seule : agrégats du store en JSON, pour les tableaux
+# de bord qui relisent aujourd'hui les PNG de Results/.../Graphes.
+#
+#   GET /summary        par réseau et par test : runs, échantillons, latence et gas moyens
+#   GET /percentiles    percentiles de latence par réseau et par test (q=50,90,99)
+#   GET /timeseries     cumuls par heure ou par jour (bucket=hour|day, metric=latency_ms|gas)
+#   GET /cost-ratios    coût normalisé par la référence de chaque run (normalisation.py)
+#   GET /vantages       latence par point de mesure (runs distribués)
+#   GET /stats          compteurs du cache
+# Filtres communs : chain=, test=, hours= (fenêtre glissante).
+#
+# Chaque réponse est mémorisée avec un ETag et la version des données qui l'a produite :
+# PRAGMA data_version du store (change à chaque écriture d'une autre connexion, donc à
+# chaque ingestion ou run streamé) et signature du dossier GasComparator. Tant que la
+# version ne bouge pas, une requête répétée renvoie le corps en cache (ou 304 si le
+# client envoie If-None-Match), sans requête SQL ni pandas.
+#
+#   python queryservice.py [--port 8765] [--store Results/store.sqlite]
+
+DEFAULT_PORT = 8765
+MAX_ENTRIES = 256
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+BUCKETS = {"hour": 13, "day": 10}  # préfixe de l'horodatage ISO
+METRICS = ("latency_ms", "gas")
+GAS_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), 'Results', 'GasComparator'))
+
+# runs pris en compte : terminés sans erreur, ou importés depuis les CSV
+FILTER_SQL = "runs.status IN ('ok', 'imported')"
+
+SUMMARY_SQL = """
+SELECT r.chain, r.test, COUNT(DISTINCT r.run_id), COUNT(r.latency_ms), AVG(r.latency_ms), AVG(r.gas), MAX(r.ts)
+FROM rows r JOIN runs ON runs.run_id = r.run_id
+WHERE {where}
+GROUP BY r.chain, r.test
+ORDER BY r.chain, r.test
+"""
+VALUES_SQL = """
+SELECT r.chain, r.test, r.latency_ms
+FROM rows r JOIN runs ON runs.run_id = r.run_id
+WHERE {where} AND r.latency_ms IS NOT NULL
+"""
+TIMESERIES_SQL = """
+SELECT r.chain, r.test, substr(r.ts, 1, {width}), COUNT(r.{metric}), AVG(r.{metric}), MIN(r.{metric}),
+       MAX(r.{metric})
+FROM rows r JOIN runs ON runs.run_id = r.run_id
+WHERE {where} AND r.{metric} IS NOT NULL
+GROUP BY 1, 2, 3
+ORDER BY 1, 2, 3
+"""
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _one(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _where(params):
+    # -> (clause SQL, paramètres) des filtres chain / test / hours
+    clauses, args = [FILTER_SQL], []
+    for name, column in (("chain", "r.chain"), ("test", "r.test")):
+        values = [v for item in params.get(name, []) for v in item.split(",") if v]
+        if values:
+            clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+            args += values
+    hours = _one(params, "hours")
+    if hours is not None:
+        try:
+            since = time.time() - float(hours) * 3600
+        except ValueError:
+            raise BadRequest(f"hours invalide : {hours}")
+        clauses.append("r.ts >= ?")
+        args.append(time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(since)))
+    return " AND ".join(clauses), args
+
+
+def _round(x, digits=2):
+    return None if x is None else round(x, digits)
+
+
+class QueryService:
+    def __init__(self, store_path=None, gas_folder=GAS_FOLDER, max_entries=MAX_ENTRIES):
+        if store_path is None:
+            from resultstore import DEFAULT_PATH as store_path
+        self.store_path = store_path
+        self.gas_folder = gas_folder
+        self.max_entries = max_entries
+        self.cache = collections.OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0}
+        self._lock = threading.Lock()
+        self._db = None
+        self.endpoints = {
+            "/summary": (self.summary, "store"),
+            "/percentiles": (self.percentiles, "store"),
+            "/timeseries": (self.timeseries, "store"),
+            "/vantages": (self.vantages, "store"),
+            "/cost-ratios": (self.cost_ratios, "gas"),
+        }
+
+    # ─── version des données ───────────────────────────────────────────────
+    def _connection(self):
+        # appel sous verrou ; une connexion en lecture seule gardée ouverte pour data_version
+        if self._db is None:
+            if not os.path.exists(self.store_path):
+                raise FileNotFoundError(f"Store introuvable : {self.store_path}")
+            self._db = sqlite3.connect(f"file:{self.store_path}?mode=ro", uri=True, check_same_thread=False)
+        return self._db
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._connection().execute(sql, args).fetchall()
+
+    def store_version(self):
+        with self._lock:
+            return self._connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def gas_version(self):
+        # (nom, mtime, taille) des CSV et index d'archive du dossier GasComparator,
+        # hors cache de normalisation (réécrit par le calcul lui-même)
+        import normalisation
+
+        skip = (normalisation.CACHE_NAME, normalisation.MANIFEST_NAME)
+        sig = []
+        for folder in (self.gas_folder, os.path.join(self.gas_folder, "archive")):
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            sig += [(e.name, e.stat().st_mtime_ns, e.stat().st_size) for e in entries
+                    if e.name.endswith((".csv", ".json")) and e.name not in skip and e.is_file()]
+        return hash(tuple(sorted(sig)))
+
+    # ─── cache ─────────────────────────────────────────────────────────────
+    def get(self, path, params, if_none_match=None):
+        # -> (statut HTTP, ETag, corps JSON en octets)
+        if path not in self.endpoints:
+            if path == "/stats":
+                return 200, None, self._json(self.stats())
+            if path == "/":
+                return 200, None, self._json({"endpoints": sorted(list(self.endpoints) + ["/stats"])})
+            return 404, None, self._json({"error": f"inconnu : {path}"})
+        fn, source = self.endpoints[path]
+        version = self.store_version() if source == "store" else self.gas_version()
+        if "hours" in params:
+            # fenêtre glissante : recalcul au plus une fois par minute même sans nouvelle donnée
+            version = (version, int(time.time() // 60))
+        key = (path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] == version:
+                self.cache.move_to_end(key)
+                if if_none_match == entry[1]:
+                    self.counters["not_modified"] += 1
+                    return 304, entry[1], b""
+                self.counters["hits"] += 1
+                return 200, entry[1], entry[2]
+            self.counters["misses"] += 1
+        start = time.perf_counter()
+        body = self._json(fn(params))
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        with self._lock:
+            self.cache[key] = (version, etag, body, round((time.perf_counter() - start) * 1000, 2))
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+        if if_none_match == etag:
+            return 304, etag, b""
+        return 200, etag, body
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self.cache),
+                        compute_ms={f"{k[0]}?{k[1]}": v[3] for k, v in self.cache.items()})
+
+    @staticmethod
+    def _json(data):
+        return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+    # ─── agrégats ──────────────────────────────────────────────────────────
+    def summary(self, params):
+        where, args = _where(params)
+        return [{"chain": chain, "test": test, "runs": runs, "samples": n, "mean_latency_ms": _round(lat),
+                 "mean_gas": _round(gas), "last_ts": last}
+                for chain, test, runs, n, lat, gas, last in self._query(SUMMARY_SQL.format(where=where), args)]
+
+    def percentiles(self, params):
+        import numpy as np
+        import robuststats
+
+        try:
+            qs = [float(q) / 100 for q in _one(params, "q", "").split(",") if q] or list(DEFAULT_QUANTILES)
+        except ValueError:
+            raise BadRequest("q doit être une liste de percentiles, ex. q=50,90,99")
+        if not all(0 <= q <= 1 for q in qs):
+            raise BadRequest("percentiles entre 0 et 100")
+        where, args = _where(params)
+        rows = self._query(VALUES_SQL.format(where=where), args)
+        if not rows:
+            return []
+        keys = np.array([f"{c}\x1f{t}" for c, t, _ in rows], dtype=object)
+        values = np.array([v for _, _, v in rows], dtype=float)
+        uniq, codes = np.unique(keys, return_inverse=True)
+        quant = robuststats.group_quantiles(values, codes, len(uniq), qs)
+        counts = np.bincount(codes, minlength=len(uniq))
+        out = []
+        for i, key in enumerate(uniq):
+            chain, test = key.split("\x1f", 1)
+            out.append({"chain": chain, "test": test, "samples": int(counts[i]),
+                        **{f"p{q * 100:g}": _round(float(quant[i, j])) for j, q in enumerate(qs)}})
+        return out
+
+    def timeseries(self, params):
+        bucket = _one(params, "bucket", "hour")
+        metric = _one(params, "metric", "latency_ms")
+        if bucket not in BUCKETS or metric not in METRICS:
+            raise BadRequest(f"bucket parmi {sorted(BUCKETS)}, metric parmi {list(METRICS)}")
+        where, args = _where(params)
+        sql = TIMESERIES_SQL.format(width=BUCKETS[bucket], metric=metric, where=where)
+        series = {}
+        for chain, test, period, n, mean, lo, hi in self._query(sql, args):
+            series.setdefault((chain, test), []).append(
+                {"period": period, "n": n, "mean": _round(mean), "min": _round(lo), "max": _round(hi)})
+        return [{"chain": c, "test": t, "metric": metric, "bucket": bucket, "points": pts}
+                for (c, t), pts in series.items()]
+
+    def vantages(self, params):
+        import bench
+
+        where, args = _where(params)
+        return bench.vantage_entries(self._query(bench.VANTAGE_SQL.format(test="NULL", where=where), args))
+
+    def cost_ratios(self, params):
+        import normalisation
+
+        # sans cache : le service ne doit rien écrire dans Results/GasComparator
+        df = normalisation.load(self.gas_folder, cache=False)
+        for name, column in (("chain", "Network"), ("test", "TestName")):
+            values = [v for item in params.get(name, []) for v in item.split(",") if v]
+            if values:
+                df = df[df[column].isin(values)]
+        if df.empty:
+            return []
+        agg = (df.groupby(["Network", "TestName"])
+               .agg(runs=("SourceFile", "nunique"), gas=("Gas", "mean"), net_gas=("NetGas", "mean"),
+                    gas_ratio=("GasRatio", "mean"), latency_ratio=("LatencyRatio", "mean"))
+               .reset_index())
+        agg["gas_vs_best"] = normalisation.versus_best(agg, "gas_ratio")
+        agg = agg.astype(object).where(agg.notna(), None)
+        return [{"chain": r["Network"], "test": r["TestName"], "runs": int(r["runs"]),
+                 "mean_gas": _round(r["gas"]), "mean_net_gas": _round(r["net_gas"]),
+                 "gas_ratio": _round(r["gas_ratio"], 4), "latency_ratio": _round(r["latency_ratio"], 4),
+                 "gas_ratio_vs_best": _round(r["gas_vs_best"], 4)}
+                for r in agg.to_dict("records")]
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT):
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self, head_only=False):
+            url = urlsplit(self.path)
+            try:
+                status, etag, body = service.get(url.path.rstrip("/") or "/", parse_qs(url.query),
+                                                 self.headers.get("If-None-Match"))
+            except BadRequest as e:
+                status, etag, body = 400, None, QueryService._json({"error": str(e)})
+            except FileNotFoundError as e:
+                status, etag, body = 503, None, QueryService._json({"error": str(e)})
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond()
+
+        def do_HEAD(self):
+            self._respond(head_only=True)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service JSON en lecture seule sur le store de résultats")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--store", default=None)
+    parser.add_argument("--gas-folder", default=GAS_FOLDER)
+    args = parser.parse_args(argv)
+    server = make_server(QueryService(args.store, args.gas_folder), args.host, args.port)
+    print(f"Service de requêtes sur http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from rowstream import ROW_FIELDS, utcnow_iso
+
+# Store de résultats partagé (SQLite) : l'orchestrateur y ajoute les lignes reçues
+# en flux, les scripts d'analyse le relisent sans repasser par les CSV.
+#
+# Chaque ligne porte un hash 64 bits (run, rang dans le run, valeurs) sous index
+# UNIQUE ; un ensemble en mémoire des hash déjà vus rend le dédoublonnage O(1)
+# par ligne, même à plusieurs millions de lignes. Les runs portent leur provenance
+# (script du runner, sha256 du contrat wasm, machine, source, point de mesure).
+
+RESULTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results'))
+DEFAULT_PATH = os.environ.get("BENCH_STORE", os.path.join(RESULTS_ROOT, "store.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    chain       TEXT NOT NULL,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    status      TEXT,
+    returncode  INTEGER,
+    n_rows      INTEGER DEFAULT 0,
+    runner      TEXT,
+    contract_sha256 TEXT,
+    host        TEXT,
+    source      TEXT,
+    vantage     TEXT
+);
+CREATE TABLE IF NOT EXISTS rows (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      TEXT NOT NULL REFERENCES runs(run_id),
+    chain       TEXT NOT NULL,
+    ts          TEXT NOT NULL,
+    test        TEXT NOT NULL,
+    result      TEXT,
+    gas         NUMERIC,
+    latency_ms  REAL,
+    std_ms      REAL,
+    ci95_ms     REAL,
+    extra       TEXT,
+    extra_json  TEXT,
+    row_hash    INTEGER
+);
+CREATE TABLE IF NOT EXISTS telemetry (
+    run_id      TEXT PRIMARY KEY REFERENCES runs(run_id),
+    chain       TEXT NOT NULL,
+    wall_s      REAL,
+    cpu_s       REAL,
+    peak_rss_mb REAL,
+    read_bytes  INTEGER,
+    write_bytes INTEGER,
+    n_procs     INTEGER,
+    samples     INTEGER,
+    source      TEXT
+);
+CREATE TABLE IF NOT EXISTS detector_state (
+    series      TEXT PRIMARY KEY,
+    state_json  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts          TEXT NOT NULL,
+    chain       TEXT NOT NULL,
+    test        TEXT NOT NULL,
+    metric      TEXT NOT NULL,
+    direction   TEXT NOT NULL,
+    value       REAL,
+    baseline    REAL,
+    score       REAL,
+    run_id      TEXT
+);
+CREATE INDEX IF NOT EXISTS rows_chain_test ON rows(chain, test);
+CREATE INDEX IF NOT EXISTS rows_run ON rows(run_id);
+"""
+
+# colonnes ajoutées après coup : ajoutées aux stores existants à l'ouverture
+MIGRATIONS = (
+    ("rows", "row_hash", "INTEGER"),
+    ("runs", "runner", "TEXT"),
+    ("runs", "contract_sha256", "TEXT"),
+    ("runs", "host", "TEXT"),
+    ("runs", "source", "TEXT"),
+    ("runs", "vantage", "TEXT"),
+)
+PROVENANCE = ("runner", "contract_sha256", "host", "source", "vantage")
+
+_NUMERIC = ("gas", "latency_ms", "std_ms", "ci95_ms")
+
+
+def _num(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def row_hash(run_id, seq, values):
+    # Entier signé 64 bits (colonne INTEGER de SQLite) ; seq distingue deux mesures
+    # identiques dans le même run
+    key = "\x1f".join([run_id, str(seq)] + ["" if values.get(k) is None else str(values[k]) for k in ROW_FIELDS])
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class ResultStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Une seule connexion partagée, protégée par un verrou (threads de lecture des runners)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        for table, column, kind in MIGRATIONS:
+            columns = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS rows_hash ON rows(row_hash)")
+        self._db.commit()
+        self._hashes = None
+        self._seq = {}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _seen(self):
+        # Hash déjà stockés, chargés une fois (appel sous verrou)
+        if self._hashes is None:
+            self._hashes = {h for (h,) in self._db.execute("SELECT row_hash FROM rows WHERE row_hash IS NOT NULL")}
+        return self._hashes
+
+    def start_run(self, run_id, chain, started_at=None, status="running", provenance=None):
+        # -> False si le run existait déjà (même identifiant stable)
+        provenance = provenance or {}
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO runs(run_id, chain, started_at, status, runner, contract_sha256, host, source,"
+                " vantage) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, chain, started_at or utcnow_iso(), status) + tuple(provenance.get(k) for k in PROVENANCE))
+            return cur.rowcount == 1
+
+    def finish_run(self, run_id, status, returncode=None):
+        self._seq.pop(run_id, None)
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, returncode = ?,"
+                " n_rows = (SELECT COUNT(*) FROM rows WHERE run_id = ?) WHERE run_id = ?",
+                (utcnow_iso(), status, returncode, run_id, run_id))
+
+    def _row(self, run_id, chain, msg, seq):
+        values = {k: msg.get(k) for k in ROW_FIELDS}
+        for k in _NUMERIC:
+            values[k] = _num(values[k])
+        values["ts"] = values["ts"] or utcnow_iso()
+        others = {k: v for k, v in msg.items() if k not in ROW_FIELDS and k not in ("v", "type")}
+        return (run_id, chain, values["ts"], str(values["test"]), values["result"], values["gas"],
+                values["latency_ms"], values["std_ms"], values["ci95_ms"], values["extra"],
+                json.dumps(others) if others else None, row_hash(run_id, seq, values))
+
+    def append_rows(self, run_id, chain, msgs, whole_run=False):
+        # msgs : messages "row" du protocole rowstream -> (insérées, doublons ignorés)
+        # whole_run : msgs est le run complet (CSV), rangs comptés depuis 0
+        with self._lock, self._db:
+            seen = self._seen()
+            first = 0 if whole_run else self._seq.get(run_id, 0)
+            if not whole_run:
+                self._seq[run_id] = first + len(msgs)
+            fresh = []
+            for seq, msg in enumerate(msgs, first):
+                row = self._row(run_id, chain, msg, seq)
+                if row[-1] not in seen:
+                    seen.add(row[-1])
+                    fresh.append(row)
+            self._db.executemany(
+                "INSERT OR IGNORE INTO rows(run_id, chain, ts, test, result, gas, latency_ms, std_ms, ci95_ms,"
+                " extra, extra_json, row_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", fresh)
+        return len(fresh), len(msgs) - len(fresh)
+
+    def append_row(self, run_id, chain, msg):
+        return self.append_rows(run_id, chain, [msg])[0] == 1
+
+    def record_telemetry(self, run_id, chain, stats):
+        # stats : dictionnaire de telemetry.ProcessTreeMonitor.stats()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO telemetry(run_id, chain, wall_s, cpu_s, peak_rss_mb, read_bytes,"
+                " write_bytes, n_procs, samples, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, chain, stats["wall_s"], stats["cpu_s"], stats["peak_rss_mb"], stats["read_bytes"],
+                 stats["write_bytes"], stats["n_procs"], stats["samples"], stats["source"]))
+
+    def load_detector_state(self, series):
+        with self._lock:
+            row = self._db.execute("SELECT state_json FROM detector_state WHERE series = ?", (series,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_detector_state(self, series, state):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO detector_state(series, state_json) VALUES (?, ?)",
+                             (series, json.dumps(state)))
+
+    def record_alert(self, alert):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO alerts(ts, chain, test, metric, direction, value, baseline, score, run_id)"
+                " VALUES (:ts, :chain, :test, :metric, :direction, :value, :baseline, :score, :run_id)", alert)
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+
+def load_table(table, path=DEFAULT_PATH):
+    # DataFrame d'une table annexe du store (alerts, telemetry...)
+    import pandas as pd
+
+    if not os.path.isfile(path):
+        return pd.DataFrame()
+    with sqlite3.connect(path) as db:
+        # store créé avant la table (pas encore rouvert par un ResultStore récent)
+        if db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is None:
+            return pd.DataFrame()
+        return pd.read_sql_query(f"SELECT * FROM {table}", db)
+
+
+def load_rows(chains=None, path=DEFAULT_PATH):
+    # DataFrame des lignes du store, jointes à l'horodatage exact de leur run
+    import pandas as pd
+
+    if not os.path.isfile(path):
+        return pd.DataFrame()
+    sql = ("SELECT r.*, runs.started_at AS run_started_at, COALESCE(runs.vantage, runs.host) AS vantage"
+           " FROM rows r"
+           " JOIN runs ON runs.run_id = r.run_id")
+    params = ()
+    if chains:
+        sql += " WHERE r.chain IN (%s)" % ",".join("?" * len(chains))
+        params = tuple(chains)
+    with sqlite3.connect(path) as db:
+        df = pd.read_sql_query(sql, db, params=params)
+    for col in ("ts", "run_started_at"):
+        df[col] = pd.to_datetime(df[col], utc=True, errors="coerce")
+    return df
@@ -0,0 +1,153 @@
+import argparse
+import sys
+
+import numpy as np
+
+# Statistiques robustes par groupe, vectorisées avec NumPy : un tri unique
+# (groupe, valeur) puis de l'arithmétique d'index, sans boucle Python par groupe.
+#
+# Méthodes d'agrégation (option --stats des scripts d'analyse) :
+#   mean        moyenne / écart-type classiques (comportement historique)
+#   median      médiane, dispersion = MAD normalisée (1.4826 x MAD)
+#   trimmed     moyenne tronquée à `prop` de chaque côté
+#   winsorized  moyenne winsorisée à `prop` de chaque côté
+#   hampel      moyenne après filtre de Hampel (|x - médiane| > t x 1.4826 x MAD rejetés)
+#
+# aggregate() renvoie par groupe : center, spread, count, se (erreur type du centre),
+# pour que les scripts gardent leur propre IC (1.96 x se ou t x se).
+
+METHODS = ("mean", "median", "trimmed", "winsorized", "hampel")
+MAD_SCALE = 1.4826
+
+
+def method_from_argv(argv=None, default="mean"):
+    # Lit --stats sans gêner les autres options du script (--profile...)
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--stats", choices=METHODS, default=default)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.stats
+
+
+def _sorted_groups(values, codes, ngroups):
+    order = np.lexsort((values, codes))
+    v = values[order]
+    c = codes[order]
+    counts = np.bincount(c, minlength=ngroups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(len(v)) - starts[c]
+    return v, c, counts, starts, rank
+
+
+def _group_sum(weights, codes, ngroups):
+    return np.bincount(codes, weights=weights, minlength=ngroups)
+
+
+def group_median(values, codes, ngroups):
+    v, _, counts, starts, _ = _sorted_groups(values, codes, ngroups)
+    med = np.full(ngroups, np.nan)
+    has = counts > 0
+    lo = starts[has] + (counts[has] - 1) // 2
+    hi = starts[has] + counts[has] // 2
+    med[has] = (v[lo] + v[hi]) / 2
+    return med
+
+
+def group_quantiles(values, codes, ngroups, qs):
+    # quantiles (interpolation linéaire, comme np.percentile) -> tableau (ngroups, len(qs))
+    v, _, counts, starts, _ = _sorted_groups(values, codes, ngroups)
+    out = np.full((ngroups, len(qs)), np.nan)
+    has = counts > 0
+    first, last = starts[has], starts[has] + counts[has] - 1
+    for j, q in enumerate(qs):
+        pos = first + q * (last - first)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        out[has, j] = v[lo] + (v[hi] - v[lo]) * (pos - lo)
+    return out
+
+
+def group_mad(values, codes, ngroups, med=None):
+    if med is None:
+        med = group_median(values, codes, ngroups)
+    return group_median(np.abs(values - med[codes]), codes, ngroups)
+
+
+def group_mean_std(values, codes, ngroups):
+    n = np.bincount(codes, minlength=ngroups).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = _group_sum(values, codes, ngroups) / n
+        ss = _group_sum((values - mean[codes]) ** 2, codes, ngroups)
+        std = np.sqrt(ss / (n - 1))
+    return mean, std, n
+
+
+def group_trimmed_mean(values, codes, ngroups, prop=0.1):
+    v, c, counts, starts, rank = _sorted_groups(values, codes, ngroups)
+    k = np.floor(prop * counts).astype(int)
+    keep = (rank >= k[c]) & (rank < counts[c] - k[c])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _group_sum(v[keep], c[keep], ngroups) / np.bincount(c[keep], minlength=ngroups)
+
+
+def group_winsorized(values, codes, ngroups, prop=0.1):
+    # (moyenne winsorisée, écart-type winsorisé)
+    v, c, counts, starts, _ = _sorted_groups(values, codes, ngroups)
+    k = np.floor(prop * counts).astype(int)
+    has = counts > 0
+    low = np.full(ngroups, np.nan)
+    high = np.full(ngroups, np.nan)
+    low[has] = v[starts[has] + k[has]]
+    high[has] = v[starts[has] + counts[has] - 1 - k[has]]
+    w = np.clip(v, low[c], high[c])
+    mean, std, _ = group_mean_std(w, c, ngroups)
+    return mean, std
+
+
+def hampel_mask(values, codes, ngroups, t=3.0):
+    # True pour les points rejetés ; un groupe de MAD nulle ne rejette rien
+    med = group_median(values, codes, ngroups)
+    mad = group_mad(values, codes, ngroups, med)
+    limit = t * MAD_SCALE * mad[codes]
+    return (np.abs(values - med[codes]) > limit) & (limit > 0)
+
+
+def group_stats(values, codes, ngroups, method="mean", prop=0.1, t=3.0):
+    # -> dict de tableaux (ngroups,) : center, spread, count, se
+    values = np.asarray(values, dtype=float)
+    codes = np.asarray(codes, dtype=np.int64)
+    ok = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[ok], codes[ok]
+    if method == "hampel":
+        keep = ~hampel_mask(values, codes, ngroups, t)
+        values, codes = values[keep], codes[keep]
+    n = np.bincount(codes, minlength=ngroups).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if method in ("mean", "hampel"):
+            center, spread, _ = group_mean_std(values, codes, ngroups)
+            se = spread / np.sqrt(n)
+        elif method == "median":
+            center = group_median(values, codes, ngroups)
+            spread = MAD_SCALE * group_mad(values, codes, ngroups, center)
+            # erreur type asymptotique de la médiane : sqrt(pi/2) x sigma / sqrt(n)
+            se = 1.2533 * spread / np.sqrt(n)
+        elif method in ("trimmed", "winsorized"):
+            w_mean, w_std = group_winsorized(values, codes, ngroups, prop)
+            center = group_trimmed_mean(values, codes, ngroups, prop) if method == "trimmed" else w_mean
+            spread = w_std
+            # Tukey-McLaughlin : écart-type winsorisé / ((1 - 2 prop) sqrt(n))
+            se = w_std / ((1 - 2 * prop) * np.sqrt(n))
+        else:
+            raise ValueError(f"méthode inconnue : {method} (attendu : {', '.join(METHODS)})")
+    return {"center": center, "spread": spread, "count": n, "se": se}
+
+
+def aggregate(df, by, col, method="mean", **kwargs):
+    # DataFrame indexé comme df.groupby(by)[col], colonnes center / spread / count / se
+    import pandas as pd
+
+    grouped = df.groupby(by, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    index = grouped.size().index
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+    stats = group_stats(values, codes, len(index), method, **kwargs)
+    return pd.DataFrame(stats, index=index)
@@ -0,0 +1,99 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+# Protocole de résultats en flux (JSON lines) entre les runners et l'orchestrateur.
+#
+# Un runner qui voit BENCH_STREAM=1 dans son environnement écrit, en plus de ses
+# logs habituels, une ligne par mesure sur stdout :
+#
+#   @@BENCH {"v":1,"type":"row","test":"loopSum","gas":"2428..","latency_ms":812,...}
+#
+# Types de messages :
+#   meta   -> informations sur le runner (script, version, réseau)
+#   row    -> une mesure terminée (champs ci-dessous)
+#   sample -> un échantillon brut (test, latency_ms) d'une mesure en cours ; si
+#             BENCH_ADAPTIVE=1, le runner attend ensuite sur stdin la réponse de
+#             l'orchestrateur : "more" (continuer) ou "stop" (précision atteinte)
+#   end    -> fin de run, avec le nombre de lignes émises
+#
+# Champs d'une ligne "row" : test, result, gas, latency_ms, std_ms, ci95_ms, extra,
+# ts (ISO-8601 UTC de la fin de la mesure). Tout champ inconnu est conservé dans
+# "extra_json" par le store. Les lignes sans préfixe sont des logs ordinaires.
+
+PREFIX = "@@BENCH "
+VERSION = 1
+
+ENV_STREAM = "BENCH_STREAM"
+ENV_RUN_ID = "BENCH_RUN_ID"
+ENV_CHAIN = "BENCH_CHAIN"
+ENV_ADAPTIVE = "BENCH_ADAPTIVE"
+
+REPLY_MORE = "more"
+REPLY_STOP = "stop"
+
+ROW_FIELDS = ("test", "result", "gas", "latency_ms", "std_ms", "ci95_ms", "extra", "ts")
+
+
+def utcnow_iso():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def new_run_id(chain):
+    # ex : BenchmarkNear-20250427T211118-4f2a
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    return f"{chain}-{stamp}-{os.urandom(2).hex()}"
+
+
+def stream_env(chain, run_id, base=None, adaptive=False):
+    # Environnement à passer au runner ; WSLENV propage les variables dans `wsl bash`
+    env = dict(os.environ if base is None else base)
+    env[ENV_STREAM] = "1"
+    env[ENV_RUN_ID] = run_id
+    env[ENV_CHAIN] = chain
+    env[ENV_ADAPTIVE] = "1" if adaptive else "0"
+    shared = [ENV_STREAM, ENV_RUN_ID, ENV_CHAIN, ENV_ADAPTIVE]
+    existing = [v for v in env.get("WSLENV", "").split(":") if v and v not in shared]
+    env["WSLENV"] = ":".join(existing + shared)
+    return env
+
+
+def format_message(kind, **fields):
+    msg = {"v": VERSION, "type": kind}
+    msg.update({k: v for k, v in fields.items() if v is not None})
+    return PREFIX + json.dumps(msg, separators=(",", ":"))
+
+
+def parse_line(line):
+    # Retourne le message décodé, ou None si la ligne est un log ordinaire
+    line = line.strip()
+    if not line.startswith(PREFIX.strip()):
+        return None
+    try:
+        msg = json.loads(line[len(PREFIX.strip()):])
+    except ValueError:
+        return None
+    if not isinstance(msg, dict) or "type" not in msg:
+        return None
+    return msg
+
+
+def reply(stdin, answer):
+    # Réponse à un message "sample" ; le runner peut déjà être terminé
+    try:
+        stdin.write(answer + "\n")
+        stdin.flush()
+    except (BrokenPipeError, OSError, ValueError):
+        pass
+
+
+def consume(stream, on_message, echo=print):
+    # Lit la sortie du runner ligne par ligne jusqu'à EOF
+    for raw in iter(stream.readline, ""):
+        msg = parse_line(raw)
+        if msg is None:
+            if echo is not None:
+                echo(raw.rstrip("\n"))
+            continue
+        on_message(msg)
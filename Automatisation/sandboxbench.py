@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import rowstream
+from ingest import provenance
+from resultstore import DEFAULT_PATH, RESULTS_ROOT, ResultStore
+from supervision import RunTimeout, run_with_timeout, tree_popen_kwargs
+
+# Courbes gas = f(entrée) déterministes, sans latence testnet ni fonds : chaque méthode
+# *_tx de StorageBenchmark est appelée sur une grille de paramètres dans des sandboxes
+# near-workspaces locaux (BenchmarkNear/sandbox-test/grid.mjs).
+#
+# La grille est découpée en --workers lots lancés en parallèle, un sandbox (nœud neard
+# local) par lot ; dans chaque sandbox, --concurrency comptes appellent le contrat en
+# même temps. Le gas brûlé ne dépend que du wasm et des arguments : l'ordre et le
+# parallélisme ne changent pas les courbes.
+#
+# Un balayage = un run du store (chaîne BenchmarkNear-sandbox, source "sandbox") ;
+# chaque ligne garde param et x dans extra_json. Le détecteur de ruptures reçoit le run :
+# un changement de gas entre deux balayages vient du contrat, pas du réseau.
+#
+#   python sandboxbench.py [--methods loopSum_tx,gcd_tx] [--workers 2] [--concurrency 4] [--plot]
+#   python sandboxbench.py --list
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NEAR_DIR = os.path.abspath(os.path.join(HERE, '../BenchmarkNear'))
+WASM_PATH = os.path.join(NEAR_DIR, "build", "contract.wasm")
+RUNNER = ["node", "sandbox-test/grid.mjs"]
+CHAIN = "BenchmarkNear-sandbox"
+GRAPH_DIR = os.path.join(RESULTS_ROOT, "Graph", "Sandbox")
+
+WORKERS = 2
+CONCURRENCY = 4
+# démarrage du sandbox (~10 s) + appels d'un lot
+BATCH_TIMEOUT_S = 900
+
+
+def _fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+# méthode -> (paramètre balayé, valeurs, arguments de l'appel pour une valeur)
+GRID = {
+    "reference_tx": (None, [None], lambda x: {}),
+    "setValue": ("value", [0, 42, 10 ** 6], lambda x: {"value": x}),
+    "loopSum_tx": ("n", [10, 100, 1000, 5000, 10000], lambda x: {"n": x}),
+    "fibonacciIterative_tx": ("n", [1, 5, 10, 20, 40, 70], lambda x: {"n": x}),
+    "fibonacciRecursive_tx": ("n", [5, 10, 15, 20], lambda x: {"n": x}),
+    "isPrime_tx": ("num", [7, 97, 7919, 104729, 1000003], lambda x: {"num": x}),
+    "factorialIterative_tx": ("n", [1, 5, 10, 15, 20], lambda x: {"n": x}),
+    "factorialRecursive_tx": ("n", [1, 5, 10, 15, 20], lambda x: {"n": x}),
+    "expBySquaring_tx": ("exponent", [1, 8, 64, 512, 4096], lambda x: {"base": 2, "exponent": x}),
+    # pire cas d'Euclide : deux termes consécutifs de Fibonacci, x divisions
+    "gcd_tx": ("steps", [2, 5, 10, 20, 30], lambda x: {"a": _fib(x + 1), "b": _fib(x)}),
+    # pire cas : tableau trié à l'envers
+    "insertionSort_tx": ("len", [5, 10, 20, 50, 100], lambda x: {"arr": list(range(x, 0, -1))}),
+    "bubbleSort_tx": ("len", [5, 10, 20, 50, 100], lambda x: {"arr": list(range(x, 0, -1))}),
+    "binarySearch_tx": ("len", [10, 100, 1000, 5000], lambda x: {"sortedArr": list(range(x)), "target": x - 1}),
+    "nestedLoops_tx": ("n", [10, 25, 50, 75, 100], lambda x: {"n": x}),
+    "batchTestOperations_tx": ("iterations", [1, 5, 10, 20],
+                               lambda x: {"iterations": x, "fibN": 10, "primeN": 97, "loopN": 100}),
+}
+
+
+def test_name(method, x):
+    # même nommage que mesure.ts : loopSum_tx(100)
+    return method if x is None else f"{method}({json.dumps(x)})"
+
+
+def build_jobs(methods=None):
+    jobs = []
+    for method, (param, values, make_args) in GRID.items():
+        if methods and method not in methods:
+            continue
+        for x in values:
+            jobs.append({"test": test_name(method, x), "method": method, "args": make_args(x), "param": param, "x": x})
+    return jobs
+
+
+def split(jobs, n):
+    # lots entrelacés : les valeurs coûteuses (fin de grille) se répartissent entre sandboxes
+    return [b for b in (jobs[i::n] for i in range(max(1, n))) if b]
+
+
+def run_batch(jobs, run_id, on_message, concurrency=CONCURRENCY, runner=RUNNER, timeout=BATCH_TIMEOUT_S):
+    # un sandbox pour le lot -> code de retour du runner
+    with tempfile.NamedTemporaryFile("w", suffix=".json", prefix="sandbox-jobs-", delete=False) as f:
+        json.dump(jobs, f)
+    env = rowstream.stream_env(CHAIN, run_id)
+    env["SANDBOX_CONCURRENCY"] = str(concurrency)
+    try:
+        process = subprocess.Popen(
+            list(runner) + [f.name, WASM_PATH], cwd=NEAR_DIR, stdout=subprocess.PIPE, text=True,
+            encoding="utf-8", errors="replace", bufsize=1, env=env, **tree_popen_kwargs())
+        return run_with_timeout(process, timeout, lambda stream: rowstream.consume(stream, on_message, echo=None))
+    finally:
+        os.remove(f.name)
+
+
+def sweep(store, methods=None, workers=WORKERS, concurrency=CONCURRENCY, runner=RUNNER, timeout=BATCH_TIMEOUT_S):
+    # -> (run_id, statut, lignes reçues)
+    jobs = build_jobs(methods)
+    batches = split(jobs, workers)
+    run_id = rowstream.new_run_id(CHAIN)
+    store.start_run(run_id, CHAIN, provenance=provenance(CHAIN, " ".join(runner), WASM_PATH, source="sandbox"))
+    received = []
+
+    def on_message(msg):
+        if msg.get("type") == "row":
+            # lignes de tous les lots dans le même run (store protégé par verrou)
+            store.append_row(run_id, CHAIN, msg)
+            received.append(msg)
+            print(f"[{len(received)}/{len(jobs)}] {msg.get('test')} : gas={msg.get('gas')} ({msg.get('result')})")
+
+    def one(batch):
+        try:
+            return run_batch(batch, run_id, on_message, concurrency, runner, timeout)
+        except RunTimeout as e:
+            print(f"⏱️ lot de {len(batch)} appels : {e}")
+            return "timeout"
+        except OSError as e:
+            print(f"❌ lancement impossible ({' '.join(runner)}) : {e}")
+            return None
+
+    start = time.monotonic()
+    print(f"🧪 {len(jobs)} appels en {len(batches)} lots ({concurrency} appels simultanés par sandbox)")
+    with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+        codes = list(pool.map(one, batches))
+    failed = [m for m in received if m.get("result") != "Tx Success"]
+    if "timeout" in codes:
+        status = "timeout"
+    elif any(c != 0 for c in codes):
+        status = "failed"
+    else:
+        status = "ok"
+    store.finish_run(run_id, status, next((c for c in codes if isinstance(c, int) and c != 0), 0))
+    print(f"✅ {len(received)}/{len(jobs)} mesures en {time.monotonic() - start:.1f}s, {len(failed)} en échec : run {run_id} ({status})")
+    return run_id, status, received
+
+
+def load_curves(path=DEFAULT_PATH, run_id=None):
+    # DataFrame (method, x, gas) du dernier balayage (ou de run_id) ; gas en gas brûlé total
+    import pandas as pd
+    import resultstore
+
+    rows = resultstore.load_rows([CHAIN], path)
+    if rows.empty:
+        return rows
+    run_id = run_id or rows.sort_values("run_started_at")["run_id"].iloc[-1]
+    rows = rows[rows["run_id"] == run_id].copy()
+    extra = rows["extra_json"].fillna("{}").map(json.loads)
+    rows["method"] = extra.map(lambda e: e.get("method"))
+    rows["param"] = extra.map(lambda e: e.get("param"))
+    rows["x"] = pd.to_numeric(extra.map(lambda e: e.get("x")), errors="coerce")
+    return rows[["run_id", "test", "method", "param", "x", "gas", "result"]]
+
+
+def plot_curves(out_dir=GRAPH_DIR, path=DEFAULT_PATH, run_id=None):
+    import math
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    curves = load_curves(path, run_id)
+    if curves.empty:
+        print("Aucun balayage sandbox dans le store.")
+        return None
+    ok = curves[(curves["result"] == "Tx Success") & curves["gas"].notna()]
+    ref = ok.loc[ok["method"] == "reference_tx", "gas"]
+    methods = [m for m in GRID if m != "reference_tx" and (ok["method"] == m).any()]
+    cols = 3
+    fig, axes = plt.subplots(math.ceil(len(methods) / cols), cols, figsize=(5 * cols, 3.2 * math.ceil(len(methods) / cols)),
+                             dpi=110, squeeze=False)
+    for ax, method in zip(axes.flat, methods):
+        sub = ok[ok["method"] == method].sort_values("x")
+        ax.plot(sub["x"], sub["gas"] / 1e12, marker="o")
+        if not ref.empty:
+            ax.axhline(ref.iloc[0] / 1e12, color="grey", linestyle="--", linewidth=0.8, label="reference_tx")
+        ax.set_title(method, fontsize=9)
+        ax.set_xlabel(sub["param"].iloc[0])
+        ax.set_ylabel("TGas")
+        ax.grid(True, linestyle="--", alpha=0.5)
+    for ax in list(axes.flat)[len(methods):]:
+        ax.axis("off")
+    fig.suptitle(f"Gas vs entrée (sandbox) – {curves['run_id'].iloc[0]}")
+    fig.tight_layout()
+    os.makedirs(out_dir, exist_ok=True)
+    out = os.path.join(out_dir, "sandbox_gas_curves.png")
+    fig.savefig(out)
+    plt.close(fig)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Courbes de gas déterministes dans un sandbox NEAR local")
+    parser.add_argument("--store", default=DEFAULT_PATH)
+    parser.add_argument("--methods", help="méthodes séparées par des virgules (défaut : toute la grille)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="sandboxes en parallèle")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="appels simultanés par sandbox")
+    parser.add_argument("--timeout", type=float, default=BATCH_TIMEOUT_S, help="timeout d'un lot (s)")
+    parser.add_argument("--runner", default=" ".join(RUNNER), help="commande du runner, lancée dans BenchmarkNear")
+    parser.add_argument("--plot", action="store_true", help="graphe des courbes après le balayage")
+    parser.add_argument("--plot-only", action="store_true", help="graphe du dernier balayage, sans rien lancer")
+    parser.add_argument("--list", action="store_true", help="affiche la grille")
+    args = parser.parse_args(argv)
+
+    methods = set(args.methods.split(",")) if args.methods else None
+    unknown = sorted((methods or set()) - set(GRID))
+    if unknown:
+        parser.error(f"méthodes inconnues : {', '.join(unknown)}")
+    if args.list:
+        for job in build_jobs(methods):
+            print(f"{job['test']:<40} {json.dumps(job['args'])[:60]}")
+        return 0
+
+    status = "ok"
+    if not args.plot_only:
+        store = ResultStore(args.store)
+        try:
+            run_id, status, _ = sweep(store, methods, args.workers, args.concurrency, args.runner.split(), args.timeout)
+            # comme automateV3.close_run : un balayage partiel (lot en échec ou en timeout)
+            # ne doit pas entrer dans les lignes de base persistées du détecteur
+            if status == "ok":
+                from changepoint import ChangeDetector
+
+                for alert in ChangeDetector(store).ingest_run(run_id, CHAIN):
+                    print(f"[{CHAIN}] RUPTURE {alert['metric']} {alert['direction']} sur {alert['test']} :"
+                          f" {alert['value']:.1f} (base {alert['baseline']:.1f}, score {alert['score']})")
+        finally:
+            store.close()
+    if args.plot or args.plot_only:
+        out = plot_curves(path=args.store)
+        if out:
+            print(f"Saved sandbox gas curves: {out}")
+    return 0 if status == "ok" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import heapq
+import statistics
+import time
+from collections import defaultdict, deque
+
+# Ordonnanceur à priorité : chaque blockchain a sa propre cadence cible et un budget
+# de runs sur 24 h. La cadence s'adapte à la variabilité récente de la latence :
+# une chaîne instable est échantillonnée plus souvent, une chaîne stable moins souvent.
+
+DAY = 24 * 3600.0
+
+
+class ChainPolicy:
+    def __init__(self, interval, min_interval=None, max_interval=None, daily_budget=None,
+                 target_cv=0.25, priority=0):
+        self.interval = float(interval)
+        self.min_interval = float(min_interval if min_interval is not None else interval / 4)
+        self.max_interval = float(max_interval if max_interval is not None else interval * 4)
+        self.daily_budget = daily_budget
+        self.target_cv = target_cv
+        self.priority = priority
+
+
+def latency_cv(store, chain, runs=10):
+    # Coefficient de variation médian (par test) de la latence sur les `runs` derniers runs
+    rows = store.query(
+        "SELECT test, latency_ms FROM rows WHERE latency_ms IS NOT NULL AND run_id IN ("
+        " SELECT run_id FROM runs WHERE chain = ? AND status = 'ok' ORDER BY started_at DESC LIMIT ?)",
+        (chain, runs))
+    by_test = defaultdict(list)
+    for test, lat in rows:
+        by_test[test].append(lat)
+    cvs = []
+    for values in by_test.values():
+        if len(values) < 3:
+            continue
+        mean = statistics.fmean(values)
+        if mean > 0:
+            cvs.append(statistics.stdev(values) / mean)
+    return statistics.median(cvs) if cvs else None
+
+
+class Scheduler:
+    def __init__(self, policies, cv_fn=None, clock=time.time):
+        self.policies = policies
+        self.cv_fn = cv_fn
+        self.clock = clock
+        self.history = {chain: deque() for chain in policies}
+        self.intervals = {chain: p.interval for chain, p in policies.items()}
+        now = clock()
+        # Tout le monde est dû au démarrage ; la priorité départage les égalités
+        self.queue = [(now, p.priority, chain) for chain, p in policies.items()]
+        heapq.heapify(self.queue)
+
+    def next_interval(self, chain):
+        policy = self.policies[chain]
+        cv = self.cv_fn(chain) if self.cv_fn else None
+        if cv is None:
+            return policy.interval
+        # cv au-dessus de la cible -> intervalle plus court, et inversement
+        scale = policy.target_cv / max(cv, 1e-9)
+        return min(policy.max_interval, max(policy.min_interval, policy.interval * scale))
+
+    def _budget_wait(self, chain, now):
+        # Secondes à attendre avant qu'un run redevienne disponible dans le budget glissant de 24 h
+        budget = self.policies[chain].daily_budget
+        history = self.history[chain]
+        while history and now - history[0] >= DAY:
+            history.popleft()
+        if budget is None or len(history) < budget:
+            return 0.0
+        return history[0] + DAY - now
+
+    def pop_due(self):
+        # Retourne (chaîne, secondes d'attente avant son échéance)
+        while True:
+            due, prio, chain = heapq.heappop(self.queue)
+            wait = self._budget_wait(chain, max(due, self.clock()))
+            if wait > 0:
+                heapq.heappush(self.queue, (max(due, self.clock()) + wait, prio, chain))
+                continue
+            return chain, max(0.0, due - self.clock())
+
+    def done(self, chain, started_at, delay=None):
+        # delay force la prochaine échéance (ex. disjoncteur ouvert) au lieu de la cadence adaptative
+        self.history[chain].append(started_at)
+        if delay is None:
+            self.intervals[chain] = self.next_interval(chain)
+            delay = self.intervals[chain]
+        heapq.heappush(self.queue, (started_at + delay, self.policies[chain].priority, chain))
+
+    def skip(self, chain, delay):
+        # Échéance repoussée sans consommer de budget
+        heapq.heappush(self.queue, (self.clock() + delay, self.policies[chain].priority, chain))
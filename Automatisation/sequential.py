@@ -0,0 +1,83 @@
+import math
+import threading
+from statistics import NormalDist
+
+# Échantillonnage séquentiel : on continue à mesurer un test tant que la demi-largeur
+# de l'IC (Student) dépasse `rel_precision` x |moyenne|, entre min_samples et max_samples.
+
+
+def t_ppf(p, df):
+    # Quantile de Student sans scipy : formules exactes pour df = 1, 2, puis
+    # développement de Cornish-Fisher (Abramowitz & Stegun 26.7.5), erreur < 5e-3 pour df = 3, < 1e-3 au-delà
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+class SequentialSampler:
+    def __init__(self, rel_precision=0.05, min_samples=10, max_samples=200, confidence=0.95):
+        self.rel_precision = rel_precision
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.confidence = confidence
+        # Moyenne / variance en ligne (Welford)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def half_width(self):
+        if self.n < 2:
+            return math.inf
+        sem = math.sqrt(self.m2 / (self.n - 1) / self.n)
+        return sem * t_ppf(0.5 + self.confidence / 2, self.n - 1)
+
+    def done(self):
+        if self.n >= self.max_samples:
+            return True
+        if self.n < self.min_samples:
+            return False
+        return self.half_width() <= self.rel_precision * abs(self.mean)
+
+    def reason(self):
+        if self.n >= self.max_samples and self.half_width() > self.rel_precision * abs(self.mean):
+            return "cap"
+        return "precision"
+
+
+class SamplingController:
+    # Un SequentialSampler par (run, test) ; répond "more" / "stop" aux messages "sample" du runner.
+    # Partagé entre les runs simultanés (mode distribué) : accès sous verrou
+    def __init__(self, **sampler_kwargs):
+        self.sampler_kwargs = sampler_kwargs
+        self.samplers = {}
+        self._lock = threading.Lock()
+
+    def on_sample(self, run_id, test, value):
+        key = (run_id, test)
+        with self._lock:
+            sampler = self.samplers.get(key)
+            if sampler is None:
+                sampler = self.samplers[key] = SequentialSampler(**self.sampler_kwargs)
+            sampler.add(float(value))
+            if sampler.done():
+                self.samplers.pop(key, None)
+                return "stop", sampler
+            return "more", sampler
+
+    def forget(self, run_id):
+        with self._lock:
+            for key in [k for k in self.samplers if k[0] == run_id]:
+                self.samplers.pop(key, None)
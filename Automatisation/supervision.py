@@ -0,0 +1,145 @@
+import os
+import random
+import signal
+import subprocess
+import threading
+import time
+
+# Supervision des runners : timeout dur avec kill de l'arbre de processus,
+# retries avec backoff exponentiel et disjoncteur (circuit breaker) par blockchain.
+
+IS_WINDOWS = os.name == "nt"
+
+
+class RunTimeout(Exception):
+    pass
+
+
+def tree_popen_kwargs():
+    # Place le runner dans son propre groupe pour pouvoir tuer tout l'arbre (npx -> node, wsl -> bash -> npm)
+    if IS_WINDOWS:
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_tree(process):
+    if process.poll() is not None:
+        return
+    try:
+        if IS_WINDOWS:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        process.kill()
+    process.wait()
+
+
+def run_with_timeout(process, timeout, reader=None):
+    # reader(stream) consomme stdout dans un thread ; le thread principal garde la main
+    # pour appliquer le timeout même si le runner ne produit plus rien.
+    thread = None
+    if reader is not None:
+        thread = threading.Thread(target=reader, args=(process.stdout,), daemon=True)
+        thread.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_tree(process)
+        raise RunTimeout(f"pas de fin apres {timeout:.0f}s, arbre de processus {process.pid} tue")
+    finally:
+        if thread is not None:
+            thread.join(timeout=5)
+    return returncode
+
+
+def backoff_delay(attempt, base=5.0, cap=120.0):
+    # Backoff exponentiel avec jitter : base * 2^attempt, borné par cap
+    delay = min(cap, base * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    # closed -> open après `threshold` échecs consécutifs ; après `cooldown` secondes un seul
+    # essai (half_open) est autorisé : succès -> closed, échec -> open avec cooldown doublé.
+    def __init__(self, threshold=3, cooldown=600.0, max_cooldown=6 * 3600.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = None
+
+    def allow(self):
+        if self.state == "open" and self.clock() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        return self.state != "open"
+
+    def retry_in(self):
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.cooldown - (self.clock() - self.opened_at))
+
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open":
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self._open()
+        elif self.failures >= self.threshold:
+            self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = self.clock()
+
+
+class Supervisor:
+    def __init__(self, timeouts, default_timeout=900.0, retries=2, breaker_kwargs=None, sleep=time.sleep):
+        self.timeouts = timeouts
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.breaker_kwargs = breaker_kwargs or {}
+        self.breakers = {}
+        self.sleep = sleep
+
+    def breaker(self, chain):
+        if chain not in self.breakers:
+            self.breakers[chain] = CircuitBreaker(**self.breaker_kwargs)
+        return self.breakers[chain]
+
+    def timeout_for(self, chain):
+        return self.timeouts.get(chain, self.default_timeout)
+
+    def run(self, chain, attempt_fn):
+        # attempt_fn(timeout) -> code de retour ; lève RunTimeout si le runner est tué
+        breaker = self.breaker(chain)
+        if not breaker.allow():
+            print(f"[{chain}] disjoncteur ouvert, prochain essai dans {breaker.retry_in():.0f}s")
+            return "skipped"
+        probing = breaker.state == "half_open"
+        attempts = 1 if probing else self.retries + 1
+        for attempt in range(attempts):
+            try:
+                returncode = attempt_fn(self.timeout_for(chain))
+                if returncode == 0:
+                    breaker.record_success()
+                    return "ok"
+                print(f"[{chain}] echec (code {returncode}), essai {attempt + 1}/{attempts}")
+            except RunTimeout as e:
+                print(f"[{chain}] timeout : {e}, essai {attempt + 1}/{attempts}")
+            if attempt + 1 < attempts:
+                delay = backoff_delay(attempt)
+                print(f"[{chain}] nouvel essai dans {delay:.0f}s")
+                self.sleep(delay)
+        breaker.record_failure()
+        if breaker.state == "open":
+            print(f"[{chain}] disjoncteur ouvert pour {breaker.cooldown:.0f}s")
+        return "failed"
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+
+# Télémétrie de ressources par run : échantillonne l'arbre de processus du runner
+# (psutil si disponible, sinon /proc) et retient RSS pic, temps CPU, durée et I/O.
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+HAS_PROC = os.path.isdir("/proc/self")
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _proc_children(root):
+    # pid -> ppid de tous les processus, puis parcours en largeur depuis root
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # le nom (champ 2) peut contenir des espaces : on repart de la dernière ')'
+        fields = stat[stat.rfind(b")") + 2:].split()
+        parents.setdefault(int(fields[1]), []).append(int(entry))
+    tree, todo = [root], [root]
+    while todo:
+        for child in parents.get(todo.pop(), ()):
+            tree.append(child)
+            todo.append(child)
+    return tree
+
+
+def _proc_sample(pid):
+    # (cpu_s, rss_bytes, read_bytes, write_bytes) ou None si le processus a disparu
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        fields = stat[stat.rfind(b")") + 2:].split()
+        cpu = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+        rss = int(fields[21]) * _PAGE
+    except (OSError, IndexError, ValueError):
+        return None
+    read_b = write_b = 0
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key == "read_bytes":
+                    read_b = int(value)
+                elif key == "write_bytes":
+                    write_b = int(value)
+    except (OSError, ValueError):
+        pass
+    return cpu, rss, read_b, write_b
+
+
+def _psutil_samples(root):
+    try:
+        proc = psutil.Process(root)
+        procs = [proc] + proc.children(recursive=True)
+    except psutil.Error:
+        return {}
+    samples = {}
+    for p in procs:
+        try:
+            with p.oneshot():
+                cpu = p.cpu_times()
+                io = p.io_counters() if hasattr(p, "io_counters") else None
+                samples[p.pid] = (cpu.user + cpu.system, p.memory_info().rss,
+                                  io.read_bytes if io else 0, io.write_bytes if io else 0)
+        except psutil.Error:
+            continue
+    return samples
+
+
+class ProcessTreeMonitor:
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.source = "psutil" if psutil is not None else ("proc" if HAS_PROC else None)
+        # Dernière valeur vue par pid : un processus terminé garde sa contribution
+        self.last = {}
+        self.peak_rss = 0
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._t0 = None
+        self.wall = 0.0
+
+    def sample(self):
+        if self.source == "psutil":
+            current = _psutil_samples(self.pid)
+        else:
+            current = {}
+            for pid in _proc_children(self.pid):
+                s = _proc_sample(pid)
+                if s is not None:
+                    current[pid] = s
+        if not current:
+            return
+        self.last.update(current)
+        self.peak_rss = max(self.peak_rss, sum(s[1] for s in current.values()))
+        self.samples += 1
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._t0 = time.monotonic()
+        if self.source is not None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self.wall = time.monotonic() - self._t0
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stats()
+
+    def stats(self):
+        values = self.last.values()
+        return {
+            "wall_s": round(self.wall, 3),
+            "cpu_s": round(sum(s[0] for s in values), 3),
+            "peak_rss_mb": round(self.peak_rss / 2 ** 20, 1),
+            "read_bytes": sum(s[2] for s in values),
+            "write_bytes": sum(s[3] for s in values),
+            "n_procs": len(self.last),
+            "samples": self.samples,
+            "source": self.source or "none",
+        }
+
+
+def overhead_warnings(stats, max_cpu_share=0.5, max_rss_mb=1024):
+    # Un runner qui attend le réseau doit rester peu chargé ; au-delà, la latence mesurée
+    # risque d'inclure du temps passé dans le harnais (heap Node, compilation ts-node...)
+    warnings = []
+    if stats["wall_s"] > 0 and stats["cpu_s"] / stats["wall_s"] > max_cpu_share:
+        warnings.append(f"CPU du harnais {stats['cpu_s'] / stats['wall_s']:.0%} du temps mur"
+                        f" (> {max_cpu_share:.0%})")
+    if stats["peak_rss_mb"] > max_rss_mb:
+        warnings.append(f"RSS pic {stats['peak_rss_mb']:.0f} Mo (> {max_rss_mb} Mo)")
+    return warnings
@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 
 import os
-import glob
-import pandas as pd
 import matplotlib.pyplot as plt
 
+import heatmaps
+import normalisation
+import profiling
+
+prof = profiling.setup(__file__)
+# --order cluster|function|none : ordre des lignes des heatmaps
+ORDER = heatmaps.order_from_argv()
+
 # ─── 1) CHEMIN VERS VOS CSV ─────────────────────────────────────────────────────
 # Remplacez ce chemin par le chemin absolu de votre dossier Benchmarks\Results\Gascomparator
 CSV_FOLDER = r"C:\Users\yaya\Desktop\Benchmarks\Results\Gascomparator"
@@ -13,38 +19,33 @@ CSV_FOLDER = r"C:\Users\yaya\Desktop\Benchmarks\Results\Gascomparator"
 OUT_DIR = os.path.join(CSV_FOLDER, "Graphes", "ComparaisonLatencyComplexity")
 os.makedirs(OUT_DIR, exist_ok=True)
 
-# ─── 2) Fonction pour récupérer un CSV selon son nom exact ───────────────────────
-def load_and_std_exact(name, mapping):
-    path = os.path.join(CSV_FOLDER, name)
-    if not os.path.isfile(path):
-        raise FileNotFoundError(f"Fichier introuvable : {path}")
-    df = pd.read_csv(path)
-    return df.rename(columns=mapping)[["TestName"] + list(mapping.values())]
-
-# ─── 3) Chargement de chaque benchmark CSV ──────────────────────────────────────
-df_near   = load_and_std_exact("benchmark_near.csv",   {"GasRatio(%)":"NEAR_CostRatio","TxLatency(ms)":"NEAR_Latency"})
-df_solana = load_and_std_exact("benchmark_solana.csv", {"CUratioToRef":"SOL_CostRatio","LatencyTxMs":"SOL_Latency"})
-df_eth    = load_and_std_exact("benchmark_eth.csv",    {"GasRatioToRef":"ETH_CostRatio","TxLatency":"ETH_Latency"})
-df_avax   = load_and_std_exact("benchmark_avax.csv",   {"GasRatioToRef":"AVAX_CostRatio","TxLatency":"AVAX_Latency"})
-df_moon   = load_and_std_exact("benchmark_moon.csv",   {"GasRatioToRef":"MOON_CostRatio","TxLatency":"MOON_Latency"})
+# ─── 2) Fichier de chaque réseau (nom exact) ─────────────────────────────────────
+FILES = {
+    "NEAR": "benchmark_near.csv",
+    "SOL":  "benchmark_solana.csv",
+    "ETH":  "benchmark_eth.csv",
+    "AVAX": "benchmark_avax.csv",
+    "MOON": "benchmark_moon.csv",
+}
+NETS = list(FILES)
+
+# ─── 3) Chargement : coûts rapportés à la référence de chaque run ───────────────
+prof.stage('load')
+tidy = normalisation.compare({net: os.path.join(CSV_FOLDER, f) for net, f in FILES.items()})
 
 # ─── 4) Fusion de tous les résultats ────────────────────────────────────────────
-df = df_near.merge(df_solana, on="TestName", how="outer") \
-            .merge(df_eth,    on="TestName", how="outer") \
-            .merge(df_avax,   on="TestName", how="outer") \
-            .merge(df_moon,   on="TestName", how="outer")
+prof.stage('aggregate')
+df = normalisation.wide(tidy, {"GasRatio": "CostRatio", "Latency": "Latency", "LatencyVsBest": "Latency_Norm"}, NETS)
 
-# ─── 5) Normalisation des latences ──────────────────────────────────────────────
-LAT = ["NEAR_Latency","SOL_Latency","ETH_Latency","AVAX_Latency","MOON_Latency"]
-df["min_latency"] = df[LAT].min(axis=1)
-for c in LAT:
-    df[f"{c}_Norm"] = df[c] / df["min_latency"]
+# ─── 5) Latences normalisées (× meilleur réseau, calculées par normalisation) ───
+LAT = [f"{net}_Latency" for net in NETS]
 
 # ─── 6) Variables pour tracés ──────────────────────────────────────────────────
 x = range(len(df))
 w = 0.15
 
 # ─── 7) Barres groupées – Cost Ratios ──────────────────────────────────────────
+prof.stage('render')
 plt.figure(figsize=(12,6))
 for i,key in enumerate(["NEAR_CostRatio","SOL_CostRatio","ETH_CostRatio","AVAX_CostRatio","MOON_CostRatio"]):
     plt.bar([xi + i*w for xi in x], df[key], w, label=key.split("_")[0])
@@ -53,7 +54,7 @@ plt.ylabel("Cost Ratio")
 plt.title("Comparaison des Cost Ratios")
 plt.legend()
 plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR,"cost_ratios.png"))
+prof.savefig(os.path.join(OUT_DIR,"cost_ratios.png"))
 
 # ─── 8) Barres groupées – Latences Normalisées ──────────────────────────────────
 plt.figure(figsize=(12,6))
@@ -64,7 +65,7 @@ plt.ylabel("Latency ×")
 plt.title("Comparaison des Latences Normalisées")
 plt.legend()
 plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR,"latency_normalized.png"))
+prof.savefig(os.path.join(OUT_DIR,"latency_normalized.png"))
 
 # ─── 9) Scatter – Coût vs Latence ──────────────────────────────────────────────
 plt.figure(figsize=(8,6))
@@ -75,28 +76,17 @@ plt.ylabel("Latency ×")
 plt.title("Coût vs Latence")
 plt.legend()
 plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR,"cost_vs_latency.png"))
+prof.savefig(os.path.join(OUT_DIR,"cost_vs_latency.png"))
 
 # ─── 🔟 Heatmap – Cost Ratios ─────────────────────────────────────────────────
-plt.figure(figsize=(8,6))
+# Lignes ordonnées (--order), pages PNG + index HTML au-delà de 60 tests
 cost_mat = df[["NEAR_CostRatio","SOL_CostRatio","ETH_CostRatio","AVAX_CostRatio","MOON_CostRatio"]].to_numpy()
-plt.imshow(cost_mat, aspect='auto')
-plt.yticks(range(len(df)), df["TestName"])
-plt.xticks(range(5), ["NEAR","SOL","ETH","AVAX","MOON"])
-plt.colorbar(label="Cost Ratio")
-plt.title("Heatmap Cost Ratios")
-plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR,"cost_heatmap.png"))
+heatmaps.render(cost_mat, df["TestName"], ["NEAR","SOL","ETH","AVAX","MOON"], OUT_DIR, "cost_heatmap",
+                "Heatmap Cost Ratios", "Cost Ratio", order=ORDER, savefig=prof.savefig)
 
 # ─── ⓫ Heatmap – Latences Normalisées ─────────────────────────────────────────
-plt.figure(figsize=(8,6))
 lat_mat = df[[f"{c}_Norm" for c in LAT]].to_numpy()
-plt.imshow(lat_mat, aspect='auto')
-plt.yticks(range(len(df)), df["TestName"])
-plt.xticks(range(5), ["NEAR","SOL","ETH","AVAX","MOON"])
-plt.colorbar(label="Latency ×")
-plt.title("Heatmap Latencies Normalized")
-plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR,"latency_heatmap.png"))
+heatmaps.render(lat_mat, df["TestName"], ["NEAR","SOL","ETH","AVAX","MOON"], OUT_DIR, "latency_heatmap",
+                "Heatmap Latencies Normalized", "Latency ×", order=ORDER, savefig=prof.savefig)
 
 print(f"✅ Graphiques générés dans : {OUT_DIR}")
@@ -2,32 +2,33 @@
 # -*- coding: utf-8 -*-
 
 import os
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.colors import LogNorm
 
+import heatmaps
+import normalisation
+import profiling
+
+prof = profiling.setup(__file__)
+# --order cluster|function|none: heatmap row ordering
+ORDER = heatmaps.order_from_argv()
+
 # ─── 1) Paths ─────────────────────────────────────────────────────────────────
 CSV_FOLDER = r"C:\Users\yaya\Desktop\Benchmarks\Results\Gascomparator"
 OUT_DIR    = os.path.join(CSV_FOLDER, "Graphs", "Separated")
 os.makedirs(OUT_DIR, exist_ok=True)
 
-# ─── 2) Standardized Loading ──────────────────────────────────────────────────
-def load_std(fname, mapping):
-    df = pd.read_csv(os.path.join(CSV_FOLDER, fname))
-    return df.rename(columns=mapping)[["TestName"] + list(mapping.values())]
-
-df = (load_std("benchmark_near.csv",   {"GasRatio(%)":"NEAR_Cost","TxLatency(ms)":"NEAR_Lat"})
-      .merge(load_std("benchmark_solana.csv", {"CUratioToRef":"SOL_Cost","LatencyTxMs":"SOL_Lat"}), on="TestName", how="outer")
-      .merge(load_std("benchmark_eth.csv",    {"GasRatioToRef":"ETH_Cost","TxLatency":"ETH_Lat"}),    on="TestName", how="outer")
-      .merge(load_std("benchmark_avax.csv",   {"GasRatioToRef":"AVAX_Cost","TxLatency":"AVAX_Lat"}),   on="TestName", how="outer")
-      .merge(load_std("benchmark_moon.csv",   {"GasRatioToRef":"MOON_Cost","TxLatency":"MOON_Lat"}),   on="TestName", how="outer"))
+# ─── 2) Normalized Loading (ratio to each run's reference gas) ────────────────
+prof.stage('load')
+FILES = {"NEAR": "benchmark_near.csv", "SOL": "benchmark_solana.csv", "ETH": "benchmark_eth.csv",
+         "AVAX": "benchmark_avax.csv", "MOON": "benchmark_moon.csv"}
+tidy = normalisation.compare({net: os.path.join(CSV_FOLDER, f) for net, f in FILES.items()})
 
-# ─── 3) Latency Normalization ─────────────────────────────────────────────────
+# ─── 3) Latency Normalization (× best network) ───────────────────────────────
+prof.stage('aggregate')
+df = normalisation.wide(tidy, {"GasRatio": "Cost", "Latency": "Lat", "LatencyVsBest": "Lat_Norm"}, list(FILES))
 lat_cols = ["NEAR_Lat","SOL_Lat","ETH_Lat","AVAX_Lat","MOON_Lat"]
-df["minLat"] = df[lat_cols].min(axis=1)
-for c in lat_cols:
-    df[c + "_Norm"] = df[c] / df["minLat"]
 
 # ─── 4) Variable Preparation ──────────────────────────────────────────────────
 cost_cols  = ["NEAR_Cost","SOL_Cost","ETH_Cost","AVAX_Cost","MOON_Cost"]
@@ -41,6 +42,7 @@ ticks = np.arange(0, n, step)
 labels = df["TestName"].iloc[::step]
 
 # ─── 5) Graph 1: Grouped Bars – Cost Ratios (log) ─────────────────────────────
+prof.stage('render')
 fig, ax = plt.subplots(figsize=(10,5))
 x = np.arange(n)
 w = 0.15
@@ -53,7 +55,7 @@ ax.set_xticks(ticks + 2*w)
 ax.set_xticklabels(labels, rotation=45, fontsize=8)
 ax.legend(title="Networks", loc="upper left", bbox_to_anchor=(1,1))
 plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR, "cost_ratios_separate.png"), dpi=150)
+prof.savefig(os.path.join(OUT_DIR, "cost_ratios_separate.png"), dpi=150)
 plt.close(fig)
 
 # ─── 6) Graph 2: Grouped Bars – Normalized Latencies ─────────────────────────
@@ -66,7 +68,7 @@ ax.set_xticks(ticks + 2*w)
 ax.set_xticklabels(labels, rotation=45, fontsize=8)
 ax.legend(title="Networks", loc="upper left", bbox_to_anchor=(1,1))
 plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR, "latency_normalized_separate.png"), dpi=150)
+prof.savefig(os.path.join(OUT_DIR, "latency_normalized_separate.png"), dpi=150)
 plt.close(fig)
 
 # ─── 7) Graph 3: Scatter – Cost vs Normalized Latency ────────────────────────
@@ -80,24 +82,14 @@ ax.set_xlabel("Cost Ratio (log)")
 ax.set_ylabel("Latency ×")
 ax.legend(title="Networks", bbox_to_anchor=(1,1), loc="upper left")
 plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR, "cost_vs_latency_separate.png"), dpi=150)
+prof.savefig(os.path.join(OUT_DIR, "cost_vs_latency_separate.png"), dpi=150)
 plt.close(fig)
 
 # ─── 8) Graph 4: Heatmap – Cost Ratios (log) ─────────────────────────────────
-fig, ax = plt.subplots(figsize=(6,8))
 mat = df[cost_cols].to_numpy()
 pos = mat[mat>0]
 norm = LogNorm(vmin=pos.min() if pos.size else None, vmax=np.nanmax(mat))
-im = ax.imshow(mat, aspect="auto", norm=norm)
-ax.set_title("Heatmap of Cost Ratios")
-ax.set_yticks(ticks)
-ax.set_yticklabels(labels, fontsize=8)
-ax.set_xticks(np.arange(len(names)))
-ax.set_xticklabels(names, rotation=45, fontsize=9)
-cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
-cbar.set_label("Ratio (log)")
-plt.tight_layout()
-plt.savefig(os.path.join(OUT_DIR, "heatmap_cost_separate.png"), dpi=150)
-plt.close(fig)
+heatmaps.render(mat, df["TestName"], names, OUT_DIR, "heatmap_cost_separate", "Heatmap of Cost Ratios", "Ratio (log)",
+                norm=norm, order=ORDER, savefig=prof.savefig)
 
 print("✅ All separate graphs with legend saved in:", OUT_DIR)
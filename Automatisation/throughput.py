@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+import argparse
+import base64
+import collections
+import hashlib
+import http.client
+import itertools
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Débit soutenu en écriture (TPS) : des transactions signées sont envoyées en
+# pipeline sur le setter setValue de StorageBenchmark, avec --window transactions en
+# vol à la fois. Les nonces sont tenus localement (un appel RPC au départ, resynchronisé
+# après un rejet), sinon chaque envoi attendrait la confirmation du précédent.
+#
+# Balayage des fenêtres 1, 2, 4... : pour chacune, TPS confirmé, latence envoi ->
+# inclusion (p50/p95) et point de saturation (fenêtre au-delà de laquelle le débit ne
+# progresse plus que de SATURATION_GAIN alors que la latence monte).
+#
+# Inclusion : un seul thread suit les nouveaux blocs et résout les transactions en vol,
+# au lieu d'un sondage de reçu par transaction.
+#
+#   EVM  : eth_sendTransaction (compte déverrouillé du nœud : anvil, hardhat, geth --dev)
+#          ou eth_sendRawTransaction signé localement si eth_account est installé (--key)
+#   NEAR : broadcast_tx_async, transaction borsh signée en ed25519 (PyNaCl requis)
+#
+#   python throughput.py mock --port 8545 [--block-time 1 --block-capacity 20]
+#   python throughput.py evm --rpc http://127.0.0.1:8545 --contract 0x... [--windows 1,2,4,8,16]
+#   python throughput.py near --rpc http://127.0.0.1:3030 --contract bench.test.near --account a.test.near --key ed25519:...
+
+try:
+    from eth_account import Account as EthAccount
+except ImportError:
+    EthAccount = None
+
+try:
+    import nacl.signing
+except ImportError:
+    nacl = None
+
+RESULTS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../Results'))
+GRAPH_DIR = os.path.join(RESULTS_ROOT, "Graph", "Throughput")
+
+SET_VALUE_SELECTOR = "0x55241077"  # keccak256("setValue(uint256)")[:4]
+WINDOWS = (1, 2, 4, 8, 16, 32)
+DURATION_S = 20.0
+POLL_S = 0.2
+CONFIRM_TIMEOUT_S = 120.0
+# gain de débit relatif sous lequel une fenêtre plus large ne sert plus à rien
+SATURATION_GAIN = 0.05
+EVM_GAS = 100_000
+NEAR_GAS = 30_000_000_000_000  # 30 TGas
+SEEN_BLOCKS = 256
+# les balayages sont rangés sous leur propre chaîne (comme BenchmarkNear-sandbox) : une
+# latence sous charge ne doit pas passer pour le dernier run du réseau (summary,
+# scheduler, queryservice, détecteur de ruptures)
+STORE_SUFFIX = "-throughput"
+
+
+class RpcError(Exception):
+    def __init__(self, error):
+        self.error = error if isinstance(error, dict) else {"message": str(error)}
+        super().__init__(json.dumps(self.error))
+
+
+class Rpc:
+    # JSON-RPC 2.0 sur HTTP, une connexion keep-alive par thread
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url)
+        self.https = parts.scheme == "https"
+        self.netloc = parts.netloc
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.netloc, timeout=self.timeout)
+        return conn
+
+    def call(self, method, params):
+        body = json.dumps({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params})
+        for attempt in range(2):
+            conn = self._conn()
+            try:
+                conn.request("POST", self.path, body, {"Content-Type": "application/json"})
+                reply = json.loads(conn.getresponse().read())
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # connexion keep-alive fermée par le serveur : une seule reprise
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if reply.get("error"):
+            raise RpcError(reply["error"])
+        return reply.get("result")
+
+
+# --- EVM -----------------------------------------------------------------------------
+
+class EvmTarget:
+    def __init__(self, rpc, contract, private_key=None, sender=None, gas=EVM_GAS):
+        self.rpc = rpc
+        self.contract = contract
+        self.gas = gas
+        self.account = None
+        if private_key:
+            if EthAccount is None:
+                raise RuntimeError("--key demande le module eth_account (pip install eth-account)")
+            self.account = EthAccount.from_key(private_key)
+            sender = self.account.address
+        self.sender = sender or rpc.call("eth_accounts", [])[0]
+        self.chain_id = int(rpc.call("eth_chainId", []), 16)
+        self.gas_price = int(rpc.call("eth_gasPrice", []), 16)
+        self._lock = threading.Lock()
+        self.resync()
+
+    def resync(self):
+        # nonce "pending" : transactions déjà dans le mempool comprises
+        with self._lock:
+            self.nonce = int(self.rpc.call("eth_getTransactionCount", [self.sender, "pending"]), 16)
+
+    def _next_nonce(self):
+        with self._lock:
+            nonce = self.nonce
+            self.nonce += 1
+            return nonce
+
+    def send(self, value):
+        # -> hash de la transaction (minuscules)
+        tx = {"from": self.sender, "to": self.contract, "nonce": self._next_nonce(), "gas": self.gas,
+              "gasPrice": self.gas_price, "data": SET_VALUE_SELECTOR + f"{value:064x}"}
+        try:
+            if self.account is not None:
+                tx.pop("from")
+                signed = self.account.sign_transaction(dict(tx, chainId=self.chain_id))
+                raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+                return self.rpc.call("eth_sendRawTransaction", ["0x" + bytes(raw).hex()]).lower()
+            tx = {k: (hex(v) if isinstance(v, int) else v) for k, v in tx.items()}
+            return self.rpc.call("eth_sendTransaction", [tx]).lower()
+        except RpcError:
+            # nonce refusé ou trou de nonce : repartir de l'état du nœud
+            self.resync()
+            raise
+
+    def head(self):
+        return int(self.rpc.call("eth_blockNumber", []), 16)
+
+    def tx_hashes(self, height):
+        block = self.rpc.call("eth_getBlockByNumber", [hex(height), False])
+        return {h.lower() for h in (block or {}).get("transactions", ())}
+
+
+# --- NEAR ----------------------------------------------------------------------------
+
+_B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58encode(data):
+    n = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, r = divmod(n, 58)
+        out = _B58[r] + out
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + out
+
+
+def b58decode(text):
+    n = 0
+    for c in text:
+        n = n * 58 + _B58.index(c)
+    body = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    return b"\0" * (len(text) - len(text.lstrip("1"))) + body
+
+
+def _borsh_str(s):
+    data = s.encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def near_function_call(signer_id, public_key, nonce, receiver_id, block_hash, method, args, gas, deposit=0):
+    # Transaction borsh à une action FunctionCall (enum Action, indice 2)
+    args_bytes = json.dumps(args, separators=(",", ":")).encode("utf-8")
+    action = (b"\x02" + _borsh_str(method) + struct.pack("<I", len(args_bytes)) + args_bytes
+              + struct.pack("<Q", gas) + deposit.to_bytes(16, "little"))
+    return (_borsh_str(signer_id) + b"\x00" + public_key + struct.pack("<Q", nonce) + _borsh_str(receiver_id)
+            + block_hash + struct.pack("<I", 1) + action)
+
+
+class NearTarget:
+    # signer : objet avec sign(bytes) -> signature 64 octets et verify_key (clé publique 32 octets)
+    BLOCK_HASH_TTL_S = 60.0
+
+    def __init__(self, rpc, contract, account_id, secret_key=None, signer=None, method="setValue", gas=NEAR_GAS):
+        if signer is None:
+            if nacl is None:
+                raise RuntimeError("la signature NEAR demande le module PyNaCl (pip install pynacl)")
+            seed = b58decode(secret_key.split(":", 1)[-1])[:32]
+            signer = nacl.signing.SigningKey(seed)
+        self.rpc = rpc
+        self.contract = contract
+        self.account_id = account_id
+        self.method = method
+        self.gas = gas
+        self.signer = signer
+        self.public_key = bytes(signer.verify_key)
+        self._lock = threading.Lock()
+        self._block = (None, 0.0)
+        self.resync()
+
+    def resync(self):
+        key = self.rpc.call("query", {"request_type": "view_access_key", "finality": "final",
+                                      "account_id": self.account_id,
+                                      "public_key": "ed25519:" + b58encode(self.public_key)})
+        with self._lock:
+            self.nonce = key["nonce"] + 1
+
+    def _block_hash(self):
+        # une transaction doit référencer un bloc récent ; rafraîchi toutes les BLOCK_HASH_TTL_S
+        block_hash, at = self._block
+        if block_hash is None or time.monotonic() - at > self.BLOCK_HASH_TTL_S:
+            block_hash = b58decode(self.rpc.call("block", {"finality": "final"})["header"]["hash"])
+            self._block = (block_hash, time.monotonic())
+        return block_hash
+
+    def send(self, value):
+        with self._lock:
+            nonce = self.nonce
+            self.nonce += 1
+        tx = near_function_call(self.account_id, self.public_key, nonce, self.contract, self._block_hash(),
+                                self.method, {"value": value}, self.gas)
+        signature = self.signer.sign(hashlib.sha256(tx).digest())
+        signature = getattr(signature, "signature", signature)
+        signed = tx + b"\x00" + bytes(signature)
+        try:
+            self.rpc.call("broadcast_tx_async", [base64.b64encode(signed).decode("ascii")])
+        except RpcError:
+            self.resync()
+            raise
+        return b58encode(hashlib.sha256(tx).digest())
+
+    def head(self):
+        return self.rpc.call("block", {"finality": "optimistic"})["header"]["height"]
+
+    def tx_hashes(self, height):
+        try:
+            block = self.rpc.call("block", {"block_id": height})
+        except RpcError:
+            # hauteur sautée (pas de bloc produit à cette hauteur)
+            return set()
+        hashes = set()
+        for chunk in block["chunks"]:
+            if chunk.get("height_included") == height:
+                hashes.update(t["hash"] for t in self.rpc.call("chunk", {"chunk_id": chunk["chunk_hash"]})["transactions"])
+        return hashes
+
+
+# --- Suivi des inclusions ------------------------------------------------------------
+
+class InclusionTracker:
+    # Un thread lit chaque nouveau bloc et réveille les transactions qui y figurent
+    def __init__(self, target, poll=POLL_S):
+        self.target = target
+        self.poll = poll
+        self.height = target.head()
+        self.waiting = {}
+        self.seen = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.thread.join(timeout=5)
+
+    def watch(self, tx_hash):
+        # -> Event levé à l'inclusion ; une transaction déjà vue (bloc lu avant l'appel) est résolue tout de suite
+        event = threading.Event()
+        with self._lock:
+            if tx_hash in self.seen:
+                event.included_at = self.seen[tx_hash]
+                event.set()
+            else:
+                self.waiting[tx_hash] = event
+        return event
+
+    def forget(self, tx_hash):
+        with self._lock:
+            self.waiting.pop(tx_hash, None)
+
+    def _loop(self):
+        while not self._stop.wait(self.poll):
+            try:
+                head = self.target.head()
+                for height in range(self.height + 1, head + 1):
+                    hashes = self.target.tx_hashes(height)
+                    now = time.monotonic()
+                    with self._lock:
+                        for h in hashes:
+                            self.seen[h] = now
+                            event = self.waiting.pop(h, None)
+                            if event is not None:
+                                event.included_at = now
+                                event.set()
+                        while len(self.seen) > SEEN_BLOCKS * 1000:
+                            self.seen.popitem(last=False)
+                    self.height = height
+            except (RpcError, OSError, http.client.HTTPException) as e:
+                print(f"⚠️ suivi des blocs : {e}")
+
+
+# --- Balayage ------------------------------------------------------------------------
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def run_window(target, tracker, window, duration=DURATION_S, confirm_timeout=CONFIRM_TIMEOUT_S):
+    # window émetteurs en boucle fermée (envoi, attente d'inclusion, envoi suivant) pendant duration s
+    latencies = []
+    included = []
+    counts = collections.Counter()
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + duration
+
+    def sender(slot):
+        while time.monotonic() < deadline:
+            sent_at = time.monotonic()
+            try:
+                tx_hash = target.send(random.randrange(1, 2 ** 31))
+            except (RpcError, OSError, http.client.HTTPException) as e:
+                with lock:
+                    counts["errors"] += 1
+                    if counts["errors"] <= 3:
+                        print(f"⚠️ fenêtre {window} : envoi refusé ({e})")
+                time.sleep(POLL_S)
+                continue
+            event = tracker.watch(tx_hash)
+            with lock:
+                counts["sent"] += 1
+            if event.wait(confirm_timeout):
+                with lock:
+                    counts["confirmed"] += 1
+                    latencies.append((event.included_at - sent_at) * 1000)
+                    included.append(event.included_at)
+            else:
+                tracker.forget(tx_hash)
+                with lock:
+                    counts["timeouts"] += 1
+
+    threads = [threading.Thread(target=sender, args=(i,), daemon=True) for i in range(window)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # débit soutenu : inclusions pendant la fenêtre de mesure, sans la vidange des transactions en vol à la fin
+    return {"window": window, "sent": counts["sent"], "confirmed": counts["confirmed"], "errors": counts["errors"],
+            "timeouts": counts["timeouts"], "drain_s": round(max(included, default=deadline) - deadline, 2),
+            "tps": round(sum(1 for t in included if t <= deadline) / duration, 2),
+            "p50_ms": _round(percentile(latencies, 50)), "p95_ms": _round(percentile(latencies, 95)),
+            "max_ms": _round(max(latencies) if latencies else None)}
+
+
+def _round(x):
+    return None if x is None else round(x, 1)
+
+
+def saturation(points, gain=SATURATION_GAIN):
+    # première fenêtre dont le doublement ne rapporte plus que gain de débit -> point, ou None
+    points = sorted(points, key=lambda p: p["window"])
+    for p, nxt in zip(points, points[1:]):
+        if nxt["tps"] < p["tps"] * (1 + gain):
+            return p
+    return None
+
+
+def sweep(target, windows=WINDOWS, duration=DURATION_S, poll=POLL_S, confirm_timeout=CONFIRM_TIMEOUT_S, log=print):
+    tracker = InclusionTracker(target, poll).start()
+    points = []
+    try:
+        for window in windows:
+            point = run_window(target, tracker, window, duration, confirm_timeout)
+            points.append(point)
+            log(f"fenêtre {window:>4} : {point['tps']:>8.2f} tx/s, p50 {point['p50_ms']} ms, p95 {point['p95_ms']} ms"
+                  f" ({point['confirmed']}/{point['sent']} confirmées, {point['errors']} erreurs)")
+            prev = points[-2] if len(points) > 1 else None
+            if prev and saturation([prev, point]) and point["p50_ms"] and prev["p50_ms"] \
+                    and point["p50_ms"] > 2 * prev["p50_ms"]:
+                # au-delà de la saturation, élargir la fenêtre ne fait qu'allonger la file
+                log("débit saturé, latence doublée : arrêt du balayage")
+                break
+    finally:
+        tracker.stop()
+    return points
+
+
+def record(store_path, chain, points, runner):
+    # un run du store (chaîne <réseau>-throughput, source "throughput"), une ligne par
+    # fenêtre : latency_ms = p50, le reste dans extra_json
+    import rowstream
+    from ingest import provenance
+    from resultstore import ResultStore
+
+    store_chain = chain + STORE_SUFFIX
+    store = ResultStore(store_path)
+    try:
+        run_id = rowstream.new_run_id(store_chain)
+        store.start_run(run_id, store_chain, provenance=provenance(chain, runner, source="throughput"))
+        store.append_rows(run_id, store_chain, [dict(p, test=f"throughput_setValue(w={p['window']})",
+                                               latency_ms=p["p50_ms"], result="Throughput") for p in points])
+        store.finish_run(run_id, "ok", 0)
+    finally:
+        store.close()
+    return run_id
+
+
+def plot(chain, points, out_dir=GRAPH_DIR):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    sat = saturation(points)
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4.5), dpi=120)
+    windows = [p["window"] for p in points]
+    ax1.plot(windows, [p["tps"] for p in points], marker="o")
+    ax1.set_xscale("log", base=2)
+    ax1.set_xlabel("transactions en vol (fenêtre)")
+    ax1.set_ylabel("TPS confirmé")
+    ax1.set_title(f"{chain} – débit soutenu")
+    ok = [p for p in points if p["p50_ms"] is not None]
+    ax2.plot([p["tps"] for p in ok], [p["p50_ms"] for p in ok], marker="o", label="p50")
+    ax2.plot([p["tps"] for p in ok], [p["p95_ms"] for p in ok], marker=".", linestyle="--", label="p95")
+    for p in ok:
+        ax2.annotate(f"w={p['window']}", (p["tps"], p["p50_ms"]), fontsize=7, xytext=(3, 3), textcoords="offset points")
+    ax2.set_xlabel("TPS confirmé")
+    ax2.set_ylabel("latence envoi -> inclusion (ms)")
+    ax2.set_title("Latence sous charge")
+    if sat:
+        ax1.axvline(sat["window"], color="red", linestyle="--", alpha=0.7, label=f"saturation (w={sat['window']})")
+        ax2.axvline(sat["tps"], color="red", linestyle="--", alpha=0.7)
+        ax1.legend(fontsize=8)
+    ax2.legend(fontsize=8)
+    for ax in (ax1, ax2):
+        ax.grid(True, linestyle="--", alpha=0.5)
+    fig.tight_layout()
+    os.makedirs(out_dir, exist_ok=True)
+    out = os.path.join(out_dir, f"{chain}_throughput.png")
+    fig.savefig(out)
+    plt.close(fig)
+    return out
+
+
+# --- RPC simulé ----------------------------------------------------------------------
+
+class MockChain:
+    # Nœud minimal pour les essais hors ligne : un bloc toutes les block_time s, au plus
+    # capacity transactions par bloc, nonces EVM exigés dans l'ordre (trou = file d'attente)
+    def __init__(self, block_time=1.0, capacity=20, chain_id=31337):
+        self.block_time = block_time
+        self.capacity = capacity
+        self.chain_id = chain_id
+        self.accounts = ["0x" + hashlib.sha256(b"mock-sender").hexdigest()[:40]]
+        self.blocks = [[]]
+        self.nonces = collections.defaultdict(int)
+        self.pool = collections.defaultdict(dict)  # sender -> {nonce: hash}
+        self.ready = collections.deque()
+        self.near_nonces = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._mine, daemon=True).start()
+        return self
+
+    def _mine(self):
+        while True:
+            time.sleep(self.block_time)
+            with self._lock:
+                n = min(self.capacity, len(self.ready))
+                self.blocks.append([self.ready.popleft() for _ in range(n)])
+
+    def _promote(self, sender):
+        # déplace vers la file exécutable les transactions dont le nonce suit le dernier admis
+        pool = self.pool[sender]
+        while self.nonces[sender] in pool:
+            self.ready.append(pool.pop(self.nonces[sender]))
+            self.nonces[sender] += 1
+
+    def _evm_submit(self, sender, nonce, payload):
+        tx_hash = "0x" + hashlib.sha256(f"{sender}:{nonce}:{payload}".encode()).hexdigest()
+        with self._lock:
+            if nonce < self.nonces[sender] or nonce in self.pool[sender]:
+                raise RpcError({"code": -32000, "message": "nonce too low"})
+            self.pool[sender][nonce] = tx_hash
+            self._promote(sender)
+        return tx_hash
+
+    def _block(self, height):
+        return {"header": {"height": height, "hash": b58encode(hashlib.sha256(str(height).encode()).digest())},
+                "chunks": [{"chunk_hash": f"chunk-{height}", "height_included": height}]}
+
+    def handle(self, method, params):
+        with self._lock:
+            height = len(self.blocks) - 1
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "eth_accounts":
+            return self.accounts
+        if method == "eth_gasPrice":
+            return hex(1_000_000_000)
+        if method == "eth_blockNumber":
+            return hex(height)
+        if method == "eth_getTransactionCount":
+            with self._lock:
+                sender = params[0].lower()
+                return hex(self.nonces[sender] + (len(self.pool[sender]) if params[1] == "pending" else 0))
+        if method == "eth_sendTransaction":
+            tx = params[0]
+            return self._evm_submit(tx["from"].lower(), int(tx["nonce"], 16), tx.get("data"))
+        if method == "eth_sendRawTransaction":
+            # pas de décodage RLP : la transaction est incluse telle quelle
+            tx_hash = "0x" + hashlib.sha256(params[0].encode()).hexdigest()
+            with self._lock:
+                self.ready.append(tx_hash)
+            return tx_hash
+        if method == "eth_getBlockByNumber":
+            n = int(params[0], 16)
+            if n > height:
+                return None
+            return {"number": hex(n), "transactions": list(self.blocks[n])}
+        if method == "query" and params.get("request_type") == "view_access_key":
+            return {"nonce": self.near_nonces[params["public_key"]], "permission": "FullAccess"}
+        if method == "block":
+            n = params.get("block_id", height)
+            if n > height:
+                raise RpcError({"name": "HANDLER_ERROR", "cause": {"name": "UNKNOWN_BLOCK"}})
+            return self._block(n)
+        if method == "chunk":
+            n = int(params["chunk_id"].split("-")[1])
+            return {"transactions": [{"hash": h} for h in self.blocks[n]]}
+        if method == "broadcast_tx_async":
+            signed = base64.b64decode(params[0])
+            # transaction borsh suivie de la signature (1 + 64 octets)
+            tx_hash = b58encode(hashlib.sha256(signed[:-65]).digest())
+            with self._lock:
+                self.ready.append(tx_hash)
+            return tx_hash
+        raise RpcError({"code": -32601, "message": f"méthode inconnue : {method}"})
+
+
+def make_mock_server(chain, host="127.0.0.1", port=8545):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, comme un vrai nœud
+        # en-têtes et corps partent en deux écritures : sans ça, Nagle + ACK retardé = 40 ms par appel
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            reply = {"jsonrpc": "2.0", "id": request.get("id")}
+            try:
+                reply["result"] = chain.handle(request["method"], request.get("params"))
+            except RpcError as e:
+                reply["error"] = e.error
+            body = json.dumps(reply).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Débit soutenu en écriture (TPS) avec transactions en pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("mock", help="nœud JSON-RPC simulé (EVM et NEAR) pour les essais hors ligne")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8545)
+    p.add_argument("--block-time", type=float, default=1.0)
+    p.add_argument("--block-capacity", type=int, default=20, help="transactions par bloc")
+
+    for name in ("evm", "near"):
+        p = sub.add_parser(name, help=f"balayage des fenêtres sur un nœud {name.upper()}")
+        p.add_argument("--rpc", required=True)
+        p.add_argument("--contract", required=True, help="adresse (EVM) ou compte (NEAR) de StorageBenchmark")
+        p.add_argument("--chain", help="réseau (défaut : BenchmarkEthereum / BenchmarkNear) ; stocké sous <réseau>-throughput")
+        p.add_argument("--windows", default=",".join(map(str, WINDOWS)), help="transactions en vol, ex. 1,2,4,8")
+        p.add_argument("--duration", type=float, default=DURATION_S, help="durée par fenêtre (s)")
+        p.add_argument("--poll", type=float, default=POLL_S, help="période de lecture des blocs (s)")
+        p.add_argument("--store", default=None, help="enregistre le balayage dans le store")
+        p.add_argument("--no-store", action="store_true")
+        p.add_argument("--plot", action="store_true")
+        p.add_argument("--json", action="store_true")
+        if name == "evm":
+            p.add_argument("--key", default=os.environ.get("BENCH_EVM_KEY"),
+                           help="clé privée (signature locale, eth_account) ; sinon compte déverrouillé du nœud")
+            p.add_argument("--sender", help="compte déverrouillé (défaut : eth_accounts[0])")
+        else:
+            p.add_argument("--account", required=True, help="compte signataire")
+            p.add_argument("--key", default=os.environ.get("BENCH_NEAR_KEY"), help="clé ed25519:... du compte")
+    args = parser.parse_args(argv)
+
+    if args.command == "mock":
+        server = make_mock_server(MockChain(args.block_time, args.block_capacity).start(), args.host, args.port)
+        print(f"🧪 RPC simulé sur http://{args.host}:{args.port} ({args.block_capacity} tx / {args.block_time}s"
+              f" = {args.block_capacity / args.block_time:.1f} TPS max)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    rpc = Rpc(args.rpc)
+    try:
+        if args.command == "evm":
+            target = EvmTarget(rpc, args.contract, args.key, args.sender)
+            chain = args.chain or "BenchmarkEthereum"
+        else:
+            if not args.key:
+                parser.error("near : --key (ou BENCH_NEAR_KEY) requis")
+            target = NearTarget(rpc, args.contract, args.account, args.key)
+            chain = args.chain or "BenchmarkNear"
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 2
+    windows = [int(w) for w in args.windows.split(",") if w]
+    # avec --json, stdout ne porte que le rapport
+    log = (lambda msg: print(msg, file=sys.stderr)) if args.json else print
+    points = sweep(target, windows, args.duration, args.poll, log=log)
+    sat = saturation(points)
+    best = max(points, key=lambda p: p["tps"])
+    report = {"chain": chain, "rpc": args.rpc, "points": points, "max_tps": best["tps"],
+              "saturation_window": sat["window"] if sat else None, "saturation_tps": sat["tps"] if sat else None}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"✅ {chain} : {best['tps']} tx/s au mieux (fenêtre {best['window']}), saturation "
+              + (f"à la fenêtre {sat['window']} ({sat['tps']} tx/s, p50 {sat['p50_ms']} ms)" if sat else "non atteinte"))
+    if not args.no_store:
+        from resultstore import DEFAULT_PATH
+
+        run_id = record(args.store or DEFAULT_PATH, chain, points, f"throughput.py {args.command}")
+        log(f"Run {run_id} enregistré")
+    if args.plot:
+        log(f"Saved throughput plot: {plot(chain, points)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
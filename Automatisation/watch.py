@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import select
+import sqlite3
+import struct
+import subprocess
+import sys
+import time
+
+import archive
+import bench
+
+# Mode démon : surveille Results/ et, après chaque rafale de nouveaux fichiers,
+#   1. ingère seulement les CSV nouveaux ou modifiés dans le store (dédoublonnés)
+#   2. relance seulement les scripts d'analyse dont les entrées ont changé
+#
+# Événements : inotify (Linux, via la libc, sans dépendance) sinon scrutation des
+# signatures (mtime, taille) toutes les --interval secondes (Windows, macOS, partages).
+# Anti-rebond : une rafale est traitée --debounce secondes après son dernier fichier
+# (au plus MAX_DELAY_S après le premier). Les runs streamés qui se terminent dans le
+# store relancent aussi les scripts qui lisent le store.
+#
+# Les loaders restent incrémentaux (cache de normalisation, hash par ligne du store) :
+# relancer un script ne relit que les runs nouveaux.
+#
+#   python watch.py [--root Results] [--debounce 2] [--poll] [-- --stats hampel]
+
+RESULTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'Results'))
+
+# (dossier relatif à la racine, motif du fichier) -> scripts bench.SCRIPTS à relancer
+EVM_SCRIPTS = ("evm", "evmv", "curves", "curves-hourly")
+RULES = (
+    ("GasComparator", "benchmark_*.csv", ("gas", "latency", "gas-vs-latency")),
+    ("EthSepolia", "*.csv", EVM_SCRIPTS),
+    ("AvaxFuji", "*.csv", EVM_SCRIPTS),
+    ("Moonbeam", "*.csv", EVM_SCRIPTS),
+)
+# scripts qui lisent les runs streamés du store
+STORE_SCRIPTS = ("curves",)
+
+DEBOUNCE_S = 2.0
+MAX_DELAY_S = 30.0
+POLL_S = 1.0
+SCRIPT_TIMEOUT_S = 600
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+_EVENT = struct.Struct("iIII")
+
+
+def scripts_for(root, path):
+    # scripts qui dépendent de path (chemin absolu), ou ()
+    rel = os.path.relpath(path, root)
+    folder, name = os.path.split(rel)
+    for rule_folder, pattern, scripts in RULES:
+        if os.path.normcase(folder) == os.path.normcase(rule_folder) and fnmatch.fnmatch(name, pattern) \
+                and name not in archive.SKIP_FILES:
+            return scripts
+    return ()
+
+
+class PollWatcher:
+    # signatures (mtime, taille) des fichiers surveillés, comparées à chaque appel
+    def __init__(self, root, interval=POLL_S):
+        self.root = root
+        self.interval = interval
+        self.state = self._scan()
+
+    def _scan(self):
+        state = {}
+        for folder, _, _ in RULES:
+            try:
+                entries = list(os.scandir(os.path.join(self.root, folder)))
+            except FileNotFoundError:
+                continue
+            for e in entries:
+                if e.is_file() and scripts_for(self.root, e.path):
+                    st = e.stat()
+                    state[e.path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def wait(self, timeout):
+        # -> chemins ajoutés, modifiés ou supprimés depuis l'appel précédent
+        time.sleep(min(timeout, self.interval) if timeout is not None else self.interval)
+        state = self._scan()
+        changed = {p for p in state.keys() | self.state.keys() if state.get(p) != self.state.get(p)}
+        self.state = state
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    # un watch par dossier de RULES, plus la racine pour les dossiers créés ensuite
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_CREATE
+
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs = {}
+        self._add(root)
+        for folder, _, _ in RULES:
+            self._add(os.path.join(root, folder))
+
+    def _add(self, path):
+        if not os.path.isdir(path) or path in self.dirs.values():
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd >= 0:
+            self.dirs[wd] = path
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], POLL_S if timeout is None else timeout)
+        if not ready:
+            return set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        i = 0
+        while i < len(buf):
+            wd, mask, _, size = _EVENT.unpack_from(buf, i)
+            name = buf[i + _EVENT.size:i + _EVENT.size + size].rstrip(b"\0").decode(errors="replace")
+            i += _EVENT.size + size
+            if wd not in self.dirs:
+                continue
+            path = os.path.join(self.dirs[wd], name)
+            if mask & IN_ISDIR:
+                # dossier de réseau créé après le démarrage
+                self._add(path)
+            elif mask & IN_CREATE:
+                # fichier encore en écriture : IN_CLOSE_WRITE suivra
+                continue
+            elif scripts_for(self.root, path):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(root, poll=False, interval=POLL_S):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"ℹ️ inotify indisponible ({e}) : scrutation")
+    return PollWatcher(root, interval)
+
+
+def batches(watcher, debounce=DEBOUNCE_S, max_delay=MAX_DELAY_S, tick=None):
+    # rafales de chemins changés ; sans rafale en cours, tick() -> True produit une rafale vide
+    pending = set()
+    first = last = None
+    while True:
+        timeout = None if not pending else max(0.0, min(last + debounce, first + max_delay) - time.monotonic())
+        changed = watcher.wait(timeout)
+        now = time.monotonic()
+        if changed:
+            if not pending:
+                first = now
+            pending |= changed
+            last = now
+            continue
+        if pending and now >= min(last + debounce, first + max_delay):
+            yield pending
+            pending = set()
+        elif not pending and tick is not None and tick():
+            yield set()
+
+
+def store_version(path):
+    # (nb de runs terminés, dernière fin) : change quand un run streamé se termine
+    if not os.path.exists(path):
+        return None
+    try:
+        with contextlib.closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as db:
+            return db.execute("SELECT COUNT(*), MAX(finished_at) FROM runs WHERE finished_at IS NOT NULL").fetchone()
+    except sqlite3.Error:
+        return None
+
+
+def ingest_paths(store, paths):
+    # -> lignes insérées ; les fichiers supprimés (archivés) sont ignorés
+    import ingest
+
+    total = 0
+    for path in sorted(paths):
+        if not os.path.isfile(path):
+            continue
+        try:
+            _, inserted, _ = ingest.ingest_file(store, path)
+        except (ValueError, OSError) as e:
+            print(f"⚠️ {path} : {e}")
+            continue
+        total += inserted
+    return total
+
+
+def rerender(scripts, script_args=(), timeout=SCRIPT_TIMEOUT_S):
+    # chaque script dans un interpréteur neuf (état matplotlib propre) -> [(nom, code, secondes)]
+    report = []
+    for name in scripts:
+        path = os.path.join(bench.HERE, bench.SCRIPTS[name])
+        start = time.monotonic()
+        try:
+            proc = subprocess.run([sys.executable, path] + list(script_args), cwd=os.path.dirname(path),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=timeout)
+            code = proc.returncode
+            if code != 0:
+                print(f"❌ {name} :\n" + "\n".join(proc.stderr.splitlines()[-5:]))
+        except subprocess.TimeoutExpired:
+            code = "timeout"
+        report.append((name, code, round(time.monotonic() - start, 2)))
+    return report
+
+
+def ordered(scripts):
+    # ordre de bench.SCRIPTS, sans doublon
+    return [s for s in bench.SCRIPTS if s in scripts]
+
+
+def run(root=RESULTS_DIR, store_path=None, debounce=DEBOUNCE_S, poll=False, interval=POLL_S,
+        do_ingest=True, script_args=(), log_path=None):
+    from resultstore import DEFAULT_PATH, ResultStore
+
+    store_path = store_path or DEFAULT_PATH
+    store = ResultStore(store_path) if do_ingest else None
+    watcher = make_watcher(root, poll, interval)
+    print(f"👀 Surveillance de {root} ({type(watcher).__name__}, anti-rebond {debounce}s)")
+    state = {"store": store_version(store_path), "store_changed": False}
+
+    def tick():
+        version = store_version(store_path)
+        if version != state["store"]:
+            state["store"] = version
+            state["store_changed"] = True
+        return state["store_changed"]
+
+    def process(paths):
+        start = time.monotonic()
+        scripts = set()
+        archived = {}
+        for p in paths:
+            folder = os.path.dirname(p)
+            if not os.path.exists(p):
+                # fichier déplacé dans un bundle par archive.py : mêmes données, rien à relancer
+                if folder not in archived:
+                    archived[folder] = archive.members(folder)
+                if os.path.basename(p) in archived[folder]:
+                    continue
+            scripts.update(scripts_for(root, p))
+        inserted = ingest_paths(store, paths) if store is not None else 0
+        if state["store_changed"] or inserted:
+            state["store_changed"] = False
+            state["store"] = store_version(store_path)
+            scripts.update(STORE_SCRIPTS)
+        report = rerender(ordered(scripts), script_args)
+        record = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "files": len(paths), "ingested_rows": inserted,
+                  "scripts": [{"script": n, "returncode": c, "s": s} for n, c, s in report],
+                  "total_s": round(time.monotonic() - start, 2)}
+        print(f"🔁 {len(paths)} fichiers, {inserted} lignes ingérées -> "
+              + (", ".join(f"{n} ({s}s{'' if c == 0 else f', code {c}'})" for n, c, s in report) or "rien à relancer"))
+        if log_path:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+    try:
+        # rafale vide : un run streamé s'est terminé dans le store sans nouveau fichier
+        for paths in batches(watcher, debounce, tick=tick):
+            process(paths)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if store is not None:
+            store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ré-analyse incrémentale à l'arrivée de nouveaux résultats")
+    parser.add_argument("--root", default=RESULTS_DIR, help="dossier Results lu par les scripts d'analyse")
+    parser.add_argument("--store", default=None)
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_S)
+    parser.add_argument("--poll", action="store_true", help="scrutation même si inotify est disponible")
+    parser.add_argument("--interval", type=float, default=POLL_S, help="période de scrutation (s)")
+    parser.add_argument("--no-ingest", action="store_true")
+    parser.add_argument("--log", help="journal JSON lines des cycles")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER, help="options transmises aux scripts (après --)")
+    args = parser.parse_args(argv)
+    script_args = args.script_args[1:] if args.script_args[:1] == ["--"] else args.script_args
+    run(os.path.abspath(args.root), args.store, args.debounce, args.poll, args.interval,
+        not args.no_ingest, script_args, args.log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import { Worker } from 'near-workspaces';
+import { readFileSync } from 'fs';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import { setDefaultResultOrder } from 'dns'; setDefaultResultOrder('ipv4first'); // temp fix for node >v17
+
+/**
+ * Balayage de gas déterministe dans un sandbox local (near-workspaces), sans testnet ni fonds.
+ * Piloté par Automatisation/sandboxbench.py, qui découpe la grille en lots :
+ *
+ *   node sandbox-test/grid.mjs <jobs.json> [contract.wasm]
+ *
+ * jobs.json : [{ "test": "loopSum_tx(100)", "method": "loopSum_tx", "args": { "n": 100 }, "param": "n", "x": 100 }, ...]
+ * Une ligne "@@BENCH {json}" par appel sur stdout (protocole de Automatisation/rowstream.py).
+ */
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+
+const JOBS_PATH = process.argv[2];
+const WASM_PATH = process.argv[3] || path.resolve(__dirname, '../build/contract.wasm');
+// appels simultanés dans le sandbox, un compte appelant chacun (nonces indépendants)
+const CONCURRENCY = Math.max(1, Number(process.env['SANDBOX_CONCURRENCY'] || 4));
+const TX_GAS = '300000000000000'; // 300 TGas
+const PREFIX = '@@BENCH ';
+
+let emittedRows = 0;
+
+function emit(type, fields = {}) {
+  const msg = { v: 1, type };
+  for (const [k, v] of Object.entries(fields)) {
+    if (v !== undefined && v !== null) msg[k] = typeof v === 'bigint' ? v.toString() : v;
+  }
+  process.stdout.write(PREFIX + JSON.stringify(msg) + '\n');
+}
+
+// gas brûlé par la transaction et par tous ses reçus (exécution du contrat comprise) ;
+// transaction_outcome seul ne couvre que la conversion en reçu, identique pour tous les appels
+function gasBurnt(outcome) {
+  let total = BigInt(outcome.transaction_outcome.outcome.gas_burnt);
+  for (const r of outcome.receipts_outcome) total += BigInt(r.outcome.gas_burnt);
+  return total;
+}
+
+async function measure(caller, contract, job) {
+  const start = process.hrtime.bigint();
+  try {
+    const res = await caller.callRaw(contract, job.method, job.args, { gas: TX_GAS });
+    const outcome = res.result;
+    return {
+      gas: gasBurnt(outcome),
+      tx_gas: outcome.transaction_outcome.outcome.gas_burnt,
+      result: res.failed ? 'Tx Failed' : 'Tx Success',
+      extra: res.failed ? JSON.stringify(outcome.status) : undefined,
+      latency_ms: Number(process.hrtime.bigint() - start) / 1e6,
+    };
+  } catch (err) {
+    return { result: 'Tx Error', extra: err.message, latency_ms: Number(process.hrtime.bigint() - start) / 1e6 };
+  }
+}
+
+async function main() {
+  const jobs = JSON.parse(readFileSync(JOBS_PATH, 'utf8'));
+  const worker = await Worker.init();
+  try {
+    const root = worker.rootAccount;
+    const contract = await root.createSubAccount('bench');
+    await contract.deploy(WASM_PATH);
+    emit('meta', { runner: 'BenchmarkNear/sandbox-test/grid.mjs', network: 'sandbox', contract: contract.accountId, jobs: jobs.length });
+
+    const callers = [];
+    for (let i = 0; i < Math.min(CONCURRENCY, jobs.length); i++) {
+      callers.push(await root.createSubAccount(`caller${i}`));
+    }
+    let next = 0;
+    await Promise.all(callers.map(async caller => {
+      while (next < jobs.length) {
+        const job = jobs[next++];
+        const fields = await measure(caller, contract, job);
+        emittedRows++;
+        emit('row', { ts: new Date().toISOString(), test: job.test, method: job.method, param: job.param, x: job.x, ...fields });
+      }
+    }));
+  } finally {
+    emit('end', { rows: emittedRows });
+    await worker.tearDown().catch(error => {
+      console.log('Failed to stop the Sandbox:', error);
+    });
+  }
+}
+
+main().catch(err => { console.error(err); process.exit(1); });
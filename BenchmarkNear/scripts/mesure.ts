@@ -1,9 +1,10 @@
-import { connect, keyStores, Contract, Account } from 'near-api-js';
+import { connect, keyStores, Contract, Account, transactions } from 'near-api-js';
 import { promises as fsPromises } from 'fs';
 import { statSync } from 'fs';
 import path from 'path';
 import os from 'os';
 import { fileURLToPath } from 'url';
+import { STREAMING, RUN_ID, ADAPTIVE, emit, emitRow, emitEnd, sampleMore, closeControl } from './stream.js';
 
 // Adaptation ESM: __dirname
 const __filename = fileURLToPath(import.meta.url);
@@ -38,8 +39,26 @@ console.log('Utilisation du répertoire de credentials :', CREDENTIALS_DIR);
 
 const WASM_PATH = path.resolve(__dirname, '../build/contract.wasm');
 const VIEW_RUNS = 50;
+const MAX_VIEW_RUNS = 200; // garde-fou si l'orchestrateur pilote le nombre d'échantillons
 const TX_GAS = 300_000_000_000_000n; // 30 TGas
 const TX_DEPOSIT = 0n;
+const FINALITY_TIMEOUT_MS = 120_000;
+// Décomposition par phase, sur option : NEAR_TX_PHASES=1 envoie après chaque mesure une seconde
+// transaction identique (broadcast_tx_async + tx status) ; LatencyMs reste l'aller-retour
+// functionCall de la première, comparable à l'historique. NEAR_TX_FINAL=1 attend en plus la
+// finalité de cette seconde transaction (jusqu'à FINALITY_TIMEOUT_MS).
+const TX_PHASES = process.env['NEAR_TX_PHASES'] === '1';
+const TX_FINAL = process.env['NEAR_TX_FINAL'] === '1';
+
+// Phases d'une transaction, horodatées en ms (process.hrtime.bigint, monotone) depuis le début de la mesure :
+//   signed       transaction signée (nonce et hash de bloc récupérés par RPC, puis signature)
+//   submitted    retour de broadcast_tx_async : le RPC a accepté la transaction
+//   acknowledged transaction connue du nœud (tx status, wait_until NONE)
+//   included     transaction incluse dans un bloc (wait_until INCLUDED)
+//   executed     reçus exécutés (EXECUTED_OPTIMISTIC, statut auquel functionCall rend la main)
+//   final        bloc finalisé (FINAL, avec NEAR_TX_FINAL=1)
+const PHASES = ['signed', 'submitted', 'acknowledged', 'included', 'executed', 'final'] as const;
+type Phases = Partial<Record<typeof PHASES[number], number>>;
 
 interface Result {
   testName: string;
@@ -49,6 +68,16 @@ interface Result {
   ci95ms?: number;
   result: string;
   extra?: string;
+  phases?: Phases;
+}
+
+// Envoie le résultat à l'orchestrateur dès la fin de la mesure (si BENCH_STREAM=1)
+function record(results: Result[], r: Result): void {
+  results.push(r);
+  emitRow({
+    test: r.testName, gas: r.actualGasUsed, latency_ms: r.latencyMs, std_ms: r.stdLatencyMs,
+    ci95_ms: r.ci95ms, result: r.result, extra: r.extra, phases_ms: r.phases
+  });
 }
 
 // Initialise et retourne l'objet Account connecté
@@ -76,6 +105,23 @@ async function deployContract(account: Account): Promise<Result> {
   return result;
 }
 
+function since(t0: bigint): number {
+  return Number((Number(process.hrtime.bigint() - t0) / 1e6).toFixed(3));
+}
+
+// tx avec wait_until : le RPC rend la main après ~10 s sans atteindre le statut ; on réessaie jusqu'au délai
+async function waitStatus(provider: any, hash: Uint8Array, waitUntil: string, t0: bigint): Promise<any> {
+  for (;;) {
+    try {
+      return await provider.txStatus(hash, CONTRACT_ACCOUNT, waitUntil);
+    } catch (err: any) {
+      const retryable = /timeout|UNKNOWN_TRANSACTION/i.test(`${err.type || ''} ${err.message || ''}`);
+      if (!retryable || since(t0) > FINALITY_TIMEOUT_MS) throw err;
+      await new Promise(resolve => setTimeout(resolve, 200));
+    }
+  }
+}
+
 // Mesure un appel transactionnel (@call)
 async function measureTx(name: string, account: Account, method: string, args: any): Promise<Result> {
   const start = Date.now();
@@ -89,19 +135,55 @@ async function measureTx(name: string, account: Account, method: string, args: a
   const end = Date.now();
   const gasUsed = res.transaction_outcome.outcome.gas_burnt.toString();
   const result: Result = { testName: name, actualGasUsed: gasUsed, latencyMs: end - start, result: 'Tx Success' };
-  console.log(`[TX]    ${name} • gas=${result.actualGasUsed} • latency=${result.latencyMs}ms`);
+  if (TX_PHASES) result.phases = await measurePhases(account, method, args);
+  const phases = result.phases ?? {};
+  console.log(
+    `[TX]    ${name} • gas=${result.actualGasUsed} • latency=${result.latencyMs}ms`
+    + PHASES.filter(p => phases[p] !== undefined).map(p => ` ${p}=${phases[p]!.toFixed(0)}`).join('')
+  );
   return result;
 }
 
+// Seconde transaction identique, envoyée en asynchrone pour horodater chaque phase
+async function measurePhases(account: Account, method: string, args: any): Promise<Phases> {
+  const provider = account.connection.provider as any;
+  const phases: Phases = {};
+  const t0 = process.hrtime.bigint();
+  const action = transactions.functionCall(method, args, TX_GAS, TX_DEPOSIT);
+  // signTransaction est protégée dans near-api-js ; functionCall l'enchaîne avec un envoi bloquant
+  const [hash, signedTx] = await (account as any).signTransaction(CONTRACT_ACCOUNT, [action]);
+  phases.signed = since(t0);
+  await provider.sendTransactionAsync(signedTx);
+  phases.submitted = since(t0);
+  await waitStatus(provider, hash, 'NONE', t0);
+  phases.acknowledged = since(t0);
+  await waitStatus(provider, hash, 'INCLUDED', t0);
+  phases.included = since(t0);
+  const res = await waitStatus(provider, hash, 'EXECUTED_OPTIMISTIC', t0);
+  phases.executed = since(t0);
+  if (TX_FINAL) {
+    await waitStatus(provider, hash, 'FINAL', t0);
+    phases.final = since(t0);
+  }
+  if (typeof res.status === 'object' && 'Failure' in res.status) {
+    throw new Error(`${method} : ${JSON.stringify(res.status.Failure)}`);
+  }
+  return phases;
+}
+
 // Mesure un appel en lecture (@view) avec écart type et CI 95%
+// En mode adaptatif, l'orchestrateur décide après chaque échantillon s'il en faut d'autres
 async function measureView(name: string, contract: any, args: any): Promise<Result> {
   // warm-up
   await contract[name](args);
   const latencies: number[] = [];
-  for (let i = 0; i < VIEW_RUNS; i++) {
+  const maxRuns = ADAPTIVE ? MAX_VIEW_RUNS : VIEW_RUNS;
+  for (let i = 0; i < maxRuns; i++) {
     const start = Date.now();
     await contract[name](args);
-    latencies.push(Date.now() - start);
+    const latency = Date.now() - start;
+    latencies.push(latency);
+    if (ADAPTIVE && !(await sampleMore(name, latency))) break;
   }
   const n = latencies.length;
   const mean = latencies.reduce((a, b) => a + b, 0) / n;
@@ -127,9 +209,10 @@ async function measureView(name: string, contract: any, args: any): Promise<Resu
 async function main() {
   const account = await initAccount();
   const results: Result[] = [];
+  emit('meta', { runner: 'BenchmarkNear/scripts/mesure.ts', network: NETWORK_ID, contract: CONTRACT_ACCOUNT });
 
   // déploiement
-  results.push(await deployContract(account));
+  record(results, await deployContract(account));
 
   // instanciation du contrat avec wrappers transactionnels
   const viewMethods = [
@@ -166,25 +249,35 @@ async function main() {
   });
 
   // bench TX setValue
-  results.push(await measureTx('setValue', account, 'setValue', { value: 42 }));
+  record(results, await measureTx('setValue', account, 'setValue', { value: 42 }));
 
   // bench view + transaction pour chaque méthode
   for (const [name, args] of viewTests) {
-    results.push(await measureView(name, contract, args));
+    record(results, await measureView(name, contract, args));
     // transaction wrapper
-    results.push(await measureTx(`${name}_tx`, account, `${name}_tx`, args));
+    record(results, await measureTx(`${name}_tx`, account, `${name}_tx`, args));
   }
 
   // récap console & CSV
   console.log('\n=== Résultats complets ===');
   console.table(results, ['testName','actualGasUsed','latencyMs','stdLatencyMs','ci95ms','result','extra']);
 
+  if (STREAMING) {
+    emitEnd();
+    closeControl();
+  }
+
+  // CSV écrit aussi en mode flux (scripts d'analyse sur CSV) ; le run_id de l'orchestrateur
+  // dans le nom permet à ingest.py de reconnaître le run déjà reçu en flux
   const ts = new Date().toISOString().replace(/:/g,'-');
-  const outPath = path.resolve(__dirname, `../../Results/Data/Near/near-benchmark_${ts}.csv`);
+  const suffix = STREAMING && RUN_ID ? `__${RUN_ID}` : '';
+  const outPath = path.resolve(__dirname, `../../Results/Data/Near/near-benchmark_${ts}${suffix}.csv`);
   await fsPromises.mkdir(path.dirname(outPath), { recursive:true });
-  const header = 'TestName,GasUsed,LatencyMs,StdMs,CI95ms,Result,Extra\n';
+  // horodatages des phases avant Result/Extra : Extra reste la dernière colonne
+  const header = `TestName,GasUsed,LatencyMs,StdMs,CI95ms,${PHASES.map(p => `T_${p}`).join(',')},Result,Extra\n`;
   const csv = results.map(r => [
-    r.testName, r.actualGasUsed||'', r.latencyMs, r.stdLatencyMs, r.ci95ms, r.result, r.extra||''
+    r.testName, r.actualGasUsed||'', r.latencyMs, r.stdLatencyMs, r.ci95ms,
+    ...PHASES.map(p => r.phases?.[p] ?? ''), r.result, r.extra||''
   ].join(',')).join('\n');
   await fsPromises.writeFile(outPath, header + csv);
   console.log(`Saved CSV to ${outPath}`);
@@ -0,0 +1,68 @@
+/**
+ * Protocole de résultats en flux vers l'orchestrateur (Automatisation/rowstream.py)
+ * Actif seulement si BENCH_STREAM=1 : une ligne "@@BENCH {json}" par mesure sur stdout
+ */
+import readline from 'readline';
+
+export const STREAMING = process.env['BENCH_STREAM'] === '1';
+export const RUN_ID = process.env['BENCH_RUN_ID'] || '';
+
+const PREFIX = '@@BENCH ';
+let emittedRows = 0;
+
+export function emit(type: string, fields: Record<string, unknown> = {}): void {
+  if (!STREAMING) return;
+  const msg: Record<string, unknown> = { v: 1, type };
+  for (const [k, v] of Object.entries(fields)) {
+    if (v !== undefined && v !== null) msg[k] = typeof v === 'bigint' ? v.toString() : v;
+  }
+  process.stdout.write(PREFIX + JSON.stringify(msg) + '\n');
+}
+
+export function emitRow(fields: Record<string, unknown>): void {
+  emittedRows++;
+  emit('row', { ts: new Date().toISOString(), ...fields });
+}
+
+export function emitEnd(): void {
+  emit('end', { rows: emittedRows });
+}
+
+// --- Échantillonnage adaptatif piloté par l'orchestrateur (BENCH_ADAPTIVE=1) ---
+// Après chaque échantillon, le runner attend "more" ou "stop" sur stdin.
+
+export const ADAPTIVE = STREAMING && process.env['BENCH_ADAPTIVE'] === '1';
+
+let control: readline.Interface | null = null;
+let controlClosed = false;
+const bufferedReplies: string[] = [];
+const waiting: ((line: string) => void)[] = [];
+
+function nextReply(): Promise<string> {
+  if (!control) {
+    control = readline.createInterface({ input: process.stdin });
+    control.on('line', line => {
+      const w = waiting.shift();
+      if (w) w(line); else bufferedReplies.push(line);
+    });
+    // stdin fermé : on arrête proprement toutes les mesures en attente
+    control.on('close', () => {
+      controlClosed = true;
+      while (waiting.length) waiting.shift()!('stop');
+    });
+  }
+  if (controlClosed) return Promise.resolve('stop');
+  const buffered = bufferedReplies.shift();
+  if (buffered !== undefined) return Promise.resolve(buffered);
+  return new Promise(resolve => waiting.push(resolve));
+}
+
+export async function sampleMore(test: string, latencyMs: number): Promise<boolean> {
+  emit('sample', { test, latency_ms: latencyMs });
+  return (await nextReply()).trim() === 'more';
+}
+
+export function closeControl(): void {
+  control?.close();
+  process.stdin.unref?.();
+}